@@ -2,45 +2,81 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import os
-import joblib
+import uuid
+from time import perf_counter
+from scripts.forest_engine import predict_interval
+from scripts.tree_attribution import tree_shap, top_contributors
+from scripts.feature_vectorizer import SynthesisVectorizer, CoatingVectorizer
+from scripts.monomer_parser import MonomerParser, format_recipe
+from scripts.model_store import active_models
+from scripts.prewarm import Prewarmer, import_modules
+from scripts.instrumentation import span
+from scripts.audit_log import record as audit_record, enabled as audit_enabled
+
+# 스크립트 1회 실행(렌더링) 전체 시간 계측 (SIM_METRICS=1 일 때만 기록)
+render_span = span("app_render")
 
 # 프로젝트 경로 설정 (상대 경로 적용)
 BASE_PATH = os.path.dirname(os.path.abspath(__file__))
 MODEL_DIR = os.path.join(BASE_PATH, "models")
 
+# 모델 / 피처 목록 / 범주 맵을 세션 간 재사용 (프로세스 공용, 현재 모델 버전의 번들에서 한 번에 읽음)
+# 새 버전이 발행되면(models/versions/CURRENT 교체) 재시작 없이 다음 재실행부터 새 묶음 사용, 실행 중인 재실행은 기존 묶음으로 끝남
 def load_all_models():
-    synthesis_models = {}
-    coating_models = {}
-    if not os.path.exists(MODEL_DIR):
-        return synthesis_models, coating_models
-        
-    for file in os.listdir(MODEL_DIR):
-        if not file.endswith(".joblib"):
-            continue
-        
-        full_path = os.path.join(MODEL_DIR, file)
-        if "model_rf_adhesion" in file:
-            coating_models['점착력'] = joblib.load(full_path)
-        else:
-            target_name = file.replace("model_rf_", "").replace(".joblib", "")
-            synthesis_models[target_name] = joblib.load(full_path)
-            
-    return synthesis_models, coating_models
+    with span("load_models"):
+        return active_models()
+
+# 피처명 -> 열 인덱스 맵은 모델 버전당 한 번만 생성
+@st.cache_resource(max_entries=2)
+def load_vectorizers(version, _bundle):
+    syn, coat = _bundle['synthesis_features'], _bundle['coating_features']
+    return (SynthesisVectorizer(syn) if syn else None), (CoatingVectorizer(coat) if coat else None)
+
+# 민감도 분석 배경 데이터(실험 이력 표본)는 모델 버전 / 피처 목록당 한 번만 읽음
+@st.cache_data(max_entries=2)
+def load_sensitivity_background(version, features):
+    from scripts.sensitivity_analysis import load_background
+    return load_background(list(features), max_rows=100)
+
+# 첫 화면에 필요 없는 무거운 import / 자원은 첫 렌더링 이후 백그라운드에서 준비 (스크립트 끝에서 시작)
+def load_experiment_index_task():
+    from scripts.experiment_index import load_experiment_index
+    return load_experiment_index()
 
-def get_feature_list(filename):
-    path = os.path.join(MODEL_DIR, filename)
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8-sig") as f:
-            return [line.strip() for line in f.readlines()]
-    return []
+@st.cache_resource
+def get_prewarmer():
+    return Prewarmer([
+        ("experiment_index", load_experiment_index_task),
+        ("optimize", import_modules("scripts.optimize_recipe")),
+        ("plotly_express", import_modules("plotly.express")),
+        ("sensitivity", import_modules("scripts.sensitivity_analysis")),
+    ])
+
+# 예측 / 역설계 요청 감사 기록 (버퍼에 넣기만 하므로 화면 응답을 막지 않음, SIM_AUDIT=0 이면 비활성)
+# 위젯 조작마다 스크립트 전체가 재실행되므로, 같은 세션에서 입력이 그대로인 예측은 다시 기록하지 않음 (dedupe)
+def audit_request(kind, inputs, outputs, latency, dedupe=True):
+    if not audit_enabled():
+        return
+    if dedupe:
+        key = repr(inputs)
+        last = st.session_state.setdefault("_audit_last", {})
+        if last.get(kind) == key:
+            return
+        last[kind] = key
+    session = st.session_state.setdefault("_audit_session", uuid.uuid4().hex[:12])
+    audit_record(kind, inputs, outputs, model_version=model_version, latency=latency, source="app", session=session)
 
 # 페이지 설정
 st.set_page_config(page_title="Polymer Property Simulator", layout="wide")
 
 # 모델 및 피처 로드
-syn_models, coat_models = load_all_models()
-syn_features = get_feature_list("feature_list.txt")
-coat_features = get_feature_list("coating_feature_list.txt")
+model_version, model_bundle = load_all_models()
+syn_models, coat_models = model_bundle['synthesis_models'], model_bundle['coating_models']
+syn_features, coat_features = model_bundle['synthesis_features'], model_bundle['coating_features']
+syn_categories, coat_categories = model_bundle['categories']['synthesis'], model_bundle['categories']['coating']
+syn_vectorizer, coat_vectorizer = load_vectorizers(model_version, model_bundle)
+prewarmer = get_prewarmer()
+experiment_index = prewarmer.get("experiment_index")
 
 # 세션 상태 초기화 및 콜백 정의
 # 초기 진입 시 기본 모노머 함량 세팅 (경고 방지)
@@ -72,10 +108,68 @@ def on_transfer_recipe():
             
         st.session_state['transfer_success'] = True
 
+def on_transfer_coating_recipe():
+    # 도포 역설계 결과(선택한 원단 / 순위)를 도포 시뮬레이터 입력으로 반영
+    result = st.session_state.get('coat_opt_result')
+    fabric = st.session_state.get('coat_opt_view_fabric')
+    if result is None or fabric not in result['recipes']:
+        return
+    recipes = result['recipes'][fabric]
+    recipe = recipes[min(st.session_state.get('coat_opt_rank', 1), len(recipes)) - 1]
+    
+    # 1. 모든 경화제 / 첨가제 입력값을 0.0으로 초기화
+    for feat in coat_categories['hardener'] + coat_categories['additive']:
+        st.session_state[f"coat_{feat}"] = 0.0
+    
+    # 2. 원단 / 도포량 / 성분 함량 동기화
+    st.session_state["coat_fabric"] = fabric
+    st.session_state["coat_weight"] = recipe['도포량_num']
+    for feat, v in recipe.items():
+        if feat != '도포량_num':
+            st.session_state[f"coat_{feat}"] = float(v)
+    
+    st.session_state['coat_transfer_success'] = True
+
+def on_apply_recipe_string():
+    # 실험 기록 형식의 배합 문자열(예: "BA 89.7 / MMA 9 / AA 1.3")을 모노머 입력값으로 반영
+    monomer_feats = syn_categories['monomer']
+    try:
+        phr, _ = MonomerParser(monomer_feats).parse([st.session_state.get("syn_recipe_text", "")])
+    except KeyError as e:
+        st.session_state['recipe_parse_error'] = e.args[0]
+        return
+    if not phr.any():
+        st.session_state['recipe_parse_error'] = "배합 문자열에서 모노머를 찾지 못했습니다."
+        return
+    for j, feat in enumerate(monomer_feats):
+        st.session_state[f"syn_{feat}"] = float(phr[0, j])
+    st.session_state.pop('recipe_parse_error', None)
+
+def render_contributions(model, input_matrix, features, target, k=8):
+    import plotly.graph_objects as go
+    
+    with span("explain"):
+        bias, contributions = tree_shap(model, input_matrix)
+    top = top_contributors(contributions[0], features, k=k)
+    if not top:
+        st.write("기여도가 있는 변수가 없습니다.")
+        return
+    names = [name for name, _ in top][::-1]
+    values = [value for _, value in top][::-1]
+    fig = go.Figure(go.Bar(x=values, y=names, orientation='h',
+                           marker_color=['crimson' if v > 0 else 'steelblue' for v in values]))
+    fig.update_layout(height=40 + 30 * len(top), margin=dict(t=10, b=0, l=0, r=0),
+                      xaxis_title=f"{target} 기여도")
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"기준값(학습 데이터 평균 예측) {bias[0]:.2f} + 기여도 합계 {contributions[0].sum():.2f} "
+               f"= 예측값 {bias[0] + contributions[0].sum():.2f}")
+
 st.title("AI 고분자 물성 시뮬레이션 시스템")
+if model_version:
+    st.caption(f"모델 버전: {model_version}")
 st.markdown("---")
 
-tab1, tab2, tab3 = st.tabs(["🧪 합성 시뮬레이터", "🏗️ 도포 시뮬레이터", "🎯 역설계 시뮬레이터"])
+tab1, tab2, tab3, tab4 = st.tabs(["🧪 합성 시뮬레이터", "🏗️ 도포 시뮬레이터", "🎯 역설계 시뮬레이터", "🔬 민감도 분석"])
 
 with tab1:
     # ... (생략된 기존 tab1 로직은 유지됨)
@@ -97,10 +191,15 @@ with tab1:
 
             st.subheader("모노머 배합비 (phr)")
             st.info("합계가 100 phr이 되도록 입력을 권장합니다.")
+            with st.expander("📝 배합 문자열로 입력", expanded=False):
+                st.text_input("배합 문자열", placeholder="BA 89.7 / MMA 9 / AA 1.3", key="syn_recipe_text")
+                st.button("배합 적용", on_click=on_apply_recipe_string, key="syn_recipe_apply")
+                if 'recipe_parse_error' in st.session_state:
+                    st.error(st.session_state['recipe_parse_error'])
             sum_placeholder = st.empty()
             
             monomer_inputs = {}
-            monomer_feats = [f for f in syn_features if f.startswith("monomer_")]
+            monomer_feats = syn_categories['monomer']
             
             # 모노머 분류 정의 (화학적 특성 기반)
             soft_monomers = ["BA", "2-EHA", "EA", "LMA"]  # Low Tg (Soft segment)
@@ -173,11 +272,12 @@ with tab1:
                 sum_placeholder.warning(f"현재 합계: {total_phr:.2f} phr")
             else:
                 sum_placeholder.success(f"현재 합계: {total_phr:.2f} phr (정상)")
+            st.caption(f"배합 문자열: {format_recipe(monomer_inputs)}")
 
         with col2:
             st.subheader("합성 결과 예측 대시보드")
             
-            # 입력 데이터 구성
+            # 입력 데이터 구성 (학습 피처 순서의 행 벡터, 화학적 도메인 피처는 실시간 계산)
             input_dict = {
                 '온도': temp,
                 '반응시간': time,
@@ -185,29 +285,45 @@ with tab1:
                 'Scale': scale
             }
             input_dict.update(monomer_inputs)
-            
-            # 화학적 도메인 피처 추가 (실시간 계산)
-            from scripts.chemical_db import get_chemical_features
-            chem_f = get_chemical_features(monomer_inputs)
-            input_dict.update(chem_f)
-            
-            input_df = pd.DataFrame([input_dict])
-            
-            # 피처 목록 동기화 및 순서 고정
-            for col in syn_features:
-                if col not in input_df.columns:
-                    input_df[col] = 0
-            input_df = input_df[syn_features]
+            with span("assemble_inputs", kind="synthesis"):
+                input_matrix = syn_vectorizer.transform(input_dict)
 
             res_cols = st.columns(len(syn_models))
+            syn_outputs, syn_latency = {}, 0.0
             for i, (target, model) in enumerate(syn_models.items()):
-                prediction = model.predict(input_df)[0]
+                # 트리별 예측 분포로 평균과 90% 구간을 함께 계산 (단일 순회)
+                start = perf_counter()
+                with span("predict", model=target):
+                    interval = predict_interval(model, input_matrix, quantiles=(0.05, 0.95))
+                syn_latency += perf_counter() - start
+                prediction = interval['mean'][0]
+                syn_outputs[target] = {'mean': prediction, 'std': interval['std'][0]}
+                lower, upper = interval['quantiles'][0.05][0], interval['quantiles'][0.95][0]
                 with res_cols[i]:
-                    st.metric(label=f"예상 {target}", value=f"{prediction:.2f}")
+                    st.metric(label=f"예상 {target}", value=f"{prediction:.2f}",
+                              help="트리 앙상블 평균값이며, 아래 구간은 개별 트리 예측의 5~95% 분위 범위입니다.")
+                    st.caption(f"90% 구간: {lower:.2f} ~ {upper:.2f} (σ {interval['std'][0]:.2f})")
+            audit_request("synthesis", input_dict, syn_outputs, syn_latency)
+            
+            # 예측 근거: 변수별 기여도 (TreeSHAP, 기준값 + 기여도 합 = 예측값)
+            # 접힌 expander 안의 코드도 매 재실행마다 실행되므로, 기여도 계산 / 차트(plotly import)는 체크했을 때만 수행
+            with st.expander("🔍 예측 근거 (변수별 기여도)", expanded=False):
+                if st.checkbox("변수별 기여도 계산", key="syn_explain_show"):
+                    explain_target = st.selectbox("설명할 물성", list(syn_models.keys()), key="syn_explain_target")
+                    render_contributions(syn_models[explain_target], input_matrix, syn_features, explain_target)
+            
+            # 가장 유사한 과거 실험 (정규화 피처 공간 최근접 검색)
+            if experiment_index is not None and experiment_index.features == syn_features:
+                st.markdown("---")
+                st.write("가장 유사한 과거 실험 배치:")
+                neighbors = experiment_index.query(input_matrix, k=3)[0]
+                st.dataframe(neighbors, hide_index=True, use_container_width=True)
+            elif prewarmer.pending("experiment_index"):
+                st.caption("과거 실험 검색 인덱스를 준비하고 있습니다. 다음 입력부터 유사한 과거 실험이 표시됩니다.")
             
             st.markdown("---")
             st.write("입력 데이터 상세:")
-            st.dataframe(input_df.T.rename(columns={0: "값"}))
+            st.dataframe(pd.DataFrame(input_matrix, columns=syn_features).T.rename(columns={0: "값"}))
 
 with tab2:
     st.header("코팅 공정 및 도포 성능 예측")
@@ -219,12 +335,15 @@ with tab2:
         with col1:
             st.subheader("도포 조건 입력")
             
-            # 도포량
-            coat_weight = st.number_input("도포량 (g/m² 또는 #bar 등 수치)", 0.0, 50.0, 2.7, key="coat_weight")
+            # 도포량 (입력 기본값은 세션 상태로 초기화 - 역설계 결과 전송 시 위젯 기본값과 충돌 방지)
+            if "coat_weight" not in st.session_state: st.session_state["coat_weight"] = 2.7
+            coat_weight = st.number_input("도포량 (g/m² 또는 #bar 등 수치)", 0.0, 50.0, key="coat_weight")
             
             # 원단 선택 (fabric_ 피처 기반)
-            fabric_options = [f.replace("fabric_", "") for f in coat_features if f.startswith("fabric_")]
-            selected_fabric = st.selectbox("기재(원단) 선택", fabric_options, index=fabric_options.index("T45") if "T45" in fabric_options else 0, key="coat_fabric")
+            fabric_options = [f.replace("fabric_", "") for f in coat_categories['fabric']]
+            if st.session_state.get("coat_fabric") not in fabric_options:
+                st.session_state["coat_fabric"] = "T45" if "T45" in fabric_options else fabric_options[0]
+            selected_fabric = st.selectbox("기재(원단) 선택", fabric_options, key="coat_fabric")
             
             st.subheader("첨가제 및 경화제 (%)")
             # st.info("첨가제 및 경화제의 투입 비율(%)을 입력합니다.")
@@ -240,26 +359,28 @@ with tab2:
             additive_inputs = {}
             
             # 1. 경화제 (Hardener) 섹션
-            hardeners = [f for f in coat_features if f.startswith("hardener_")]
+            hardeners = coat_categories['hardener']
             if hardeners:
                 with st.expander("🛠️ 경화제 설정 (Hardener)", expanded=True):
                     cols = st.columns(2)
                     for i, feat in enumerate(hardeners):
                         name = feat.replace("hardener_", "")
-                        default_val = default_additives.get(feat, 0.0)
+                        key = f"coat_{feat}"
+                        if key not in st.session_state: st.session_state[key] = default_additives.get(feat, 0.0)
                         with cols[i % 2]:
-                            additive_inputs[feat] = st.number_input(f"{name} (%)", 0.0, 20.0, default_val, key=f"coat_{feat}")
+                            additive_inputs[feat] = st.number_input(f"{name} (%)", 0.0, 20.0, key=key)
 
             # 2. 첨가제 (Additive) 섹션
-            additives = [f for f in coat_features if f.startswith("additive_")]
+            additives = coat_categories['additive']
             if additives:
                 with st.expander("💧 첨가제 설정 (Additive)", expanded=False):
                     cols = st.columns(2)
                     for i, feat in enumerate(additives):
                         name = feat.replace("additive_", "")
-                        default_val = default_additives.get(feat, 0.0)
+                        key = f"coat_{feat}"
+                        if key not in st.session_state: st.session_state[key] = default_additives.get(feat, 0.0)
                         with cols[i % 2]:
-                            additive_inputs[feat] = st.number_input(f"{name} (%)", 0.0, 20.0, default_val, key=f"coat_{feat}")
+                            additive_inputs[feat] = st.number_input(f"{name} (%)", 0.0, 20.0, key=key)
             
             # 합계 표시
             total_coat_pct = sum(additive_inputs.values())
@@ -268,30 +389,33 @@ with tab2:
         with col2:
             st.subheader("도포 성능 예측 결과")
             
-            # 입력 딕셔너리 구성
+            # 입력 벡터 구성 (원단은 fabric_ 원-핫 열로 기록)
             coat_input_dict = {'도포량_num': coat_weight}
             coat_input_dict.update(additive_inputs)
+            with span("assemble_inputs", kind="coating"):
+                coat_matrix = coat_vectorizer.transform(coat_input_dict, fabric=selected_fabric)
             
-            # 원단 원-핫 인코딩
-            for fabric in fabric_options:
-                coat_input_dict[f"fabric_{fabric}"] = 1.0 if fabric == selected_fabric else 0.0
-            
-            coat_input_df = pd.DataFrame([coat_input_dict])
-            # 모든 학습 피처 존재 확인 후 정렬
-            for col in coat_features:
-                if col not in coat_input_df.columns:
-                    coat_input_df[col] = 0.0
-            coat_input_df = coat_input_df[coat_features]
+            # 예측 수행 (트리별 예측 분포 기반 구간 포함)
+            start = perf_counter()
+            with span("predict", model="점착력"):
+                coat_interval = predict_interval(coat_models['점착력'], coat_matrix, quantiles=(0.05, 0.95))
+            adhesion_pred = coat_interval['mean'][0]
+            audit_request("coating", dict(coat_input_dict, fabric=selected_fabric),
+                          {'점착력': {'mean': adhesion_pred, 'std': coat_interval['std'][0]}}, perf_counter() - start)
             
-            # 예측 수행
-            adhesion_pred = coat_models['점착력'].predict(coat_input_df)[0]
+            st.metric(label="예상 점착력 (gf/25mm)", value=f"{adhesion_pred:.2f}",
+                      help="트리 앙상블 평균값이며, 아래 구간은 개별 트리 예측의 5~95% 분위 범위입니다.")
+            st.caption(f"90% 구간: {coat_interval['quantiles'][0.05][0]:.2f} ~ "
+                       f"{coat_interval['quantiles'][0.95][0]:.2f} (σ {coat_interval['std'][0]:.2f})")
             
-            st.metric(label="예상 점착력 (gf/25mm)", value=f"{adhesion_pred:.2f}")
+            with st.expander("🔍 예측 근거 (변수별 기여도)", expanded=False):
+                if st.checkbox("변수별 기여도 계산", key="coat_explain_show"):
+                    render_contributions(coat_models['점착력'], coat_matrix, coat_features, "점착력")
             
             st.markdown("---")
             st.info("도포 모델은 경화제 종류와 기재 타입에 따른 점착력 변동을 예측합니다.")
             st.write("입력 조건 요약:")
-            st.dataframe(coat_input_df.T.rename(columns={0: "값"}))
+            st.dataframe(pd.DataFrame(coat_matrix, columns=coat_features).T.rename(columns={0: "값"}))
 
 with tab3:
     st.header("목표 물성 기반 역설계 (Inverse Design)")
@@ -339,7 +463,7 @@ with tab3:
                 
                 # 2. 필수/제외 모노머 선택
                 # 모노머 리스트 준비
-                monomer_list = [f.replace("monomer_", "") for f in syn_features if f.startswith("monomer_")]
+                monomer_list = [f.replace("monomer_", "") for f in syn_categories['monomer']]
                 
                 required_monomers = st.multiselect("필수 포함 모노머", monomer_list, placeholder="반드시 포함할 성분 선택")
                 excluded_monomers = st.multiselect("사용 제외 모노머", monomer_list, placeholder="사용하지 않을 성분 선택")
@@ -348,6 +472,8 @@ with tab3:
             opt_temp = st.number_input("중합 온도 (°C)", 50, 120, 80, key="opt_temp")
             opt_time = st.number_input("반응 시간 (hr)", 0.0, 24.0, 4.5, key="opt_time")
             opt_solid = st.number_input("이론 고형분 (%)", 10.0, 70.0, 48.0, key="opt_solid")
+            uncertainty_weight = st.slider("예측 불확실성 페널티", 0.0, 2.0, 0.0, step=0.1,
+                                           help="트리 간 예측 편차가 큰(신뢰도가 낮은) 배합비에 불이익을 줍니다. 추가 모델 연산은 발생하지 않습니다.")
             
             if st.button("최적 배합비 산출 시작 🚀", use_container_width=True):
                 if not targets_dict:
@@ -369,7 +495,13 @@ with tab3:
                     }
                     
                     with st.spinner("다중 목표 및 제약 조건을 만족하는 배합비를 계산 중입니다..."):
-                        recipe, err = optimize_recipe(targets_dict, params, constraints)
+                        start = perf_counter()
+                        with span("optimize", targets=len(targets_dict)):
+                            recipe, err = optimize_recipe(targets_dict, params, constraints,
+                                                          uncertainty_weight=uncertainty_weight)
+                        audit_request("optimize", {'targets': targets_dict, 'params': params, 'constraints': constraints,
+                                                   'uncertainty_weight': uncertainty_weight},
+                                      recipe or {'error': err}, perf_counter() - start, dedupe=False)
                         
                         if recipe:
                             st.session_state['opt_result'] = recipe
@@ -416,6 +548,178 @@ with tab3:
             else:
                 st.write("왼쪽에서 목표 설정을 완료한 후 버튼을 클릭해 주세요.")
 
+    # 도포 조건 역설계: 목표 점착력 -> 원단별 도포량 / 경화제 / 첨가제 추천
+    st.markdown("---")
+    st.subheader("도포 조건 역설계 (목표 점착력)")
+    if not coat_models:
+        st.error("학습된 도포 모델이 없어 도포 조건 역설계를 사용할 수 없습니다.")
+    else:
+        st.info("목표 점착력을 입력하면 허용한 모든 원단에 대해 도포량과 경화제 / 첨가제 함량을 한 번에 탐색하여 원단별 추천 조건을 제시합니다.")
+        
+        coat_opt_col1, coat_opt_col2 = st.columns([1, 2])
+        
+        with coat_opt_col1:
+            coat_fabric_options = [f.replace("fabric_", "") for f in coat_categories['fabric']]
+            coat_target = st.number_input("목표 점착력 (gf/25mm)", 0.0, 5000.0, 300.0, step=10.0, key="coat_opt_target")
+            coat_allowed = st.multiselect("허용 원단 (비우면 전체)", coat_fabric_options, key="coat_opt_fabrics")
+            weight_min, weight_max = st.slider("도포량 탐색 범위", 0.0, 50.0, (1.0, 10.0), step=0.1, key="coat_opt_weight_range")
+            with st.expander("🧩 성분 제약 조건", expanded=False):
+                component_options = coat_categories['hardener'] + coat_categories['additive']
+                coat_excluded = st.multiselect("사용 제외 경화제 / 첨가제", component_options,
+                                               format_func=lambda f: f.split("_", 1)[1], key="coat_opt_excluded")
+                coat_max_components = st.slider("최대 사용 성분 수", 1, 6, 3, key="coat_opt_max_components")
+                coat_max_total = st.number_input("경화제 + 첨가제 합계 상한 (%)", 0.5, 20.0, 20.0, key="coat_opt_max_total")
+            coat_uncertainty = st.slider("예측 불확실성 페널티", 0.0, 2.0, 0.0, step=0.1, key="coat_opt_uncertainty",
+                                         help="트리 간 예측 편차가 큰(신뢰도가 낮은) 조건에 불이익을 줍니다.")
+            
+            if st.button("최적 도포 조건 산출 🚀", use_container_width=True, key="coat_opt_run"):
+                from scripts.optimize_coating import optimize_coating
+                
+                # 현재 도포 시뮬레이터 입력을 초기 후보로 포함
+                current = {'도포량_num': st.session_state.get("coat_weight", 2.7)}
+                current.update({f: st.session_state.get(f"coat_{f}", 0.0) for f in component_options})
+                with st.spinner("모든 원단에 대해 도포 조건을 탐색 중입니다..."):
+                    start = perf_counter()
+                    with span("optimize_coating"):
+                        coat_result, coat_err = optimize_coating(
+                            coat_target, fabrics=coat_allowed or None,
+                            components=[f for f in component_options if f not in coat_excluded],
+                            weight_range=(weight_min, weight_max), max_components=coat_max_components,
+                            max_total=coat_max_total, uncertainty_weight=coat_uncertainty, initial=current)
+                    audit_request("optimize_coating",
+                                  {'target': coat_target, 'fabrics': coat_allowed, 'excluded': coat_excluded,
+                                   'weight_range': [weight_min, weight_max], 'max_components': coat_max_components,
+                                   'max_total': coat_max_total, 'uncertainty_weight': coat_uncertainty},
+                                  coat_result['summary'].head(5).drop(columns=['원단 반영'], errors='ignore')
+                                  if coat_result else {'error': coat_err},
+                                  perf_counter() - start, dedupe=False)
+                if coat_result:
+                    st.session_state['coat_opt_result'] = coat_result
+                    st.session_state['coat_opt_target_value'] = coat_target
+                else:
+                    st.error(f"오류 발생: {coat_err}")
+        
+        with coat_opt_col2:
+            st.subheader("원단별 추천 도포 조건")
+            
+            if 'coat_opt_result' in st.session_state:
+                coat_result = st.session_state['coat_opt_result']
+                summary = coat_result['summary']
+                st.success(f"목표 점착력 {st.session_state['coat_opt_target_value']:.0f} gf/25mm 에 대해 "
+                           f"{len(summary)}개 원단을 탐색했습니다. (세대 {coat_result['generations']}회, "
+                           f"후보 {coat_result['evaluations']:,}건)")
+                st.dataframe(summary.head(20).style.format(
+                    {'도포량': "{:.2f}", '예상 점착력': "{:.1f}", 'σ': "{:.1f}", '손실': "{:.2e}"}),
+                    use_container_width=True)
+                if not summary['원단 반영'].all():
+                    st.caption("'원단 반영'이 False 인 원단은 모델이 구분하지 않아(학습 데이터 부족) 같은 추천 조건을 공유합니다.")
+                if coat_result['ignored']:
+                    st.caption("모델 예측에 영향이 없어 탐색에서 제외된 성분: "
+                               + ", ".join(f.split("_", 1)[1] for f in coat_result['ignored']))
+                
+                view_fabric = st.selectbox("원단별 상세 순위", list(summary['원단']), key="coat_opt_view_fabric")
+                fabric_table = coat_result['tables'][view_fabric]
+                st.table(fabric_table.style.format(
+                    {'도포량': "{:.2f}", '예상 점착력': "{:.1f}", '하한 (5%)': "{:.1f}", '상한 (95%)': "{:.1f}",
+                     'σ': "{:.1f}", '손실': "{:.2e}"}))
+                
+                if st.session_state.get('coat_opt_rank', 1) > len(fabric_table):
+                    st.session_state['coat_opt_rank'] = 1
+                st.selectbox("전송할 순위", list(fabric_table.index), key="coat_opt_rank")
+                st.button("도포 시뮬레이터로 조건 전송 📤", use_container_width=True, on_click=on_transfer_coating_recipe,
+                          key="coat_opt_transfer")
+                
+                if st.session_state.get('coat_transfer_success'):
+                    st.success("도포 조건이 '도포 시뮬레이터' 탭으로 전송되었습니다. 해당 탭으로 이동하여 확인하세요.")
+                    st.session_state['coat_transfer_success'] = False
+            else:
+                st.write("왼쪽에서 목표 점착력을 설정한 후 버튼을 클릭해 주세요.")
+
+with tab4:
+    st.header("모델 민감도 분석 (Partial Dependence / ICE)")
+    st.markdown("---")
+    
+    if not syn_models:
+        st.error("학습된 합성 모델이 없어 민감도 분석을 사용할 수 없습니다.")
+    else:
+        # 민감도 분석 모듈은 계산 버튼을 눌렀을 때 import (첫 화면 이후 백그라운드 준비 작업이 미리 불러 둠)
+        sens_col1, sens_col2 = st.columns([1, 2])
+        
+        with sens_col1:
+            st.subheader("분석 조건 설정")
+            sens_target = st.selectbox("분석 대상 물성", list(syn_models.keys()), key="sens_target")
+            default_feat = syn_features.index("monomer_MMA") if "monomer_MMA" in syn_features else 0
+            sens_feature = st.selectbox("주 변수 (1-D)", syn_features, index=default_feat, key="sens_feature")
+            sens_feature_y = st.selectbox("보조 변수 (2-D 부분의존도, 선택)", ["(없음)"] + syn_features, key="sens_feature_y")
+            sens_points = st.slider("격자 점 개수", 5, 40, 20, key="sens_points")
+            show_ice = st.checkbox("개별 실험 ICE 곡선 표시", value=True, key="sens_show_ice")
+            st.caption("배경 데이터: 실제 실험 이력(최대 100건)을 기준으로 선택 변수만 바꿔가며 일괄 예측합니다.")
+            
+            # ICE / 부분의존도는 버튼을 눌렀을 때만 계산 (다른 탭 입력으로 재실행될 때마다 다시 계산하지 않음)
+            sens_key = (model_version, sens_target, sens_feature, sens_feature_y, sens_points)
+            if st.button("민감도 곡선 계산 📈", use_container_width=True, key="sens_run"):
+                from scripts.sensitivity_analysis import ice_1d, partial_dependence_2d, default_grid
+                from scripts.forest_engine import get_flat_forest
+                sens_forest = get_flat_forest(syn_models[sens_target])
+                background = load_sensitivity_background(model_version, tuple(syn_features))
+                grid = default_grid(background, syn_features.index(sens_feature), sens_points)
+                with span("sensitivity_ice"):
+                    ice, pd_curve = ice_1d(sens_forest, background, syn_features, sens_feature, grid)
+                grid_y, surface = None, None
+                if sens_feature_y != "(없음)" and sens_feature_y != sens_feature:
+                    grid_y = default_grid(background, syn_features.index(sens_feature_y), sens_points)
+                    surface = partial_dependence_2d(sens_forest, background, syn_features,
+                                                    sens_feature, sens_feature_y, grid, grid_y)
+                st.session_state['sens_result'] = {'key': sens_key, 'target': sens_target, 'feature': sens_feature,
+                                                   'feature_y': sens_feature_y, 'grid': grid, 'ice': ice,
+                                                   'pd': pd_curve, 'grid_y': grid_y, 'surface': surface}
+            
+            if st.button("전체 민감도 리포트 저장 (reports/) 📄", use_container_width=True):
+                from scripts.sensitivity_analysis import run_sensitivity, write_reports
+                with st.spinner("모든 합성 모델에 대해 민감도를 계산 중입니다..."):
+                    with span("sensitivity_report"):
+                        pd_1d_all, ice_all, pd_2d_all = run_sensitivity(
+                            [f for f in syn_features if not f.startswith("chem_")], n_points=sens_points)
+                    write_reports(pd_1d_all, ice_all, pd_2d_all)
+                st.success("reports/ 폴더에 민감도 리포트를 저장했습니다.")
+        
+        with sens_col2:
+            sens_result = st.session_state.get('sens_result')
+            if sens_result is None:
+                st.info("왼쪽에서 분석 조건을 설정한 후 '민감도 곡선 계산' 버튼을 클릭해 주세요.")
+            else:
+                import plotly.graph_objects as go
+                import plotly.express as px
+                
+                if sens_result['key'] != sens_key:
+                    st.caption("분석 조건이 변경되었습니다. 버튼을 다시 누르면 새 조건으로 계산합니다.")
+                grid, pd_curve = sens_result['grid'], sens_result['pd']
+                res_target, res_feature = sens_result['target'], sens_result['feature']
+                fig = go.Figure()
+                if show_ice:
+                    for row in sens_result['ice']:
+                        fig.add_trace(go.Scatter(x=grid, y=row, mode='lines', line=dict(color='rgba(150,150,150,0.25)', width=1),
+                                                 hoverinfo='skip', showlegend=False))
+                fig.add_trace(go.Scatter(x=grid, y=pd_curve, mode='lines+markers', name='부분의존도 (평균)',
+                                         line=dict(color='crimson', width=3)))
+                fig.update_layout(title=f"{res_feature} 변화에 따른 예상 {res_target}",
+                                  xaxis_title=res_feature, yaxis_title=f"예상 {res_target}",
+                                  margin=dict(t=40, b=0, l=0, r=0))
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(f"부분의존도 변동폭: {pd_curve.max() - pd_curve.min():.4f}")
+                
+                if sens_result['surface'] is not None:
+                    heat = px.imshow(sens_result['surface'].T, x=grid, y=sens_result['grid_y'], origin='lower', aspect='auto',
+                                     labels=dict(x=res_feature, y=sens_result['feature_y'], color=f"예상 {res_target}"),
+                                     color_continuous_scale='RdBu_r', title="2-D 부분의존도")
+                    heat.update_layout(margin=dict(t=40, b=0, l=0, r=0))
+                    st.plotly_chart(heat, use_container_width=True)
+
 st.sidebar.markdown("### 프로젝트 관리")
 st.sidebar.text("담당: 안현찬 (세계화학공업(주))")
 st.sidebar.text("최종 업데이트: 2026-02-12")
+
+render_span.stop()
+
+# 첫 화면 표시 후 백그라운드 준비 시작 (프로세스당 1회)
+prewarmer.start()
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import argparse
+import os
+import re
+import sys
+import time
+
+# 도포 기록 파서 확장성 벤치마크
+# - 현재 정제 도포 데이터(약 1,945행)를 배수만큼 복제하여 행 수별 처리 시간을 측정
+# - 기존 방식(행 단위 apply + dict 목록 -> DataFrame)과 열 단위 벡터화 파서를 비교하고 결과 동일성 확인
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+sys.path.insert(0, base_dir)
+from scripts.prepare_coating_dataset import parse_ratios, parse_val_in_bracket, parse_adhesion
+
+data_path = os.path.join(base_dir, "data_cleaned", "cleaned_coating_data.csv")
+
+
+# 기존 prepare_coating_dataset 파서 (비교 기준)
+def _legacy_ratios(text, prefix):
+    if pd.isna(text) or not isinstance(text, str):
+        return {}
+    matches = re.findall(r'([a-zA-Z0-9_가-힣]+)/([\d.]+)', text)
+    return {f'{prefix}_{name}': float(val) for name, val in matches}
+
+
+def _legacy_bracket(text):
+    if pd.isna(text) or not isinstance(text, str):
+        return None
+    match = re.search(r'\(([\d.]+)\)', text)
+    return float(match.group(1)) if match else None
+
+
+def _legacy_adhesion(text):
+    if pd.isna(text) or not isinstance(text, str):
+        return None
+    nums = re.findall(r'[\d.]+', text.split('*')[0])
+    if not nums:
+        return None
+    try:
+        float_nums = [float(n) for n in nums]
+        return sum(float_nums) / len(float_nums)
+    except:
+        return None
+
+
+def legacy_parse(df):
+    return (pd.DataFrame(df['경화제'].apply(lambda x: _legacy_ratios(x, 'hardener')).tolist()).fillna(0),
+            pd.DataFrame(df['첨가제'].apply(lambda x: _legacy_ratios(x, 'additive')).tolist()).fillna(0),
+            df['도포량'].apply(_legacy_bracket).astype(float),
+            df['점착력'].apply(_legacy_adhesion).astype(float))
+
+
+def vectorized_parse(df):
+    return (parse_ratios(df['경화제'], 'hardener'),
+            parse_ratios(df['첨가제'], 'additive'),
+            parse_val_in_bracket(df['도포량']),
+            parse_adhesion(df['점착력']))
+
+
+def _timed(func, df):
+    start = time.perf_counter()
+    out = func(df)
+    return time.perf_counter() - start, out
+
+
+def run(multipliers):
+    base = pd.read_csv(data_path, usecols=['경화제', '첨가제', '도포량', '점착력'])
+    print(f"{'rows':>10} | {'legacy (s)':>10} | {'vectorized (s)':>14} | {'speedup':>7} | identical")
+    for m in multipliers:
+        df = pd.concat([base] * m, ignore_index=True)
+        t_old, old = _timed(legacy_parse, df)
+        t_new, new = _timed(vectorized_parse, df)
+        same = all(a.equals(b) for a, b in zip(old, new))
+        print(f"{len(df):>10,} | {t_old:>10.3f} | {t_new:>14.3f} | x{t_old / t_new:>6.1f} | {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coating log parser scaling benchmark")
+    parser.add_argument("--multipliers", type=int, nargs="+", default=[1, 10, 100, 500])
+    args = parser.parse_args()
+    run(args.multipliers)
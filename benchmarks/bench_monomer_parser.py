@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import argparse
+import os
+import re
+import sys
+import time
+
+# 모노머 배합 문자열 파서 처리량 벤치마크
+# - 실제 실험 기록의 배합 문자열을 기반으로 합성 대용량 로그(기본 100만 행)를 생성
+#   (일부 배합은 함량을 소폭 변형하여 고유 문자열 수를 늘림)
+# - 기존 방식(행 단위 re.findall + dict 목록 -> DataFrame)과 MonomerParser 를 비교하고 결과 동일성 확인
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+sys.path.insert(0, base_dir)
+from scripts.monomer_parser import MonomerParser, parse_recipe, format_recipe
+
+data_path = os.path.join(base_dir, "data_cleaned", "cleaned_synthesis_data.csv")
+
+
+def _legacy_extract(text):
+    # 기존 prepare_dataset.extract_monomer_features 로직 (비교 기준)
+    if pd.isna(text) or not isinstance(text, str) or text.strip() == "":
+        return {}
+    matches = re.findall(r'([a-zA-Z가-힣0-9\-\.]+)\s*\(?([\d.]+)\)?', text)
+    features = {}
+    for name, val in matches:
+        try:
+            clean_name = name.strip('-').strip('.')
+            if clean_name.isdigit() or len(clean_name) < 2:
+                continue
+            if clean_name.upper() in ["NDM", "AIBN", "V-65", "LPO"]:
+                continue
+            features["monomer_" + clean_name] = float(val)
+        except:
+            continue
+    return features
+
+
+def synthetic_log(n_rows, n_variants=5000, seed=42):
+    """실측 배합 문자열 + 함량 변형 배합으로 n_rows 행의 배합 열 생성"""
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(data_path, encoding='utf-8-sig')['모노머'].dropna().unique().tolist()
+    parser = MonomerParser()
+    variants = []
+    for i in range(n_variants):
+        phr = parser.parse_one(base[i % len(base)])
+        scale = rng.uniform(0.9, 1.1, size=len(phr))
+        variants.append(format_recipe({k: v * s for (k, v), s in zip(phr.items(), scale)}))
+    pool = np.array(base + variants + [np.nan], dtype=object)
+    return pd.Series(pool[rng.integers(0, len(pool), size=n_rows)])
+
+
+def run(n_rows, skip_legacy=False):
+    texts = synthetic_log(n_rows)
+    print(f"Synthetic log: {len(texts):,} rows, {texts.nunique():,} unique recipes")
+
+    parse_recipe.cache_clear()
+    start = time.perf_counter()
+    new_df = MonomerParser().parse_frame(texts)
+    t_new = time.perf_counter() - start
+    print(f"MonomerParser : {t_new:8.3f}s ({len(texts) / t_new:,.0f} rows/s)")
+
+    start = time.perf_counter()
+    MonomerParser().parse_frame(texts)
+    t_warm = time.perf_counter() - start
+    print(f"  (warm cache): {t_warm:8.3f}s ({len(texts) / t_warm:,.0f} rows/s)")
+
+    if not skip_legacy:
+        start = time.perf_counter()
+        old_df = pd.DataFrame(texts.apply(_legacy_extract).tolist()).fillna(0)
+        t_old = time.perf_counter() - start
+        print(f"Legacy apply  : {t_old:8.3f}s ({len(texts) / t_old:,.0f} rows/s), speedup x{t_old / t_new:.1f}")
+        same = list(old_df.columns) == list(new_df.columns) and np.array_equal(old_df.values, new_df.values)
+        print(f"Identical output: {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monomer recipe parser throughput benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+    run(args.rows, args.skip_legacy)
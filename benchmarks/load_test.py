@@ -0,0 +1,421 @@
+import numpy as np
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from websockets.sync.client import connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.NumberInput_pb2 import NumberInput
+
+# 동시 사용자 부하 시험 (로컬 Streamlit 서버 + 웹소켓 구동기, 브라우저 불필요)
+# - app.py 를 headless 서버로 띄운 뒤 세션마다 웹소켓 연결 하나로 브라우저와 같은 재실행 요청(BackMsg)을 보내고
+#   스크립트 종료 메시지(script_finished)까지의 시간을 재실행 지연으로 기록
+# - AppTest 는 실행마다 프로세스 전역 Runtime 을 교체하므로 한 프로세스에서 여러 세션을 동시에 돌릴 수 없음 -> 실제 서버 사용
+#   (세션 스크립트가 서버 안의 스레드로 실행되므로 GIL / cache_resource 공유 조건이 운영 환경과 같음)
+# - 세션별 사용자 유형(합성 입력 편집 / 도포 원단 전환 / 역설계 실행 + 전송)에 따른 상호작용 시나리오를 고정 시드로 재생
+# - 보고: 재실행 지연 p50 / p95 / p99 (전체, 동작별), 세션당 메모리(서버 RSS 증가분), 서버 CPU 사용률 / 포화 비율, 오류 수
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+APP_PATH = os.path.join(base_dir, "app.py")
+
+SEED = 42
+DEFAULT_MIX = {'synthesis': 0.4, 'coating': 0.3, 'inverse': 0.3}
+MONOMER_KEYS = ["syn_monomer_BA", "syn_monomer_MMA", "syn_monomer_AA", "syn_monomer_2-EHA"]
+RECIPES = ["BA 89.7 / MMA 9 / AA 1.3", "BA 48.98 / 2-EHA 48.98 / AA 1.3", "BA 88 / CHMA 10 / AA 2",
+           "BA 78.7 / IBOMA 20 / AA 1.3"]
+MAX_TARGETS = 3
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port=None, timeout=120, log_path=None):
+    """headless Streamlit 서버 실행 (서버 출력은 log_path 에 기록, 기본 버림), 반환: (Popen, 포트)"""
+    port = port or _free_port()
+    log = open(log_path or os.devnull, "w", encoding="utf-8")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+        cwd=base_dir, stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as r:
+                if r.status == 200:
+                    return process, port
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"streamlit server did not become healthy within {timeout}s")
+
+
+def _proc_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _proc_cpu_seconds(pid):
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class ServerMonitor(threading.Thread):
+    """interval 초마다 서버 프로세스 CPU 사용률(전체 코어 대비) / RSS 표본 수집 (/proc 미지원 환경에서는 빈 표본)"""
+
+    def __init__(self, pid, interval=0.25):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.cpu = []
+        self.rss = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        cores = os.cpu_count() or 1
+        last_wall, last_cpu = time.perf_counter(), _proc_cpu_seconds(self.pid)
+        while not self.stopped.wait(self.interval):
+            wall, cpu, rss = time.perf_counter(), _proc_cpu_seconds(self.pid), _proc_rss_mb(self.pid)
+            if cpu is not None and last_cpu is not None:
+                self.cpu.append((cpu - last_cpu) / max(wall - last_wall, 1e-9) / cores)
+            if rss is not None:
+                self.rss.append(rss)
+            last_wall, last_cpu = wall, cpu
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def widget_state(message, element_type, proto, value):
+    """위젯 값 -> 재실행 요청의 WidgetState (브라우저 프런트엔드와 같은 직렬화)"""
+    state = message.rerun_script.widget_states.widgets.add()
+    state.id = proto.id
+    if element_type == "button":
+        state.trigger_value = True
+    elif element_type == "number_input":
+        if proto.data_type == NumberInput.INT:
+            state.int_value = int(value)
+        else:
+            state.double_value = float(value)
+    elif element_type == "slider":
+        state.double_array_value.data[:] = [float(value)]
+    elif element_type in ("selectbox", "text_input"):
+        state.string_value = str(value)
+    elif element_type == "multiselect":
+        state.string_array_value.data[:] = [str(v) for v in value]
+    else:
+        raise ValueError(f"unsupported widget type {element_type!r}")
+
+
+class Session:
+    """
+    브라우저 탭 하나에 해당하는 웹소켓 세션
+    바뀐 위젯 값만 보냄 (보내지 않은 위젯은 서버 세션 상태의 이전 값 유지), 마지막 재실행에서 받은 위젯을 key / label 로 보관
+    """
+
+    def __init__(self, port, persona, timeout):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.persona = persona
+        self.timeout = timeout
+        self.connection = self.socket = None
+        self.by_key = {}
+        self.by_label = {}
+        self.records = []
+        self.errors = []
+
+    def __enter__(self):
+        self.connection = connect(self.url, subprotocols=["streamlit"], max_size=None, open_timeout=self.timeout)
+        self.socket = self.connection.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.connection.__exit__(*exc)
+
+    def find(self, key=None, label=None):
+        """key 또는 label 접두어로 위젯 검색, 반환: (요소 종류, proto) 또는 None"""
+        if key is not None:
+            return self.by_key.get(key)
+        for text, widget in self.by_label.items():
+            if text.startswith(label):
+                return widget
+        return None
+
+    def interact(self, action, changes=()):
+        """changes: [(위젯, 값)] 을 보내고 재실행 완료까지 대기, 반환: 지연(초)"""
+        message = BackMsg()
+        message.rerun_script.SetInParent()
+        for (element_type, proto), value in changes:
+            widget_state(message, element_type, proto, value)
+        by_key, by_label = {}, {}
+        start = time.perf_counter()
+        self.socket.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.socket.recv(timeout=self.timeout))
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                break
+            if kind != "delta" or forward.delta.WhichOneof("type") != "new_element":
+                continue
+            element = forward.delta.new_element
+            element_type = element.WhichOneof("type")
+            proto = getattr(element, element_type)
+            if element_type == "exception":
+                if not proto.is_warning:
+                    self.errors.append((self.persona, action, f"{proto.type}: {proto.message}"[:200]))
+                continue
+            widget_id = getattr(proto, "id", None)
+            if not isinstance(widget_id, str) or not widget_id.startswith("$$ID-"):
+                continue
+            # 위젯 ID: $$ID-<해시>-<사용자 key 또는 None>
+            key = widget_id.split("-", 2)[2] if widget_id.count("-") >= 2 else "None"
+            if key != "None":
+                by_key[key] = (element_type, proto)
+            if getattr(proto, "label", ""):
+                by_label[proto.label] = (element_type, proto)
+        seconds = time.perf_counter() - start
+        if forward.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY:
+            self.errors.append((self.persona, action, f"script finished with status {forward.script_finished}"))
+        self.by_key, self.by_label = by_key, by_label
+        self.records.append((self.persona, action, seconds))
+        return seconds
+
+
+# --- 상호작용 시나리오: 화면에 있는 위젯만 조작 (없으면 건너뜀) ---
+
+def _set(session, action, key=None, label=None, value=None):
+    widget = session.find(key=key, label=label)
+    if widget is not None:
+        session.interact(action, [(widget, value)])
+
+
+def edit_monomers(session, rng):
+    key = MONOMER_KEYS[rng.integers(len(MONOMER_KEYS))]
+    _set(session, "edit_monomers", key=key, value=np.round(rng.uniform(0, 60), 2))
+
+
+def edit_process(session, rng):
+    _set(session, "edit_process", key="syn_temp", value=int(rng.integers(70, 90)))
+
+
+def apply_recipe(session, rng):
+    text, button = session.find(key="syn_recipe_text"), session.find(key="syn_recipe_apply")
+    if text is not None and button is not None:
+        session.interact("apply_recipe", [(text, RECIPES[rng.integers(len(RECIPES))]), (button, True)])
+
+
+def switch_fabric(session, rng):
+    fabric = session.find(key="coat_fabric")
+    if fabric is not None:
+        options = fabric[1].options
+        session.interact("switch_fabric", [(fabric, options[rng.integers(len(options))])])
+
+
+def edit_coat_weight(session, rng):
+    _set(session, "edit_coat_weight", key="coat_weight", value=np.round(rng.uniform(1.0, 4.0), 1))
+
+
+def run_optimization(session, rng):
+    targets = session.find(label="최적화 대상 물성 선택")
+    if targets is not None:
+        options = list(targets[1].options)
+        n_targets = int(rng.integers(1, min(MAX_TARGETS, len(options)) + 1))
+        session.interact("select_targets", [(targets, options[:n_targets])])
+    _set(session, "run_optimization", label="최적 배합비 산출", value=True)
+
+
+def transfer_recipe(session, rng):
+    _set(session, "transfer_recipe", label="합성 시뮬레이터로 배합비 전송", value=True)
+
+
+# 사용자 유형별 동작 순서 (한 주기를 반복)
+PERSONAS = {
+    'synthesis': [edit_monomers, edit_monomers, edit_process, apply_recipe, edit_monomers],
+    'coating': [switch_fabric, edit_coat_weight, switch_fabric, switch_fabric],
+    'inverse': [run_optimization, transfer_recipe, edit_monomers],
+}
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    values = np.asarray(values)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+            'mean': float(values.mean()), 'max': float(values.max())}
+
+
+def _play(session, index, steps, think, barrier):
+    rng = np.random.default_rng(SEED + index)
+    actions = (PERSONAS[session.persona] * steps)[:steps]
+    try:
+        with session:
+            barrier.wait()
+            session.interact("load")
+            for action in actions:
+                if think > 0:
+                    time.sleep(rng.exponential(think))
+                action(session, rng)
+    except Exception as e:
+        session.errors.append((session.persona, "session", f"{type(e).__name__}: {e}"[:200]))
+
+
+def assign_personas(n_sessions, mix):
+    """고정 비율 배정 (세션 수가 적어도 비율에 가깝도록 누적 비율 기준)"""
+    names = list(mix)
+    weights = np.array([mix[n] for n in names], dtype=np.float64)
+    weights /= weights.sum()
+    counts = np.zeros(len(names))
+    personas = []
+    for i in range(n_sessions):
+        k = int(np.argmax(weights * (i + 1) - counts))
+        counts[k] += 1
+        personas.append(names[k])
+    return personas
+
+
+def run_level(port, pid, n_sessions, steps, mix, think, timeout):
+    """n_sessions 개 세션 동시 재생, 반환: 지연 / 메모리 / CPU 요약"""
+    personas = assign_personas(n_sessions, mix)
+    rss_before = _proc_rss_mb(pid)
+    sessions = [Session(port, persona, timeout) for persona in personas]
+    barrier = threading.Barrier(n_sessions + 1)
+    threads = [threading.Thread(target=_play, args=(s, i, steps, think, barrier), daemon=True)
+               for i, s in enumerate(sessions)]
+    for t in threads:
+        t.start()
+    monitor = ServerMonitor(pid)
+    monitor.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    monitor.stop()
+
+    records = [r for s in sessions for r in s.records]
+    errors = [e for s in sessions for e in s.errors]
+    by_action = {}
+    for persona, name, seconds in records:
+        by_action.setdefault(name, []).append(seconds)
+    cpu = np.asarray(monitor.cpu) if monitor.cpu else None
+    peak_rss = max(monitor.rss) if monitor.rss else None
+    return {
+        'sessions': n_sessions,
+        'personas': {p: personas.count(p) for p in mix},
+        'reruns': len(records),
+        'errors': errors,
+        'wall_seconds': wall,
+        'reruns_per_second': len(records) / wall if wall > 0 else None,
+        'latency': _percentiles([r[2] for r in records]),
+        'latency_by_action': {name: dict(_percentiles(v), count=len(v)) for name, v in sorted(by_action.items())},
+        'rss_mb': {'before': rss_before, 'peak': peak_rss,
+                   'per_session': (peak_rss - rss_before) / n_sessions if peak_rss and rss_before else None},
+        'cpu': None if cpu is None else {
+            'cores': os.cpu_count(), 'mean_utilization': float(cpu.mean()),
+            'p95_utilization': float(np.percentile(cpu, 95)), 'saturated_fraction': float((cpu >= 0.9).mean())},
+    }
+
+
+def warm_up(port, timeout):
+    """첫 세션으로 모델 / 인덱스 로드(cache_resource)를 수행하여 측정에서 제외, 반환: 소요 시간(초)"""
+    with Session(port, "warmup", timeout) as session:
+        seconds = session.interact("load")
+    if session.errors:
+        raise RuntimeError(f"app failed to load: {session.errors[0][2]}")
+    return seconds
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def _fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def format_report(levels):
+    lines = ["| Sessions | Reruns | Errors | p50 (ms) | p95 (ms) | p99 (ms) | Reruns/s | RSS/session (MB) "
+             "| CPU mean | CPU saturated |",
+             "| --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |"]
+    for r in levels:
+        lat, cpu = r['latency'], r['cpu'] or {}
+        lines.append(f"| {r['sessions']} | {r['reruns']} | {len(r['errors'])} | {_ms(lat['p50'])} | {_ms(lat['p95'])} "
+                     f"| {_ms(lat['p99'])} | {_fmt(r['reruns_per_second'], '.2f')} "
+                     f"| {_fmt(r['rss_mb']['per_session'], '.1f')} | {_fmt(cpu.get('mean_utilization'), '.0%')} "
+                     f"| {_fmt(cpu.get('saturated_fraction'), '.0%')} |")
+    for r in levels:
+        lines += ["", f"### {r['sessions']} sessions by action {r['personas']}",
+                  "| Action | Count | p50 (ms) | p95 (ms) | p99 (ms) |", "| --- | --- | --- | --- | --- |"]
+        for name, lat in r['latency_by_action'].items():
+            lines.append(f"| {name} | {lat['count']} | {_ms(lat['p50'])} | {_ms(lat['p95'])} | {_ms(lat['p99'])} |")
+        for persona, name, message in r['errors'][:5]:
+            lines.append(f"- error ({persona}/{name}): {message}")
+    return "\n".join(lines)
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in PERSONAS:
+            raise argparse.ArgumentTypeError(f"unknown persona {name!r} (choices: {list(PERSONAS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit simulator")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4], help="concurrency levels to run")
+    parser.add_argument("--steps", type=int, default=6, help="interactions per session (after the initial load)")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX,
+                        help="persona weights, e.g. 'inverse=1' or 'synthesis=2,coating=1,inverse=1'")
+    parser.add_argument("--think", type=float, default=0.5, help="mean think time between interactions (s)")
+    parser.add_argument("--timeout", type=float, default=600, help="per-rerun timeout (s)")
+    parser.add_argument("--port", type=int, help="server port (default: a free port)")
+    parser.add_argument("--server-log", help="write the server output to this file")
+    parser.add_argument("--output", help="write the full results as JSON")
+    args = parser.parse_args()
+
+    server, port = start_server(args.port, log_path=args.server_log)
+    try:
+        print(f"Warm-up (model / cache load): {warm_up(port, args.timeout):.1f}s, "
+              f"server RSS {_fmt(_proc_rss_mb(server.pid), '.0f')} MB", file=sys.stderr)
+        levels = []
+        for n in args.sessions:
+            result = run_level(port, server.pid, n, args.steps, args.mix, args.think, args.timeout)
+            levels.append(result)
+            print(f"[{n} sessions] {result['reruns']} reruns in {result['wall_seconds']:.1f}s, "
+                  f"p95 {_ms(result['latency']['p95'])} ms", file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    print(format_report(levels))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({'mix': args.mix, 'steps': args.steps, 'think': args.think, 'levels': levels}, f,
+                      ensure_ascii=False, indent=2)
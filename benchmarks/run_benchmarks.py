@@ -0,0 +1,381 @@
+import numpy as np
+import pandas as pd
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 시뮬레이터 성능 벤치마크 모음 (기준값 기록 + 회귀 비교)
+# - predict: 모델별 단일 행 / 배치 예측 지연 시간 (앱과 같은 평탄화 포레스트 예측 구간 경로)
+# - chemistry: get_chemical_features 단건 처리량, get_chemical_features_batch 배치 처리량
+# - optimize: optimize_recipe 1 / 2 / 3 목표 문제 소요 시간, optimize_coating 전체 원단 탐색 시간
+# - pipeline: 임시 작업 공간에 scripts/, raw_data/ 를 복사하여 파이프라인 전체 단계를 강제 실행, 단계별 처리량
+#   (저장소의 data_cleaned/, models/ 는 건드리지 않음)
+# - startup: 앱 시작 비용 (매 반복 새 프로세스에서 측정) - app.py 최상위 import, 모델 번들 로드, 모델 파일 로드(번들 없을 때 경로),
+#   AppTest 첫 렌더링 (import 포함)
+# - 입력 표본은 고정 시드로 생성, 각 항목은 예열 1회 후 반복 측정의 중앙값 / 최솟값 기록
+#   (회귀 비교는 기본적으로 최솟값 사용 - 공유 장비에서 중앙값은 같은 코드로도 수십 % 흔들림)
+# - --save 로 기준값(benchmarks/baseline.json) 기록, --compare 로 기준값 대비 임계 비율 이상 느려진 항목 표시 (종료 코드 1)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+sys.path.insert(0, base_dir)
+
+SEED = 42
+BASELINE_PATH = os.path.join(current_dir, "baseline.json")
+GROUPS = ['predict', 'chemistry', 'optimize', 'pipeline', 'startup']
+DEFAULT_REPEAT = {'predict': 20, 'chemistry': 10, 'optimize': 3, 'pipeline': 1, 'startup': 3}
+BATCH_ROWS = 1000
+
+OPTIMIZE_TARGETS = {
+    'Tg': {'target': -30.0, 'weight': 1.0},
+    '점도(cP)': {'target': 100.0, 'weight': 1.0},
+    '수율(%)': {'target': 0.7, 'weight': 1.0},
+}
+COATING_TARGET = 300.0
+OPTIMIZE_PARAMS = {'온도': 80, '반응시간': 4.5, '이론 고형분(%)': 0.48, 'Scale': 500}
+
+
+def measure(func, repeat):
+    """예열 1회 후 repeat 회 측정, 반환: 초 단위 측정값 목록"""
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def result(times, items=1, unit="call"):
+    median = statistics.median(times)
+    return {
+        'median_s': median,
+        'min_s': min(times),
+        'repeat': len(times),
+        'items': items,
+        'unit': unit,
+        'throughput': items / median if median > 0 else None,
+    }
+
+
+def _sample_rows(table, features, n_rows, rng):
+    """저장된 피처 표에서 고정 시드로 n_rows 행을 복원 추출 (모델 입력 열 순서)"""
+    from scripts.columnar_store import read_table
+    df = read_table(table, columns=features)
+    return df.to_numpy(dtype=np.float64)[rng.integers(0, len(df), size=n_rows)]
+
+
+def bench_predict(repeat):
+    import joblib
+    from scripts.forest_engine import predict_interval
+    from scripts.feature_vectorizer import read_feature_list
+
+    rng = np.random.default_rng(SEED)
+    model_dir = os.path.join(base_dir, "models")
+    inputs = {
+        'synthesis': _sample_rows('model_features', read_feature_list("feature_list.txt"), BATCH_ROWS, rng),
+        'coating': _sample_rows('coating_model_features', read_feature_list("coating_feature_list.txt"),
+                                BATCH_ROWS, rng),
+    }
+    results = {}
+    for file in sorted(os.listdir(model_dir)):
+        if not (file.startswith("model_rf_") and file.endswith(".joblib")):
+            continue
+        name = file[len("model_rf_"):-len(".joblib")]
+        model = joblib.load(os.path.join(model_dir, file))
+        X = inputs['coating' if name == "adhesion" else 'synthesis']
+        single = X[:1]
+        results[f"predict/{name}/single"] = result(
+            measure(lambda: predict_interval(model, single), repeat), 1, "row")
+        results[f"predict/{name}/batch{BATCH_ROWS}"] = result(
+            measure(lambda: predict_interval(model, X), max(repeat // 2, 3)), len(X), "row")
+    return results
+
+
+def bench_chemistry(repeat):
+    from scripts.chemical_db import MONOMER_PROPERTIES, get_chemical_features, get_chemical_features_batch
+
+    rng = np.random.default_rng(SEED)
+    monomer_cols = [f"monomer_{m}" for m in MONOMER_PROPERTIES]
+    n_recipes = 10000
+    phr = rng.uniform(0, 100, size=(n_recipes, len(monomer_cols)))
+    phr[rng.random(phr.shape) < 0.7] = 0.0
+    recipes = [{c: v for c, v in zip(monomer_cols, row) if v > 0} for row in phr]
+
+    def single():
+        for recipe in recipes:
+            get_chemical_features(recipe)
+
+    return {
+        'chemistry/get_chemical_features': result(measure(single, repeat), n_recipes, "recipe"),
+        'chemistry/get_chemical_features_batch': result(
+            measure(lambda: get_chemical_features_batch(monomer_cols, phr), repeat), n_recipes, "recipe"),
+    }
+
+
+def bench_optimize(repeat):
+    from scripts.optimize_recipe import optimize_recipe
+
+    results = {}
+    names = list(OPTIMIZE_TARGETS)
+    for n_targets in (1, 2, 3):
+        targets = {k: OPTIMIZE_TARGETS[k] for k in names[:n_targets]}
+
+        def run():
+            recipe, message = optimize_recipe(targets, OPTIMIZE_PARAMS)
+            if recipe is None:
+                raise RuntimeError(f"optimize_recipe failed: {message}")
+
+        results[f"optimize/{n_targets}_target"] = result(measure(run, repeat), 1, "problem")
+
+    # 도포 조건 역설계: 전체 원단을 한 번에 탐색 (처리 단위 = 원단)
+    from scripts.optimize_coating import optimize_coating
+    fabrics = []
+
+    def run_coating():
+        res, message = optimize_coating(COATING_TARGET)
+        if res is None:
+            raise RuntimeError(f"optimize_coating failed: {message}")
+        fabrics[:] = list(res['tables'])
+
+    times = measure(run_coating, repeat)
+    results["optimize/coating_all_fabrics"] = result(times, len(fabrics), "fabric")
+    return results
+
+
+def _count_rows(path):
+    return len(pd.read_csv(path, encoding='utf-8-sig', usecols=[0]))
+
+
+def bench_pipeline(repeat):
+    """임시 작업 공간에서 파이프라인 전체 강제 실행 (repeat 회), 단계별 소요 시간 / 처리량"""
+    times = {}
+    items = {}
+    for _ in range(repeat):
+        work_dir = tempfile.mkdtemp(prefix="pipeline_bench_")
+        try:
+            for name in ("scripts", "raw_data"):
+                shutil.copytree(os.path.join(base_dir, name), os.path.join(work_dir, name),
+                                ignore=shutil.ignore_patterns("__pycache__"))
+            proc = subprocess.run([sys.executable, os.path.join(work_dir, "scripts", "pipeline.py"),
+                                   "--force", "--workers", "1"], capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"pipeline failed:\n{proc.stdout[-2000:]}\n{proc.stderr[-2000:]}")
+            with open(os.path.join(work_dir, "logs", "pipeline", "last_run.json"), "r", encoding="utf-8") as f:
+                report = json.load(f)
+
+            data = os.path.join(work_dir, "data_cleaned")
+            cleaned = {'synthesis': _count_rows(os.path.join(data, "cleaned_synthesis_data.csv")),
+                       'coating': _count_rows(os.path.join(data, "cleaned_coating_data.csv"))}
+            features = {'synthesis': _count_rows(os.path.join(data, "model_features.csv")),
+                        'coating': _count_rows(os.path.join(data, "coating_model_features.csv"))}
+            n_models = len(glob.glob(os.path.join(work_dir, "models", "model_rf_*.joblib")))
+            grid = np.load(os.path.join(work_dir, "models", "response_grid", "grid.npy"), mmap_mode='r')
+            # 단계별 처리 단위: 정제 / 전처리 = 입력 행, 학습 / 인덱스 = 피처 행, 응답 곡면 = 격자점
+            items = {
+                'clean_synthesis': (cleaned['synthesis'], "row"), 'clean_coating': (cleaned['coating'], "row"),
+                'prepare_synthesis': (cleaned['synthesis'], "row"), 'prepare_coating': (cleaned['coating'], "row"),
+                'train_synthesis': (features['synthesis'], "row"), 'train_coating': (features['coating'], "row"),
+                'experiment_index': (features['synthesis'], "row"),
+                'response_grid': (int(np.prod(grid.shape[1:])), "grid point"),
+                'model_bundle': (n_models, "model"), 'publish_models': (n_models, "model"),
+            }
+            for stage, r in report['stages'].items():
+                times.setdefault(stage, []).append(r['seconds'])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return {f"pipeline/{stage}": result(t, *items.get(stage, (1, "run"))) for stage, t in times.items()}
+
+
+# 새 프로세스에서 실행하는 시작 비용 측정 코드 (마지막 줄에 소요 초를 출력)
+STARTUP_PROBES = {
+    'app_imports': """
+import time; start = time.perf_counter()
+import streamlit, pandas, numpy
+import scripts.forest_engine, scripts.tree_attribution, scripts.feature_vectorizer, scripts.monomer_parser
+import scripts.model_bundle, scripts.prewarm, scripts.instrumentation
+print(time.perf_counter() - start)
+""",
+    'load_bundle': """
+import time; start = time.perf_counter()
+from scripts.model_bundle import load_models
+bundle, source = load_models(rebuild=False)
+assert source == 'bundle', source
+print(time.perf_counter() - start)
+""",
+    'load_model_files': """
+import time; start = time.perf_counter()
+from scripts.model_bundle import _assemble, _read_models, model_dir
+_assemble(_read_models(model_dir), model_dir)
+print(time.perf_counter() - start)
+""",
+    'first_render': """
+import time; start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120).run()
+assert not at.exception, at.exception
+print(time.perf_counter() - start)
+""",
+}
+
+
+def bench_startup(repeat):
+    """앱 시작 구간별 소요 시간 (반복마다 새 파이썬 프로세스, 번들이 없으면 먼저 생성)"""
+    from scripts.model_bundle import load_bundle, build_bundle
+    if load_bundle() is None:
+        build_bundle()
+    results = {}
+    for name, code in STARTUP_PROBES.items():
+        times = []
+        for _ in range(repeat):
+            proc = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=base_dir,
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"startup probe {name} failed:\n{proc.stderr[-2000:]}")
+            times.append(float(proc.stdout.strip().splitlines()[-1]))
+        results[f"startup/{name}"] = result(times)
+    return results
+
+
+BENCHMARKS = {
+    'predict': bench_predict,
+    'chemistry': bench_chemistry,
+    'optimize': bench_optimize,
+    'pipeline': bench_pipeline,
+    'startup': bench_startup,
+}
+
+
+def _package_version(name):
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def environment():
+    return {
+        'created_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': {p: _package_version(p) for p in ("numpy", "pandas", "scikit-learn", "scipy", "pyarrow")},
+        'seed': SEED,
+    }
+
+
+def run(groups, repeat=None):
+    results = {}
+    for group in groups:
+        start = time.perf_counter()
+        results.update(BENCHMARKS[group](repeat or DEFAULT_REPEAT[group]))
+        print(f"[{group}] done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return {'environment': environment(), 'results': results}
+
+
+def compare(current, baseline, threshold, min_delta, stat='min_s'):
+    """
+    기준값 대비 비교 (stat: 'min_s' | 'median_s')
+    반환: [(항목, 기준 초, 현재 초, 비율, 상태)] (상태: 'SLOWER' 는 비율이 1 + threshold 초과이고 차이가 min_delta 초 이상)
+    """
+    rows = []
+    for name, cur in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            rows.append((name, None, cur[stat], None, "new"))
+            continue
+        ratio = cur[stat] / base[stat] if base[stat] > 0 else float('inf')
+        if ratio > 1 + threshold and cur[stat] - base[stat] >= min_delta:
+            status = "SLOWER"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, base[stat], cur[stat], ratio, status))
+    return rows
+
+
+def _fmt_seconds(seconds):
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.2f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+
+def format_results(results):
+    lines = ["| Benchmark | Median | Min | Throughput |", "| --- | --- | --- | --- |"]
+    for name, r in results['results'].items():
+        if not r['throughput']:
+            throughput = "-"
+        else:
+            throughput = f"{r['throughput']:,.0f}" if r['throughput'] >= 100 else f"{r['throughput']:.3g}"
+            throughput += f" {r['unit']}/s"
+        lines.append(f"| {name} | {_fmt_seconds(r['median_s'])} | {_fmt_seconds(r['min_s'])} | {throughput} |")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    lines = ["| Benchmark | Baseline | Current | Ratio | Status |", "| --- | --- | --- | --- | --- |"]
+    for name, base, cur, ratio, status in rows:
+        ratio_text = "-" if ratio is None else f"{ratio:.2f}x"
+        lines.append(f"| {name} | {_fmt_seconds(base)} | {_fmt_seconds(cur)} | {ratio_text} | {status} |")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulator performance benchmark suite")
+    parser.add_argument("--groups", nargs="+", default=GROUPS, choices=GROUPS)
+    parser.add_argument("--repeat", type=int, default=None, help="override the per-group repeat count")
+    parser.add_argument("--save", nargs="?", const=BASELINE_PATH, default=None,
+                        help=f"record results as the baseline (default path: {BASELINE_PATH})")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, default=None,
+                        help="compare against a recorded baseline and exit 1 on slowdowns")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown ratio (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.0005,
+                        help="ignore slowdowns smaller than this many seconds (timer noise)")
+    parser.add_argument("--stat", choices=["min", "median"], default="min", help="timing statistic to compare")
+    parser.add_argument("--output", help="write the current results as JSON")
+    args = parser.parse_args()
+
+    current = run(args.groups, args.repeat)
+    print(format_results(current))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.threshold, args.min_delta, f"{args.stat}_s")
+        print(f"\n## Compared with {args.compare} (recorded {baseline['environment']['created_at']}, "
+              f"{args.stat} time, threshold +{args.threshold:.0%})")
+        print(format_comparison(rows))
+        slower = [r[0] for r in rows if r[4] == "SLOWER"]
+        if slower:
+            print(f"\n{len(slower)} benchmark(s) slower than the baseline: {', '.join(slower)}")
+            exit_code = 1
+
+    if args.save:
+        if args.compare and exit_code:
+            print("Baseline not updated because of regressions.")
+        else:
+            # 일부 그룹만 실행한 경우 나머지 그룹의 기준값은 유지
+            saved = {'environment': current['environment'], 'results': {}}
+            if os.path.exists(args.save):
+                with open(args.save, "r", encoding="utf-8") as f:
+                    saved['results'] = json.load(f).get('results', {})
+            saved['results'].update(current['results'])
+            with open(args.save, "w", encoding="utf-8") as f:
+                json.dump(saved, f, ensure_ascii=False, indent=2)
+            print(f"Baseline saved to {args.save}")
+    sys.exit(exit_code)
@@ -1,45 +1,121 @@
 import pandas as pd
 import numpy as np
-import os
-import joblib
+from scripts.forest_engine import predict_interval
+from scripts.feature_vectorizer import SynthesisVectorizer, CoatingVectorizer
+from scripts.monomer_parser import MonomerParser
+from scripts.model_store import active_models
+from scripts.audit_log import record as audit_record, enabled as audit_enabled
+from time import perf_counter
 
-base_path = os.path.dirname(os.path.abspath(__file__))
-model_dir = os.path.join(base_path, "models")
+# 모델 / 피처 목록은 현재 버전 모델 묶음에서 가져옴 (새 버전이 발행되면 재시작 없이 다음 호출부터 교체)
+# 호출 1회 안에서는 같은 버전의 모델 / 피처 목록만 사용
+_vectorizers = {}
+# 요청 감사 기록: 배치 입력 / 출력은 앞 AUDIT_ROWS 행만 남기고 전체 행 수(n_rows)를 함께 기록
+AUDIT_ROWS = 50
+
+def _load(kind):
+    """반환: (벡터라이저 | None, {타겟: 포레스트}, 모델 버전) - kind: 'synthesis' | 'coating'"""
+    version, bundle = active_models()
+    features = bundle[f'{kind}_features']
+    key = (kind, version)
+    if key not in _vectorizers:
+        if len(_vectorizers) >= 4:
+            _vectorizers.clear()
+        vectorizer_cls = SynthesisVectorizer if kind == 'synthesis' else CoatingVectorizer
+        _vectorizers[key] = vectorizer_cls(features) if features else None
+    return _vectorizers[key], bundle[f'{kind}_models'], version
+
+def _audit(kind, rows, outputs, version, start, n_rows=None):
+    if not audit_enabled():
+        return
+    if isinstance(rows, pd.DataFrame):
+        n_rows, rows = len(rows), rows.head(AUDIT_ROWS).to_dict('records')
+    elif isinstance(rows, dict):
+        n_rows, rows = 1, [rows]
+    else:
+        rows = list(rows)
+        n_rows, rows = n_rows or len(rows), rows[:AUDIT_ROWS]
+    # 호출 측에 반환한 배열 / 입력 dict 를 이후 수정해도 기록이 바뀌지 않도록 복사본 보관 (기록은 백그라운드에서 직렬화)
+    rows = [dict(r) if isinstance(r, dict) else r for r in rows]
+    outputs = {target: {'mean': out['mean'][:AUDIT_ROWS].copy(), 'std': out['std'][:AUDIT_ROWS].copy()}
+               if isinstance(out, dict) else out for target, out in outputs.items()}
+    audit_record(kind, rows, outputs, model_version=version, latency=perf_counter() - start,
+                 source="inference", n_rows=n_rows)
 
 def predict_property(features_dict):
-    # Load feature list
-    feature_list_path = os.path.join(model_dir, "feature_list.txt")
-    if not os.path.exists(feature_list_path):
+    # 학습 피처 순서의 입력 벡터 (화학 도메인 피처는 배합비로부터 자동 계산, 미등록 변수는 KeyError)
+    start = perf_counter()
+    vectorizer, models, version = _load('synthesis')
+    if vectorizer is None:
         return "Error: Feature list not found."
-    
-    with open(feature_list_path, "r", encoding="utf-8-sig") as f:
-        all_features = [line.strip() for line in f.readlines()]
-    
-    # Create input vector
-    input_df = pd.DataFrame([features_dict])
-    # Fill missing features with 0
-    for col in all_features:
-        if col not in input_df.columns:
-            input_df[col] = 0
-    input_df = input_df[all_features]
+    input_matrix = vectorizer.transform(features_dict)
     
     predictions = {}
-    for model_file in os.listdir(model_dir):
-        if model_file.endswith(".joblib") and "adhesion" not in model_file:
-            target_name = model_file.replace("model_rf_", "").replace(".joblib", "")
-            model = joblib.load(os.path.join(model_dir, model_file))
-            pred_val = model.predict(input_df)[0]
-            predictions[target_name] = pred_val
+    for target_name, forest in models.items():
+        predictions[target_name] = forest.predict(input_matrix)[0]
             
+    _audit('synthesis', features_dict, predictions, version, start)
     return predictions
 
+def _build_matrix(rows, vectorizer):
+    # dict 하나 또는 dict 리스트 / DataFrame 을 학습 피처 순서의 행렬로 변환
+    if isinstance(rows, dict):
+        rows = [rows]
+    elif isinstance(rows, pd.DataFrame):
+        rows = rows.to_dict('records')
+    return vectorizer.transform_batch(rows)
+
+def predict_property_interval(rows, quantiles=(0.05, 0.95)):
+    """
+    합성 물성별 트리 앙상블 예측 구간 (배치 전체를 한 번의 순회로 계산)
+    반환: {target: {'mean': (n,), 'std': (n,), 'quantiles': {q: (n,)}}}
+    """
+    start = perf_counter()
+    vectorizer, models, version = _load('synthesis')
+    if vectorizer is None:
+        return "Error: Feature list not found."
+    X = _build_matrix(rows, vectorizer)
+    intervals = {target_name: predict_interval(forest, X, quantiles) for target_name, forest in models.items()}
+    _audit('synthesis', rows, intervals, version, start)
+    return intervals
+
+def predict_recipes(recipes, process_params=None, quantiles=(0.05, 0.95)):
+    """
+    실험 기록 형식의 배합 문자열 일괄 예측 (예: "BA 89.7 / MMA 9 / AA 1.3")
+    recipes: 배합 문자열 목록 (동일 문자열은 한 번만 파싱)
+    process_params: 모든 배합에 공통인 공정 조건 {'온도': 80, ...}
+    반환: predict_property_interval 과 동일한 형식
+    """
+    start = perf_counter()
+    recipes = list(recipes)
+    vectorizer, models, version = _load('synthesis')
+    if vectorizer is None:
+        return "Error: Feature list not found."
+    phr, monomer_cols = MonomerParser(vectorizer.monomer_cols).parse(recipes)
+    X = vectorizer.from_phr(phr, monomer_cols, process_params)
+    intervals = {target_name: predict_interval(forest, X, quantiles) for target_name, forest in models.items()}
+    _audit('synthesis', [dict(process_params or {}, recipe=r) for r in recipes[:AUDIT_ROWS]], intervals, version, start,
+           n_rows=len(recipes))
+    return intervals
+
+def predict_adhesion_interval(rows, quantiles=(0.05, 0.95)):
+    """도포 점착력 트리 앙상블 예측 구간 (반환 형식은 predict_property_interval 과 동일)"""
+    start = perf_counter()
+    vectorizer, models, version = _load('coating')
+    if vectorizer is None or '점착력' not in models:
+        return "Error: Coating model not found."
+    X = _build_matrix(rows, vectorizer)
+    intervals = {'점착력': predict_interval(models['점착력'], X, quantiles)}
+    _audit('coating', rows, intervals, version, start)
+    return intervals
+
 if __name__ == "__main__":
     # Example Inference for testing
     test_input = {
         '온도': 80,
         '반응시간': 4.5,
         '이론 고형분(%)': 40,
-        'monomer_2EHA': 50,
+        'monomer_2-EHA': 50,
         'monomer_EA': 45,
         'monomer_AA': 5
     }
@@ -48,3 +124,14 @@ if __name__ == "__main__":
     print(f"Input Conditions: {test_input}")
     res = predict_property(test_input)
     print(f"\nPredicted Results: {res}")
+
+    intervals = predict_property_interval(test_input)
+    for target, iv in intervals.items():
+        lo, hi = iv['quantiles'][0.05][0], iv['quantiles'][0.95][0]
+        print(f"{target}: {iv['mean'][0]:.2f} (90% 구간 {lo:.2f} ~ {hi:.2f}, std {iv['std'][0]:.2f})")
+
+    recipes = ["BA 89.7 / MMA 9 / AA 1.3", "BA 39.35 / 2-EHA 39.35 / CHMA 20 / AA 1.3"]
+    process = {'온도': 83, '반응시간': 4.75, '이론 고형분(%)': 0.48, 'Scale': 524.27}
+    recipe_intervals = predict_recipes(recipes, process)
+    for i, recipe in enumerate(recipes):
+        print(f"[{recipe}] " + ", ".join(f"{t}: {iv['mean'][i]:.2f}" for t, iv in recipe_intervals.items()))
@@ -0,0 +1,316 @@
+import atexit
+import collections
+import datetime
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+try:
+    from scripts.instrumentation import count
+except ImportError:
+    from instrumentation import count
+
+# 예측 / 역설계 요청 감사 기록 (실제 사용 패턴 분석: 캐시 / 응답 곡면 범위 선정, 자주 쓰이는 모노머 / 원단 파악)
+# - record() 는 요청 경로에서 dict 1개를 크기 제한 deque(링 버퍼)에 넣기만 함 (파일 I/O / 직렬화 / 잠금 대기 없음)
+#   버퍼가 가득 차면 가장 오래된 기록부터 버리고 버린 개수를 셈
+# - 백그라운드 기록 스레드(데몬 1개)가 주기적으로(기본 2초) 또는 버퍼가 절반 이상 차면 버퍼를 비워 gzip JSONL 로 추가 기록
+#   logs/audit/audit-<시각>-<pid>-<순번>.jsonl.gz, 파일당 기록량(비압축 기준)이 상한을 넘으면 새 파일로 교체, 파일 수 상한을 넘으면 오래된 것부터 삭제
+# - 기록 항목: 시각, 종류(synthesis / coating / optimize / optimize_coating), 출처(app / inference), 세션, 모델 버전, 지연 시간, 입력, 출력
+# - 기본 활성, 환경 변수 SIM_AUDIT=0 이면 비활성 (record() 즉시 반환)
+# - report(): 기록 파일을 읽어 종류별 자주 쓰인 입력 / 모노머 / 원단 / 역설계 목표 / 지연 시간 집계 (오프라인 CLI)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+
+_config = {
+    'enabled': os.environ.get("SIM_AUDIT", "1") not in ("", "0"),
+    'directory': os.environ.get("SIM_AUDIT_DIR", os.path.join(base_dir, "logs", "audit")),
+    'capacity': 10000,
+    'flush_interval': 2.0,
+    'rotate_bytes': 32 * 1024 * 1024,
+    'max_files': 50,
+}
+_buffer = collections.deque(maxlen=_config['capacity'])
+_wake = threading.Event()
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_writer = [None]
+_stats = {'recorded': 0, 'dropped': 0, 'written': 0, 'files': 0}
+_file = {'path': None, 'bytes': 0}
+
+
+def configure(enabled=None, directory=None, capacity=None, flush_interval=None, rotate_bytes=None, max_files=None):
+    """실행 중 설정 변경 (None 인 항목은 유지), 반환: 현재 설정"""
+    global _buffer
+    if enabled is not None:
+        _config['enabled'] = bool(enabled)
+    if directory is not None:
+        _config['directory'] = directory
+        _file['path'] = None
+    if capacity is not None and capacity != _config['capacity']:
+        _config['capacity'] = int(capacity)
+        _buffer = collections.deque(_buffer, maxlen=_config['capacity'])
+    for key, value in (('flush_interval', flush_interval), ('rotate_bytes', rotate_bytes), ('max_files', max_files)):
+        if value is not None:
+            _config[key] = value
+    return dict(_config)
+
+
+def enabled():
+    return _config['enabled']
+
+
+def record(kind, inputs, outputs=None, model_version=None, latency=None, source=None, session=None, **extra):
+    """
+    요청 1건 기록 (버퍼에 넣기만 하고 즉시 반환)
+    inputs / outputs: JSON 으로 바꿀 수 있는 값 (NumPy 값 / DataFrame 은 기록 시 변환), latency: 초
+    dict 는 얕은 복사로 보관 (호출 측이 이후 값을 바꿔도 기록 내용 유지)
+    """
+    if not _config['enabled']:
+        return
+    if isinstance(inputs, dict):
+        inputs = dict(inputs)
+    if isinstance(outputs, dict):
+        outputs = dict(outputs)
+    entry = {'ts': time.time(), 'kind': kind, 'source': source, 'session': session,
+             'model_version': model_version, 'latency_ms': None if latency is None else latency * 1000.0,
+             'inputs': inputs, 'outputs': outputs}
+    if extra:
+        entry.update(extra)
+    buffer = _buffer
+    if len(buffer) >= buffer.maxlen:
+        _stats['dropped'] += 1
+    buffer.append(entry)
+    _stats['recorded'] += 1
+    writer = _writer[0]
+    if writer is None or not writer.is_alive():
+        _start_writer()
+    elif len(buffer) * 2 >= buffer.maxlen:
+        _wake.set()
+
+
+def _start_writer():
+    with _lock:
+        if _writer[0] is None or not _writer[0].is_alive():
+            thread = threading.Thread(target=_run, name="audit-writer", daemon=True)
+            thread.start()
+            _writer[0] = thread
+
+
+def _run():
+    # 기록 오류로 스레드가 끝나지 않도록 모든 예외를 세고 계속 진행
+    while True:
+        _wake.wait(_config['flush_interval'])
+        _wake.clear()
+        try:
+            flush()
+        except Exception:
+            count("audit_write_errors")
+
+
+def _json_default(value):
+    if hasattr(value, 'to_dict'):
+        return value.to_dict('records') if hasattr(value, 'columns') else value.to_dict()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def _serialize(entry):
+    """기록 1건 -> JSON 문자열, 변환할 수 없는 기록(예: 문자열이 아닌 dict 키)은 종류 / 시각 / 오류만 남김"""
+    ts = datetime.datetime.fromtimestamp(entry['ts']).isoformat(timespec='milliseconds')
+    try:
+        return json.dumps(dict(entry, ts=ts), ensure_ascii=False, default=_json_default, allow_nan=True)
+    except Exception as e:
+        count("audit_serialize_errors")
+        return json.dumps({'ts': ts, 'kind': str(entry.get('kind')), 'source': str(entry.get('source')),
+                           'error': f"{type(e).__name__}: {e}"}, ensure_ascii=False)
+
+
+def _next_file(directory):
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"audit-{stamp}-{os.getpid()}-{_stats['files'] + 1}.jsonl.gz")
+    files = list_files(directory)
+    for old in files[:max(len(files) - _config['max_files'] + 1, 0)]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    _stats['files'] += 1
+    return path
+
+
+def flush():
+    """버퍼의 기록을 현재 파일에 추가 (gzip 멤버 1개), 반환: 기록한 건수"""
+    with _write_lock:
+        items = []
+        buffer = _buffer
+        while True:
+            try:
+                items.append(buffer.popleft())
+            except IndexError:
+                break
+        if not items:
+            return 0
+        data = "".join(_serialize(e) + "\n" for e in items).encode("utf-8")
+        directory = _config['directory']
+        os.makedirs(directory, exist_ok=True)
+        if _file['path'] is None or _file['bytes'] + len(data) > _config['rotate_bytes']:
+            _file['path'], _file['bytes'] = _next_file(directory), 0
+        with gzip.open(_file['path'], "ab") as f:
+            f.write(data)
+        _file['bytes'] += len(data)
+        _stats['written'] += len(items)
+        count("audit_records_written", len(items))
+        return len(items)
+
+
+def stats():
+    """기록 / 버림 / 파일 기록 건수와 현재 버퍼 크기"""
+    return dict(_stats, buffered=len(_buffer), path=_file['path'])
+
+
+@atexit.register
+def _flush_at_exit():
+    if _buffer:
+        try:
+            flush()
+        except Exception:
+            pass
+
+
+# --- 오프라인 분석 ---
+
+def list_files(directory=None):
+    return sorted(glob.glob(os.path.join(directory or _config['directory'], "audit-*.jsonl.gz")), key=os.path.getmtime)
+
+
+def read_records(directory=None, kinds=None):
+    """기록 파일 전체 순회 (작성 중이거나 잘린 마지막 gzip 멤버는 건너뜀)"""
+    for path in list_files(directory):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if kinds is None or entry.get('kind') in kinds:
+                        yield entry
+        except (OSError, EOFError):
+            continue
+
+
+def _canonical(inputs, decimals=3):
+    """입력 dict -> 비교용 문자열 (0 인 항목 제외, 실수는 반올림, 키 정렬)"""
+    if not isinstance(inputs, dict):
+        return json.dumps(inputs, ensure_ascii=False, sort_keys=True, default=str)
+    items = {}
+    for key, value in inputs.items():
+        if isinstance(value, float):
+            value = round(value, decimals)
+        if value in (0, 0.0, None, "", [], {}):
+            continue
+        items[key] = value
+    return json.dumps(items, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(int(round(q * (len(values) - 1))), len(values) - 1)]
+
+
+def report(records, top=10):
+    """
+    자주 쓰인 입력 집계
+    반환: {'total', 'kinds', 'sources', 'model_versions', 'sessions', 'latency_ms': {종류: {p50, p95}},
+           'hot_inputs': {종류: [(건수, 입력)]}, 'monomers': [(모노머, 건수)], 'fabrics': [...], 'optimize_targets': [...]}
+    """
+    kinds, sources, versions, sessions = (collections.Counter() for _ in range(4))
+    hot = collections.defaultdict(collections.Counter)
+    monomers, fabrics, targets = (collections.Counter() for _ in range(3))
+    latency = collections.defaultdict(list)
+    total = 0
+    for entry in records:
+        total += 1
+        kind = entry.get('kind')
+        kinds[kind] += 1
+        sources[entry.get('source')] += 1
+        versions[entry.get('model_version') or "workspace"] += 1
+        if entry.get('session'):
+            sessions[entry['session']] += 1
+        if entry.get('latency_ms') is not None:
+            latency[kind].append(entry['latency_ms'])
+        inputs = entry.get('inputs')
+        rows = inputs if isinstance(inputs, list) else [inputs]
+        for row in rows:
+            hot[kind][_canonical(row)] += 1
+            if not isinstance(row, dict):
+                continue
+            for key, value in row.items():
+                if key.startswith("monomer_") and value:
+                    monomers[key[len("monomer_"):]] += 1
+            if isinstance(row.get('recipe'), str):
+                for part in row['recipe'].split("/"):
+                    if part.split():
+                        monomers[part.split()[0]] += 1
+            if row.get('fabric'):
+                fabrics[row['fabric']] += 1
+            if kind == 'optimize' and isinstance(row.get('targets'), dict):
+                targets[" + ".join(sorted(row['targets']))] += 1
+            if kind == 'optimize_coating' and row.get('target') is not None:
+                targets[f"점착력 {row['target']:g}"] += 1
+    return {
+        'total': total,
+        'kinds': dict(kinds),
+        'sources': {str(k): v for k, v in sources.items()},
+        'model_versions': dict(versions),
+        'sessions': len(sessions),
+        'latency_ms': {k: {'p50': _percentile(v, 0.5), 'p95': _percentile(v, 0.95)} for k, v in latency.items()},
+        'hot_inputs': {k: [(n, json.loads(key) if key.startswith(("{", "[")) else key)
+                           for key, n in c.most_common(top)] for k, c in hot.items()},
+        'monomers': monomers.most_common(top),
+        'fabrics': fabrics.most_common(top),
+        'optimize_targets': targets.most_common(top),
+    }
+
+
+def format_report(summary):
+    lines = [f"# Audit report ({summary['total']:,} records, {summary['sessions']} sessions)", "",
+             "| Kind | Records | Latency p50 (ms) | Latency p95 (ms) |", "| --- | --- | --- | --- |"]
+    for kind, n in sorted(summary['kinds'].items(), key=lambda kv: -kv[1]):
+        lat = summary['latency_ms'].get(kind, {})
+        p50 = "-" if lat.get('p50') is None else f"{lat['p50']:.1f}"
+        p95 = "-" if lat.get('p95') is None else f"{lat['p95']:.1f}"
+        lines.append(f"| {kind} | {n:,} | {p50} | {p95} |")
+    lines.append("")
+    lines.append("Model versions: " + ", ".join(f"{v} ({n})" for v, n in summary['model_versions'].items()))
+    for title, key in (("Monomers", 'monomers'), ("Fabrics", 'fabrics'), ("Optimization targets", 'optimize_targets')):
+        if summary[key]:
+            lines += ["", f"## {title}", "", "| Name | Count |", "| --- | --- |"]
+            lines += [f"| {name} | {n:,} |" for name, n in summary[key]]
+    for kind, rows in summary['hot_inputs'].items():
+        lines += ["", f"## Hottest inputs: {kind}", "", "| Count | Inputs |", "| --- | --- |"]
+        lines += [f"| {n:,} | {json.dumps(inputs, ensure_ascii=False)} |" for n, inputs in rows]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarise the prediction audit log (hottest inputs)")
+    parser.add_argument("--directory", default=None, help="audit log directory (default: logs/audit)")
+    parser.add_argument("--kinds", nargs="*", help="only these record kinds")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    summary = report(read_records(args.directory, set(args.kinds) if args.kinds else None), top=args.top)
+    print(format_report(summary))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
@@ -57,3 +57,28 @@ def get_chemical_features(monomer_ratios):
         "chem_avg_mw": avg_mw,
         "chem_avg_polarity": avg_polarity
     }
+
+def get_chemical_features_batch(monomer_cols, phr_matrix):
+    """
+    get_chemical_features 의 배치 버전 (대량 후보 배합 평가용)
+    monomer_cols: ['monomer_BA', 'monomer_MMA', ...] (phr_matrix 의 열 순서)
+    phr_matrix: (n_rows, n_monomers) 배합비 행렬
+    반환: {'chem_avg_tg': (n_rows,), 'chem_avg_mw': (n_rows,), 'chem_avg_polarity': (n_rows,)}
+    """
+    import numpy as np
+
+    phr_matrix = np.asarray(phr_matrix, dtype=np.float64)
+    fallback_props = {"tg": 298.15, "mw": 100.0, "polarity": 0.20}
+    props = np.array([
+        [MONOMER_PROPERTIES.get(c.replace("monomer_", ""), fallback_props)[k] for k in ("tg", "mw", "polarity")]
+        for c in monomer_cols
+    ]).reshape(len(monomer_cols), 3)
+
+    total_phr = phr_matrix.sum(axis=1)
+    safe_total = np.where(total_phr == 0, 1.0, total_phr)
+    averages = (phr_matrix @ props) / safe_total[:, None]
+
+    result = {}
+    for i, key in enumerate(("chem_avg_tg", "chem_avg_mw", "chem_avg_polarity")):
+        result[key] = np.where(total_phr == 0, DEFAULT_PROPS[key], averages[:, i])
+    return result
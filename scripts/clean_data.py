@@ -1,13 +1,41 @@
 import pandas as pd
+import numpy as np
+import io
 import os
 import re
+try:
+    from scripts.fingerprint import file_sha256, prefix_sha256
+except ImportError:
+    from fingerprint import file_sha256, prefix_sha256
+
+# 원시 실험 기록(cp949 CSV) 정제 단계
+# - 모듈 import 시에는 아무것도 실행하지 않음 (파이프라인에서 함수 단위로 호출)
+# - chunksize 단위 스트리밍 읽기/쓰기로 다년간 누적 원시 데이터도 메모리 사용량 일정
+# - 수치 정제는 셀 단위 apply 대신 열 단위 문자열 연산 + pd.to_numeric 으로 벡터화
+# - 원시 기록은 행 추가만 일어나므로, 이전 실행 상태가 있으면 새로 추가된 행만 정제하여 덧붙임
 
 # 현재 스크립트 위치 기준 상위 디렉토리 경로 설정
 script_dir = os.path.dirname(os.path.abspath(__file__))
 base_path = os.path.dirname(script_dir)
+raw_dir = os.path.join(base_path, "raw_data")
 output_dir = os.path.join(base_path, "data_cleaned")
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
+
+SYNTHESIS_RAW = os.path.join(raw_dir, "Lab 합성 총괄_250401부터241031까지.csv")
+COATING_RAW = os.path.join(raw_dir, "Lab 도포 총괄_250401부터241031까지.csv")
+SYNTHESIS_CLEANED = os.path.join(output_dir, "cleaned_synthesis_data.csv")
+COATING_CLEANED = os.path.join(output_dir, "cleaned_coating_data.csv")
+
+CHUNK_SIZE = 50000
+
+SYNTHESIS_NUMERIC_COLS = [
+    '이론 고형분(%)', '측정 고형분(%)', '수율(%)', '전환율(%)',
+    '응집량(%)', 'pH', 'Tg', '점도(cP)', '입도(nm)', 'Scale'
+]
+# 도포 데이터는 컬럼명이 일정하지 않으므로 부분 일치로 수치 컬럼 판별
+COATING_NUMERIC_HINTS = ['두께', 'Viscosity', 'Solid']
+
+NON_NUMERIC = re.compile(r'[^\d.]+')
+
 
 def clean_numeric(value):
     if pd.isna(value):
@@ -16,7 +44,7 @@ def clean_numeric(value):
         return float(value)
     if isinstance(value, str):
         # Remove units and extract numbers
-        value = re.sub(r'[^\d.]+', '', value)
+        value = NON_NUMERIC.sub('', value)
         if value == '' or value == '.':
             return None
     try:
@@ -24,65 +52,215 @@ def clean_numeric(value):
     except:
         return None
 
-def process_synthesis_data():
-    file_path = os.path.join(base_path, "raw_data", "Lab 합성 총괄_250401부터241031까지.csv")
+
+def clean_numeric_column(series):
+    """clean_numeric 의 열 단위 벡터화 버전 (단위/기호 제거 후 숫자 변환, 변환 불가 값은 NaN)"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    stripped = series.astype("string").str.replace(NON_NUMERIC, '', regex=True)
+    return pd.to_numeric(stripped, errors='coerce').astype(float)
+
+
+def sniff_separator(file_path, candidates=('\t', ','), min_columns=6, encoding='cp949'):
+    """헤더 행만 읽어 컬럼 수가 충분한 구분자를 선택 (없으면 None)"""
+    for sep in candidates:
+        try:
+            header = pd.read_csv(file_path, encoding=encoding, sep=sep, nrows=0)
+        except Exception:
+            continue
+        if len(header.columns) >= min_columns:
+            return sep
+    return None
+
+
+DTYPES = {'str': str, 'float': np.float64, 'int': np.int64}
+
+
+def _read_chunks(file_path, sep, chunksize, dtype=None, encoding='cp949', start_offset=0, columns=None):
+    """start_offset > 0 이면 해당 바이트 위치(행 경계)부터 헤더 없이 읽음 (columns 로 컬럼명 지정)"""
+    dtype = {c: DTYPES[k] for c, k in dtype.items()} if dtype else None
+    if start_offset == 0:
+        with pd.read_csv(file_path, encoding=encoding, sep=sep, on_bad_lines='skip',
+                         chunksize=chunksize, dtype=dtype) as reader:
+            yield from reader
+        return
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        with pd.read_csv(io.TextIOWrapper(f, encoding=encoding), sep=sep, on_bad_lines='skip',
+                         chunksize=chunksize, dtype=dtype, header=None, names=columns) as reader:
+            yield from reader
+
+
+def scan_column_kinds(file_path, sep, chunksize=CHUNK_SIZE, encoding='cp949', start_offset=0, columns=None):
+    """청크별로 추론된 열 자료형 종류 {컬럼: {'int', 'float', 'bool', 'str'}}"""
+    kinds = {c: set() for c in columns or []}
+    for chunk in _read_chunks(file_path, sep, chunksize, encoding=encoding,
+                              start_offset=start_offset, columns=columns):
+        for col, dtype in chunk.dtypes.items():
+            if pd.api.types.is_bool_dtype(dtype):
+                kind = 'bool'
+            elif pd.api.types.is_integer_dtype(dtype):
+                kind = 'int'
+            elif pd.api.types.is_float_dtype(dtype):
+                kind = 'float'
+            else:
+                kind = 'str'
+            kinds.setdefault(col, set()).add(kind)
+    return kinds
+
+
+def resolve_dtypes(kinds):
+    """
+    청크별 자료형 추론 결과를 합쳐 전체 파일을 한 번에 읽었을 때와 같은 열 자료형 결정
+    (청크마다 int/float/문자열 추론이 달라 출력 형식이 바뀌는 것을 방지)
+    반환: {컬럼: 'str' | 'float' | 'int'} (bool 등 단일 자료형 열은 추론에 맡김)
+    """
+    dtypes = {}
+    for col, found in kinds.items():
+        if 'str' in found or ('bool' in found and len(found) > 1):
+            dtypes[col] = 'str'
+        elif 'float' in found:
+            dtypes[col] = 'float'
+        elif found == {'int'}:
+            dtypes[col] = 'int'
+    return dtypes
+
+
+def _write_chunks(chunks, f, numeric_cols, numeric_hints, strip_columns, header):
+    n_rows = 0
+    for chunk in chunks:
+        if strip_columns:
+            chunk.columns = [c.strip() for c in chunk.columns]
+        targets = [c for c in chunk.columns
+                   if (numeric_cols and c in numeric_cols)
+                   or (numeric_hints and any(h in c for h in numeric_hints))]
+        for col in targets:
+            chunk[col] = clean_numeric_column(chunk[col])
+        chunk.to_csv(f, index=False, header=header and n_rows == 0)
+        n_rows += len(chunk)
+    return n_rows
+
+
+def clean_file(file_path, output_path, sep, numeric_cols=None, numeric_hints=None,
+               strip_columns=False, chunksize=CHUNK_SIZE, encoding='cp949'):
+    """
+    원시 CSV -> 정제 CSV (utf-8-sig) 스트리밍 변환
+    numeric_cols: 수치 정제할 컬럼명 목록, numeric_hints: 컬럼명에 포함되면 수치 정제할 문자열 목록
+    반환: 실행 상태 {'rows', 'offset', 'sha256', 'columns', 'dtypes', ...} (증분 정제에 사용)
+    """
+    kinds = scan_column_kinds(file_path, sep, chunksize, encoding)
+    dtypes = resolve_dtypes(kinds)
+    offset = os.path.getsize(file_path)
+    tmp_path = output_path + ".tmp"
     try:
-        # Synthesis data uses Tab
-        df = pd.read_csv(file_path, encoding='cp949', sep='\t', on_bad_lines='skip')
-        
-        numeric_cols = [
-            '이론 고형분(%)', '측정 고형분(%)', '수율(%)', '전환율(%)', 
-            '응집량(%)', 'pH', 'Tg', '점도(cP)', '입도(nm)', 'Scale'
-        ]
-        
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].apply(clean_numeric)
-        
-        output_path = os.path.join(output_dir, "cleaned_synthesis_data.csv")
-        df.to_csv(output_path, index=False, encoding='utf-8-sig')
-        print(f"Success: Synthesis data cleaned ({len(df)} rows).")
+        with open(tmp_path, "w", encoding="utf-8-sig", newline="") as f:
+            n_rows = _write_chunks(_read_chunks(file_path, sep, chunksize, dtypes, encoding), f,
+                                   numeric_cols, numeric_hints, strip_columns, header=True)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {'rows': n_rows, 'offset': offset, 'sha256': file_sha256(file_path),
+            'columns': list(kinds), 'dtypes': dtypes, 'mode': 'full', 'new_rows': n_rows}
+
+
+def clean_new_rows(file_path, output_path, sep, state, numeric_cols=None, numeric_hints=None,
+                   strip_columns=False, chunksize=CHUNK_SIZE, encoding='cp949'):
+    """
+    이전 실행 이후 원시 파일 끝에 추가된 행만 정제하여 출력 파일에 덧붙임
+    기존 부분이 바뀌었거나(해시 불일치) 새 행 때문에 열 자료형이 달라지면 None (전체 재정제 필요)
+    """
+    if not state or not os.path.exists(output_path):
+        return None
+    offset = state['offset']
+    size = os.path.getsize(file_path)
+    if size < offset or prefix_sha256(file_path, offset) != state['sha256']:
+        return None
+    with open(file_path, "rb") as f:
+        f.seek(max(offset - 1, 0))
+        if offset > 0 and f.read(1) != b"\n":
+            return None
+    if size == offset:
+        return dict(state, mode='append', new_rows=0)
+
+    n_new = append_clean_rows(file_path, output_path, sep, state, numeric_cols, numeric_hints,
+                              strip_columns, chunksize, encoding, start_offset=offset)
+    if n_new is None:
+        return None
+    return dict(state, rows=state['rows'] + n_new, offset=size, sha256=file_sha256(file_path),
+                mode='append', new_rows=n_new)
+
+
+def append_clean_rows(file_path, output_path, sep, state, numeric_cols=None, numeric_hints=None,
+                      strip_columns=False, chunksize=CHUNK_SIZE, encoding='cp949', start_offset=0):
+    """
+    file_path 의 행(start_offset > 0 이면 해당 바이트 위치 이후의 헤더 없는 행)을 이전 정제 결과와 같은
+    열 자료형으로 정제하여 출력 파일에 덧붙임
+    반환: 덧붙인 행 수 (새 행 때문에 열 자료형이 달라지면 None - 전체 재정제 필요)
+    """
+    kinds = scan_column_kinds(file_path, sep, chunksize, encoding, start_offset=start_offset,
+                              columns=state['columns'])
+    merged = resolve_dtypes({c: kinds.get(c, set()) | {state['dtypes'].get(c, 'str')} for c in state['columns']})
+    if merged != state['dtypes'] or set(kinds) != set(state['columns']):
+        return None
+    with open(output_path, "a", encoding="utf-8", newline="") as f:
+        return _write_chunks(_read_chunks(file_path, sep, chunksize, state['dtypes'], encoding, start_offset,
+                                          state['columns']),
+                             f, numeric_cols, numeric_hints, strip_columns, header=False)
+
+
+def clean_synthesis(state=None, file_path=SYNTHESIS_RAW, output_path=SYNTHESIS_CLEANED, chunksize=CHUNK_SIZE):
+    """합성 기록 정제 (이전 실행 상태가 있으면 새 행만 정제 시도), 반환: 실행 상태"""
+    # Synthesis data uses Tab
+    options = dict(numeric_cols=SYNTHESIS_NUMERIC_COLS, chunksize=chunksize)
+    return (clean_new_rows(file_path, output_path, '\t', state, **options)
+            or clean_file(file_path, output_path, '\t', **options))
+
+
+def clean_coating(state=None, file_path=COATING_RAW, output_path=COATING_CLEANED, chunksize=CHUNK_SIZE):
+    """도포 기록 정제 (이전 실행 상태가 있으면 새 행만 정제 시도), 반환: 실행 상태"""
+    # Try Tab first, then Comma (헤더만 읽어 판별)
+    sep = sniff_separator(file_path)
+    if sep is None:
+        raise ValueError("Failed to parse coating data with any separator.")
+    print(f"Coating data parsed with separator: {repr(sep)}")
+    options = dict(numeric_hints=COATING_NUMERIC_HINTS, strip_columns=True, chunksize=chunksize)
+    if state and state.get('sep') != sep:
+        state = None
+    new_state = (clean_new_rows(file_path, output_path, sep, state, **options)
+                 or clean_file(file_path, output_path, sep, **options))
+    return dict(new_state, sep=sep)
+
+
+def process_synthesis_data(file_path=SYNTHESIS_RAW, output_path=SYNTHESIS_CLEANED, chunksize=CHUNK_SIZE):
+    try:
+        state = clean_synthesis(None, file_path, output_path, chunksize)
+        print(f"Success: Synthesis data cleaned ({state['rows']} rows).")
         return True
     except Exception as e:
         print(f"Error processing synthesis data: {e}")
         return False
 
-def process_coating_data():
-    file_path = os.path.join(base_path, "raw_data", "Lab 도포 총괄_250401부터241031까지.csv")
+
+def process_coating_data(file_path=COATING_RAW, output_path=COATING_CLEANED, chunksize=CHUNK_SIZE):
     try:
-        # Try Tab first, then Comma
-        df = None
-        for s in ['\t', ',']:
-            try:
-                temp_df = pd.read_csv(file_path, encoding='cp949', sep=s, on_bad_lines='skip')
-                if len(temp_df.columns) > 5:
-                    df = temp_df
-                    print(f"Coating data parsed with separator: {repr(s)}")
-                    break
-            except:
-                continue
-        
-        if df is not None:
-            df.columns = [c.strip() for c in df.columns]
-            # Simple numeric cleaning for common cols if they exist
-            # (Coating data might have different cols, but let's try basic ones)
-            potential_numeric = ['두께', 'Viscosity', 'Solid']
-            for col in df.columns:
-                if any(p in col for p in potential_numeric):
-                    df[col] = df[col].apply(clean_numeric)
-            
-            output_path = os.path.join(output_dir, "cleaned_coating_data.csv")
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
-            print(f"Success: Coating data cleaned ({len(df)} rows).")
-            return True
-        else:
-            print("Failed to parse coating data with any separator.")
-            return False
+        state = clean_coating(None, file_path, output_path, chunksize)
+        print(f"Success: Coating data cleaned ({state['rows']} rows).")
+        return True
     except Exception as e:
         print(f"Error processing coating data: {e}")
         return False
 
-print("--- Data Cleansing Execution ---")
-s_ok = process_synthesis_data()
-c_ok = process_coating_data()
-print("--- Execution Finished ---")
+
+def run_cleaning(chunksize=CHUNK_SIZE):
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    print("--- Data Cleansing Execution ---")
+    s_ok = process_synthesis_data(chunksize=chunksize)
+    c_ok = process_coating_data(chunksize=chunksize)
+    print("--- Execution Finished ---")
+    return s_ok and c_ok
+
+
+if __name__ == "__main__":
+    run_cleaning()
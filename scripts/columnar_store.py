@@ -0,0 +1,275 @@
+import fnmatch
+import os
+import time
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+try:
+    from scripts.clean_data import SYNTHESIS_NUMERIC_COLS, COATING_NUMERIC_HINTS, CHUNK_SIZE, resolve_dtypes
+except ImportError:
+    from clean_data import SYNTHESIS_NUMERIC_COLS, COATING_NUMERIC_HINTS, CHUNK_SIZE, resolve_dtypes
+
+# data_cleaned/ 중간 산출물의 Parquet(열 지향) 저장소
+# - CSV 는 그대로 원본(사람이 읽는 형식, 버전 관리 대상)으로 두고, 같은 이름의 .parquet 를 함께 생성
+# - 테이블별로 선언한 스키마로 열 자료형을 고정 (읽을 때마다 텍스트 파싱 / 자료형 추론 / 한글 컬럼명 문자열 매칭 불필요)
+# - 'float' 열은 모든 값이 float32 로 손실 없이 표현되면 float32 로 저장 (0/1 원-핫, 정수 온도/시간 등)
+# - 읽기 시 필요한 열만 읽는 열 선택(projection) 지원, float32 열은 기본적으로 float64 로 되돌려 CSV 와 동일한 값/자료형 반환
+# - pyarrow 가 없거나 Parquet 가 CSV 보다 오래된 경우(원본 CSV 크기/수정시각 불일치) CSV 로 대체
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+data_dir = os.path.join(base_dir, "data_cleaned")
+
+# 테이블별 선언 스키마: (컬럼명 패턴, 논리 자료형) 목록, 위에서부터 처음 일치하는 규칙 적용
+# 'float': 실수 (float32 무손실이면 float32), None: 정제 시점의 열 자료형 추론 결과 유지 (원시 기록의 텍스트/메모 열)
+TABLES = {
+    'cleaned_synthesis': ("cleaned_synthesis_data",
+                          [(c, 'float') for c in SYNTHESIS_NUMERIC_COLS] + [('*', None)]),
+    'cleaned_coating': ("cleaned_coating_data",
+                        [(f"*{h}*", 'float') for h in COATING_NUMERIC_HINTS] + [('*', None)]),
+    'model_features': ("model_features",
+                       [('온도', 'float'), ('반응시간', 'float'), ('Scale', 'float'), ('이론 고형분(%)', 'float'),
+                        ('monomer_*', 'float'), ('chem_avg_*', 'float'),
+                        ('수율(%)', 'float'), ('점도(cP)', 'float'), ('Tg', 'float'), ('입도(nm)', 'float')]),
+    'coating_model_features': ("coating_model_features",
+                               [('도포량_num', 'float'), ('hardener_*', 'float'), ('additive_*', 'float'),
+                                ('fabric_*', 'float'), ('점착력_target', 'float')]),
+}
+
+ARROW_TYPES = {'float32': 'float32', 'float64': 'float64', 'int': 'int64', 'bool': 'bool_', 'str': 'large_string'}
+
+
+def available():
+    return pq is not None
+
+
+def csv_path(name, directory=data_dir):
+    return os.path.join(directory, TABLES[name][0] + ".csv")
+
+
+def parquet_path(name, directory=data_dir):
+    return os.path.join(directory, TABLES[name][0] + ".parquet")
+
+
+def declared_kind(name, column):
+    """선언 스키마에서 컬럼의 논리 자료형 (선언되지 않은 컬럼이면 ValueError)"""
+    for pattern, kind in TABLES[name][1]:
+        if fnmatch.fnmatchcase(column, pattern):
+            return kind
+    raise ValueError(f"{name}: 스키마에 선언되지 않은 컬럼: {column}")
+
+
+def _csv_chunks(path, chunksize, dtype=None, usecols=None):
+    with pd.read_csv(path, encoding='utf-8-sig', chunksize=chunksize, dtype=dtype, usecols=usecols) as reader:
+        yield from reader
+
+
+def _scan(path, chunksize):
+    """CSV 1회 스캔: 청크별 추론 자료형 종류와, 수치 열의 float32 무손실 여부"""
+    kinds, exact32 = {}, {}
+    for chunk in _csv_chunks(path, chunksize):
+        for col, dtype in chunk.dtypes.items():
+            if pd.api.types.is_bool_dtype(dtype):
+                kind = 'bool'
+            elif pd.api.types.is_integer_dtype(dtype):
+                kind = 'int'
+            elif pd.api.types.is_float_dtype(dtype):
+                kind = 'float'
+            else:
+                kind = 'str'
+            kinds.setdefault(col, set()).add(kind)
+            if kind in ('int', 'float'):
+                values = chunk[col].to_numpy(dtype=np.float64)
+                same = np.array_equal(values.astype(np.float32).astype(np.float64), values, equal_nan=True)
+                exact32[col] = exact32.get(col, True) and same
+    return kinds, exact32
+
+
+def resolve_schema(name, chunksize=CHUNK_SIZE, directory=data_dir):
+    """
+    선언 스키마 + CSV 스캔 결과로 물리 자료형 결정
+    반환: {컬럼: 'float32' | 'float64' | 'int' | 'bool' | 'str'} (CSV 컬럼 순서)
+    """
+    kinds, exact32 = _scan(csv_path(name, directory), chunksize)
+    inferred = resolve_dtypes(kinds)
+    types = {}
+    for col, found in kinds.items():
+        kind = declared_kind(name, col)
+        if kind is None:
+            kind = inferred.get(col) or ('bool' if found == {'bool'} else 'str')
+        if kind == 'float':
+            if 'str' in found:
+                raise ValueError(f"{name}: 실수로 선언된 컬럼에 문자열 값이 있음: {col}")
+            kind = 'float32' if exact32.get(col, True) else 'float64'
+        types[col] = kind
+    return types
+
+
+def _arrow_schema(types, metadata):
+    fields = [pa.field(col, getattr(pa, ARROW_TYPES[kind])()) for col, kind in types.items()]
+    return pa.schema(fields, metadata={k: str(v) for k, v in metadata.items()})
+
+
+def _read_dtypes(types):
+    """CSV 를 선언 스키마대로 읽기 위한 pandas dtype (float32 열도 CSV 에서는 float64 로 읽음)"""
+    mapping = {'float32': np.float64, 'float64': np.float64, 'int': np.int64, 'str': str}
+    return {col: mapping[kind] for col, kind in types.items() if kind in mapping}
+
+
+def export_table(name, chunksize=CHUNK_SIZE, directory=data_dir):
+    """
+    CSV -> Parquet (청크 단위 스트리밍 변환, 임시 파일 작성 후 교체)
+    반환: {'rows', 'columns', 'float32_columns', 'csv_bytes', 'parquet_bytes'} (pyarrow 가 없으면 None)
+    """
+    if not available():
+        return None
+    source = csv_path(name, directory)
+    stat = os.stat(source)
+    types = resolve_schema(name, chunksize, directory)
+    schema = _arrow_schema(types, {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns})
+    target = parquet_path(name, directory)
+    tmp_path = target + ".tmp"
+    n_rows = 0
+    with pq.ParquetWriter(tmp_path, schema, compression='snappy') as writer:
+        for chunk in _csv_chunks(source, chunksize, dtype=_read_dtypes(types)):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            n_rows += len(chunk)
+        if n_rows == 0:
+            writer.write_table(schema.empty_table())
+    os.replace(tmp_path, target)
+    return {'rows': n_rows, 'columns': len(types),
+            'float32_columns': sum(kind == 'float32' for kind in types.values()),
+            'csv_bytes': stat.st_size, 'parquet_bytes': os.path.getsize(target)}
+
+
+def _open_current(name, directory=data_dir):
+    """Parquet 가 존재하고 현재 CSV 로부터 생성된 것이면 열린 ParquetFile (생성 시 기록한 CSV 크기/수정시각 비교)"""
+    target, source = parquet_path(name, directory), csv_path(name, directory)
+    if not available() or not os.path.exists(target) or not os.path.exists(source):
+        return None
+    parquet_file = pq.ParquetFile(target)
+    metadata = parquet_file.schema_arrow.metadata or {}
+    stat = os.stat(source)
+    if (metadata.get(b'source_size') == str(stat.st_size).encode()
+            and metadata.get(b'source_mtime_ns') == str(stat.st_mtime_ns).encode()):
+        return parquet_file
+    parquet_file.close()
+    return None
+
+
+def is_current(name, directory=data_dir):
+    parquet_file = _open_current(name, directory)
+    if parquet_file is None:
+        return False
+    parquet_file.close()
+    return True
+
+
+def table_columns(name, directory=data_dir):
+    parquet_file = _open_current(name, directory)
+    if parquet_file is not None:
+        with parquet_file:
+            return list(parquet_file.schema_arrow.names)
+    return list(pd.read_csv(csv_path(name, directory), encoding='utf-8-sig', nrows=0).columns)
+
+
+def read_table(name, columns=None, upcast=True, directory=data_dir):
+    """
+    테이블 읽기 (columns 지정 시 해당 열만, 지정한 순서대로)
+    upcast: float32 로 저장된 열을 float64 로 변환 (False 면 float32 그대로 - 트리 모델 학습처럼 float32 로 충분한 경우)
+    """
+    parquet_file = _open_current(name, directory)
+    if parquet_file is not None:
+        with parquet_file:
+            table = parquet_file.read(columns=columns)
+        if upcast:
+            fields = [pa.field(f.name, pa.float64()) if f.type == pa.float32() else f for f in table.schema]
+            table = table.cast(pa.schema(fields, metadata=table.schema.metadata))
+        return table.to_pandas()
+    dtype = {}
+    for col in table_columns(name, directory):
+        try:
+            if declared_kind(name, col) == 'float':
+                dtype[col] = np.float64
+        except ValueError:
+            pass
+    df = pd.read_csv(csv_path(name, directory), encoding='utf-8-sig', usecols=columns, dtype=dtype)
+    return df[columns] if columns is not None else df
+
+
+def check_parity(name, directory=data_dir):
+    """Parquet 읽기 결과가 CSV 와 값/컬럼/자료형까지 동일한지 (불일치 시 AssertionError)"""
+    if not is_current(name, directory):
+        raise RuntimeError(f"{name}: 최신 Parquet 파일이 없음 (export_table 먼저 실행)")
+    from_parquet = read_table(name, directory=directory)
+    from_csv = pd.read_csv(csv_path(name, directory), encoding='utf-8-sig',
+                           dtype={c: np.float64 for c in from_parquet.columns
+                                  if pd.api.types.is_float_dtype(from_parquet[c])})
+    pd.testing.assert_frame_equal(from_parquet, from_csv, check_exact=True)
+    return True
+
+
+def _best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare_formats(name, columns=None, repeat=5, directory=data_dir):
+    """CSV / Parquet 전체 읽기 및 열 선택 읽기 시간(최소값, 초)과 파일 크기 비교"""
+    source = csv_path(name, directory)
+    columns = columns or table_columns(name, directory)[:5]
+    with pq.ParquetFile(parquet_path(name, directory)) as parquet_file:
+        types = parquet_file.schema_arrow.types
+        rows = parquet_file.metadata.num_rows
+    return {
+        'rows': rows,
+        'columns': len(types),
+        'float32_columns': sum(t == pa.float32() for t in types),
+        'csv_bytes': os.path.getsize(source),
+        'parquet_bytes': os.path.getsize(parquet_path(name, directory)),
+        'csv_full': _best_time(lambda: pd.read_csv(source, encoding='utf-8-sig'), repeat),
+        'parquet_full': _best_time(lambda: read_table(name, directory=directory), repeat),
+        'csv_projected': _best_time(lambda: pd.read_csv(source, encoding='utf-8-sig', usecols=columns), repeat),
+        'parquet_projected': _best_time(lambda: read_table(name, columns, directory=directory), repeat),
+    }
+
+
+def export_all(chunksize=CHUNK_SIZE, directory=data_dir):
+    results = {}
+    for name in TABLES:
+        if os.path.exists(csv_path(name, directory)):
+            results[name] = export_table(name, chunksize, directory)
+    return results
+
+
+def format_report(names=None, repeat=5, directory=data_dir):
+    """최신 Parquet 가 있는 테이블의 크기 / 읽기 시간 / CSV 동일성 비교 표 (마크다운)"""
+    lines = ["| Table | Rows | float32 cols | CSV KB | Parquet KB | CSV read (ms) | Parquet read (ms) | "
+             "5-col CSV (ms) | 5-col Parquet (ms) | Parity |",
+             "| --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |"]
+    for name in names or TABLES:
+        if not is_current(name, directory):
+            continue
+        stats = compare_formats(name, repeat=repeat, directory=directory)
+        parity = check_parity(name, directory)
+        lines.append(f"| {name} | {stats['rows']:,} | {stats['float32_columns']}/{stats['columns']} | "
+                     f"{stats['csv_bytes'] / 1024:,.0f} | {stats['parquet_bytes'] / 1024:,.0f} | "
+                     f"{stats['csv_full'] * 1000:.1f} | {stats['parquet_full'] * 1000:.1f} | "
+                     f"{stats['csv_projected'] * 1000:.1f} | {stats['parquet_projected'] * 1000:.1f} | {parity} |")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if not available():
+        print("pyarrow is not installed; the CSV files remain the only storage format.")
+    else:
+        export_all()
+        print(format_report())
@@ -0,0 +1,231 @@
+import csv
+import datetime
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import numpy as np
+from openpyxl import load_workbook
+try:
+    from scripts.clean_data import (clean_file, append_clean_rows, raw_dir, output_dir, SYNTHESIS_CLEANED,
+                                    COATING_CLEANED, SYNTHESIS_NUMERIC_COLS, COATING_NUMERIC_HINTS, CHUNK_SIZE)
+except ImportError:
+    from clean_data import (clean_file, append_clean_rows, raw_dir, output_dir, SYNTHESIS_CLEANED,
+                            COATING_CLEANED, SYNTHESIS_NUMERIC_COLS, COATING_NUMERIC_HINTS, CHUNK_SIZE)
+
+# 실험 기록 엑셀(.xlsx) 직접 적재 단계 (수동 cp949/탭 CSV 변환 불필요)
+# - openpyxl 읽기 전용 모드로 행을 스트리밍 (시트 전체를 메모리에 올리지 않음)
+# - 워터마크(도포: Lab 일련번호, 합성: 배치 코드 S+YYMMDD+접미사)보다 새로운 행만 정제하여 정제 데이터에 덧붙임
+# - 기록 시트는 대체로 최신순이지만 완전히 정렬되어 있지 않으므로, 행 순서와 무관하게 키로 새 행을 판별
+# - 워터마크 이하(기존) 행은 정제/기록하지 않고 해시만 누적하여, 기존 행이 수정/삭제되거나 중간에 끼워진 경우 전체 재적재
+# - 정제 규칙은 clean_data 와 동일 (새 행을 임시 탭 구분 파일로 내보낸 뒤 같은 정제 함수 사용)
+
+SYNTHESIS_XLSX = os.path.join(raw_dir, "Lab 합성 총괄_250401부터241031까지.xlsx")
+COATING_XLSX = os.path.join(raw_dir, "Lab 도포 총괄_250401부터241031까지.xlsx")
+STATE_PATH = os.path.join(output_dir, "ingest_state.json")
+
+BATCH_CODE = re.compile(r'^S(\d{6})([A-Z]*)$')
+
+
+def batch_key(value):
+    """합성 배치 코드 -> 정렬 키 (S250421B -> (250421, 1, 'B')), 해석 불가 시 None"""
+    match = BATCH_CODE.match(value.strip()) if isinstance(value, str) else None
+    if match is None:
+        return None
+    return int(match.group(1)), len(match.group(2)), match.group(2)
+
+
+def serial_key(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+SOURCES = {
+    'synthesis': {
+        'workbook': SYNTHESIS_XLSX, 'output': SYNTHESIS_CLEANED,
+        'key_column': '점착제', 'key': batch_key,
+        'clean': {'numeric_cols': SYNTHESIS_NUMERIC_COLS},
+    },
+    'coating': {
+        'workbook': COATING_XLSX, 'output': COATING_CLEANED,
+        'key_column': 'Lab 일련번호', 'key': serial_key,
+        'clean': {'numeric_hints': COATING_NUMERIC_HINTS, 'strip_columns': True},
+    },
+}
+
+
+def format_float(value):
+    """
+    실수 셀 -> 최단 표기 텍스트
+    기록 시트의 실수는 단정밀도 값이 15자리로 저장되어 있으므로(0.4713 -> 0.471300005912781),
+    단정밀도로 왕복되는 값은 단정밀도 최단 표기(0.4713)로, 그 외에는 배정밀도 최단 표기로 기록
+    """
+    single = np.float32(value)
+    if np.isfinite(single) and abs(float(single) - value) <= 1e-12 * abs(value):
+        return np.format_float_positional(single, trim='-')
+    return repr(value)
+
+
+def format_cell(value):
+    """엑셀 셀 값 -> 기존 CSV 내보내기와 같은 텍스트 (논리값 0/1, 날짜 'YYYY-M-D H:MM:SS', 실수 최단 표기, 빈 셀 '')"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, datetime.datetime):
+        return f"{value.year}-{value.month}-{value.day} {value.hour}:{value.minute:02d}:{value.second:02d}"
+    if isinstance(value, float):
+        return format_float(value)
+    return value
+
+
+def iter_sheet(path, sheet=None):
+    """읽기 전용 스트리밍: 첫 행(헤더) 다음 데이터 행을 튜플로 반환 (완전히 빈 행은 건너뜀)"""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield tuple('' if h is None else str(h) for h in header)
+        for row in rows:
+            if any(v is not None for v in row):
+                yield row
+    finally:
+        workbook.close()
+
+
+def _output_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def ingest(kind, state=None, chunksize=CHUNK_SIZE, workbook=None, output_path=None):
+    """
+    엑셀 기록 -> 정제 데이터 적재
+    state: 이전 적재 상태 (None 이면 전체 적재), 반환: 새 적재 상태 (mode 'full' | 'append', new_rows)
+    """
+    source = SOURCES[kind]
+    workbook = workbook or source['workbook']
+    output_path = output_path or source['output']
+    key_of = source['key']
+    if state and (not os.path.exists(output_path) or state.get('output_stamp') != _output_stamp(output_path)):
+        state = None
+    watermark = key_of(state['watermark']) if state and state.get('watermark') is not None else None
+    incremental = state is not None
+
+    history_hash, all_hash = hashlib.sha256(), hashlib.sha256()
+    n_history = n_rows = 0
+    best_key, best_value = watermark, state.get('watermark') if state else None
+    fd, tmp_path = tempfile.mkstemp(suffix=".tsv", dir=os.path.dirname(output_path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+            rows = iter_sheet(workbook)
+            header = next(rows)
+            key_idx = header.index(source['key_column'])
+            writer.writerow(header)
+            for row in rows:
+                n_rows += 1
+                digest = repr(row).encode("utf-8")
+                all_hash.update(digest)
+                key = key_of(row[key_idx]) if key_idx < len(row) else None
+                if incremental and (key is None or (watermark is not None and key <= watermark)):
+                    history_hash.update(digest)
+                    n_history += 1
+                    continue
+                writer.writerow([format_cell(v) for v in row])
+                if key is not None and (best_key is None or key > best_key):
+                    best_key, best_value = key, row[key_idx]
+
+        if incremental and (list(header) != state['sheet_columns'] or n_history != state['history_rows']
+                            or history_hash.hexdigest() != state['history_sha256']):
+            # 기존 행이 수정 / 삭제되었거나 워터마크 이하 키로 행이 추가된 경우
+            print(f"{kind}: existing rows changed since the last ingest; re-ingesting the whole workbook.")
+            return ingest(kind, None, chunksize, workbook, output_path)
+
+        n_new = n_rows - n_history
+        if not incremental:
+            new_state = clean_file(tmp_path, output_path, '\t', chunksize=chunksize, encoding='utf-8',
+                                   **source['clean'])
+        elif n_new == 0:
+            new_state = dict(state, mode='append', new_rows=0)
+        else:
+            appended = append_clean_rows(tmp_path, output_path, '\t', state, chunksize=chunksize,
+                                         encoding='utf-8', **source['clean'])
+            if appended is None:
+                print(f"{kind}: new rows change column types; re-ingesting the whole workbook.")
+                return ingest(kind, None, chunksize, workbook, output_path)
+            new_state = dict(state, rows=state['rows'] + appended, mode='append', new_rows=appended)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    for key in ('offset', 'sha256'):
+        new_state.pop(key, None)
+    new_state.update({
+        'source': 'xlsx', 'sheet_columns': list(header), 'key_column': source['key_column'],
+        'watermark': best_value, 'history_rows': n_rows, 'history_sha256': all_hash.hexdigest(),
+        'output_stamp': _output_stamp(output_path),
+    })
+    return new_state
+
+
+def load_state(path=STATE_PATH):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_state(states, path=STATE_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(states, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def update(kind, chunksize=CHUNK_SIZE, state_path=STATE_PATH):
+    """워터마크 상태 파일(data_cleaned/ingest_state.json)을 이용한 증분 적재, 반환: 새 적재 상태"""
+    states = load_state(state_path)
+    new_state = ingest(kind, states.get(kind), chunksize)
+    new_state['ingested_at'] = time.strftime("%Y-%m-%d %H:%M:%S")
+    states[kind] = new_state
+    save_state(states, state_path)
+    return new_state
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental ingestion of the lab Excel workbooks")
+    parser.add_argument("kinds", nargs="*", help=f"sources to ingest {list(SOURCES)} (default: all)")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and re-ingest everything")
+    args = parser.parse_args()
+    kinds = args.kinds or list(SOURCES)
+    unknown = [k for k in kinds if k not in SOURCES]
+    if unknown:
+        parser.error(f"unknown sources: {unknown}")
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    if args.full:
+        states = load_state()
+        for kind in kinds:
+            states.pop(kind, None)
+        save_state(states)
+    for kind in kinds:
+        start = time.perf_counter()
+        result = update(kind)
+        print(f"{kind}: {result['mode']} ingest, {result['new_rows']} new rows "
+              f"({result['rows']} total, watermark {result['watermark']}) in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+import os
+import tempfile
+import joblib
+from sklearn.neighbors import BallTree
+try:
+    from scripts.columnar_store import read_table, table_columns
+    from scripts.fingerprint import file_sha256, prefix_sha256
+except ImportError:
+    from columnar_store import read_table, table_columns
+    from fingerprint import file_sha256, prefix_sha256
+
+# 과거 합성 실험 최근접 검색 인덱스
+# - model_features.csv 의 피처 공간을 컬럼별 범위로 정규화한 뒤 BallTree 로 색인 (models/ 에 함께 저장)
+# - 신규 실험 행은 트리를 다시 만들지 않고 보조 버퍼에 추가하며, 버퍼가 커지면 그때 재구축
+# - 피처 파일의 기존 부분(색인 시점 크기까지의 내용 해시)이 바뀌었으면 증분 반영 대신 전체 재색인
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+features_path = os.path.join(base_dir, "data_cleaned", "model_features.csv")
+cleaned_path = os.path.join(base_dir, "data_cleaned", "cleaned_synthesis_data.csv")
+model_dir = os.path.join(base_dir, "models")
+index_path = os.path.join(model_dir, "experiment_index.joblib")
+
+TARGET_COLS = ['수율(%)', '점도(cP)', 'Tg', '입도(nm)']
+META_COLS = ['점착제', '모노머']
+
+
+def _load_feature_list():
+    path = os.path.join(model_dir, "feature_list.txt")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return [line.strip() for line in f.readlines()]
+    return []
+
+
+def _load_metadata(n_rows):
+    # prepare_dataset 은 목표값이 하나라도 있는 행만 남기므로 같은 조건으로 정제 데이터의 배치 정보를 정렬
+    if not os.path.exists(cleaned_path):
+        return None
+    stored = table_columns('cleaned_synthesis')
+    existing = [c for c in TARGET_COLS if c in stored]
+    meta_cols = [c for c in META_COLS if c in stored]
+    df = read_table('cleaned_synthesis', columns=existing + meta_cols)
+    mask = df[existing].apply(pd.to_numeric, errors='coerce').notna().any(axis=1)
+    meta = df.loc[mask, meta_cols].reset_index(drop=True)
+    if len(meta) != n_rows:
+        return None
+    return meta
+
+
+class ExperimentIndex:
+    def __init__(self, features, offset, scale, rebuild_threshold=256):
+        self.features = list(features)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.rebuild_threshold = rebuild_threshold
+        self.tree = None
+        self.tree_points = np.empty((0, len(self.features)))
+        self.buffer_points = np.empty((0, len(self.features)))
+        self.records = pd.DataFrame()
+        self.source_rows = 0
+        self.source_stamp = None
+        self.source_sha256 = None
+
+    @classmethod
+    def build(cls, df, features, meta=None, rebuild_threshold=256):
+        """피처 데이터프레임으로부터 인덱스 생성 (정규화 기준은 생성 시점 데이터로 고정)"""
+        numeric = df[features].apply(pd.to_numeric, errors='coerce')
+        offset = numeric.min().to_numpy(dtype=np.float64)
+        span = numeric.max().to_numpy(dtype=np.float64) - offset
+        # 변동이 없거나 전부 결측인 컬럼은 거리 계산에서 제외
+        valid = np.isfinite(span) & (span > 0)
+        offset = np.where(valid, offset, 0.0)
+        scale = np.where(valid, 1.0 / np.where(valid, span, 1.0), 0.0)
+
+        index = cls(features, offset, scale, rebuild_threshold)
+        index.append(df, meta)
+        index.rebuild()
+        return index
+
+    def _normalize(self, X):
+        X = np.nan_to_num(np.asarray(X, dtype=np.float64), nan=0.0)
+        return (X - self.offset) * self.scale
+
+    def _records_for(self, df, meta):
+        records = pd.DataFrame(index=range(len(df)))
+        if meta is not None:
+            for col in meta.columns:
+                records[col] = meta[col].to_numpy()
+        for col in TARGET_COLS:
+            if col in df.columns:
+                records[col] = pd.to_numeric(df[col], errors='coerce').to_numpy()
+        return records
+
+    def append(self, df, meta=None):
+        """신규 실험 행 추가 (트리 재구축 없이 버퍼에 적재)"""
+        if len(df) == 0:
+            return
+        X = df.reindex(columns=self.features).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        self.buffer_points = np.vstack([self.buffer_points, self._normalize(X)])
+        self.records = pd.concat([self.records, self._records_for(df, meta)], ignore_index=True)
+        self.source_rows += len(df)
+        if len(self.buffer_points) >= self.rebuild_threshold:
+            self.rebuild()
+
+    def rebuild(self):
+        self.tree_points = np.vstack([self.tree_points, self.buffer_points])
+        self.buffer_points = np.empty((0, len(self.features)))
+        self.tree = BallTree(self.tree_points) if len(self.tree_points) else None
+
+    def query(self, X, k=3):
+        """
+        X: (n, n_features) 학습 피처 순서의 입력 행렬
+        반환: 입력 행마다 최근접 실험 k건의 DataFrame 리스트 (거리 오름차순)
+        """
+        Q = self._normalize(np.atleast_2d(X))
+        n_tree = len(self.tree_points)
+        dists, idxs = [], []
+        if self.tree is not None:
+            d, i = self.tree.query(Q, k=min(k, n_tree))
+            dists.append(d)
+            idxs.append(i)
+        if len(self.buffer_points):
+            # 버퍼는 소량이므로 전수 거리 계산
+            d = np.sqrt(((Q[:, None, :] - self.buffer_points[None, :, :])**2).sum(axis=2))
+            dists.append(d)
+            idxs.append(np.broadcast_to(np.arange(len(self.buffer_points)) + n_tree, d.shape))
+        if not dists:
+            return [pd.DataFrame() for _ in range(len(Q))]
+
+        dist = np.hstack(dists)
+        idx = np.hstack(idxs)
+        order = np.argsort(dist, axis=1)[:, :k]
+        results = []
+        for r in range(len(Q)):
+            rows = idx[r, order[r]]
+            res = self.records.iloc[rows].copy()
+            res.insert(0, '거리', dist[r, order[r]])
+            results.append(res.reset_index(drop=True))
+        return results
+
+    def sync(self, path=features_path):
+        """
+        피처 파일에 추가된 행만 읽어 인덱스에 반영 (파일 변경이 없으면 즉시 반환)
+        기존 부분의 내용이 바뀌었으면(같은 행 수로 재생성된 경우 포함) 새 정규화 기준으로 전체 재색인
+        반환: 새로 색인한 행 수
+        """
+        if not os.path.exists(path):
+            return 0
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        if stamp == self.source_stamp:
+            return 0
+        old_size = self.source_stamp[0] if self.source_stamp else None
+        appended = (old_size is not None and self.source_sha256 is not None and stat.st_size >= old_size
+                    and prefix_sha256(path, old_size) == self.source_sha256)
+        df = pd.read_csv(path, encoding='utf-8-sig')
+        meta = _load_metadata(len(df))
+        if appended and len(df) >= self.source_rows:
+            new_rows = df.iloc[self.source_rows:]
+            new_meta = meta.iloc[self.source_rows:].reset_index(drop=True) if meta is not None else None
+            self.append(new_rows.reset_index(drop=True), new_meta)
+            n_new = len(new_rows)
+        else:
+            fresh = ExperimentIndex.build(df, self.features, meta, self.rebuild_threshold)
+            self.__dict__.update(fresh.__dict__)
+            n_new = len(df)
+        self.source_stamp = stamp
+        self.source_sha256 = file_sha256(path)
+        return n_new
+
+    def save(self, path=index_path):
+        # 클래스 자체가 아닌 상태 dict 로 저장 (스크립트 실행 위치와 무관하게 로드 가능)
+        # 같은 디렉터리의 임시 파일에 쓴 뒤 교체하여 읽는 쪽이 쓰다 만 파일을 보지 않도록 함
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                        dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        try:
+            joblib.dump({
+                'features': self.features, 'offset': self.offset, 'scale': self.scale,
+                'rebuild_threshold': self.rebuild_threshold, 'tree': self.tree,
+                'tree_points': self.tree_points, 'buffer_points': self.buffer_points,
+                'records': self.records, 'source_rows': self.source_rows, 'source_stamp': self.source_stamp,
+                'source_sha256': self.source_sha256
+            }, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path=index_path):
+        state = joblib.load(path)
+        index = cls(state['features'], state['offset'], state['scale'], state['rebuild_threshold'])
+        for key in ('tree', 'tree_points', 'buffer_points', 'records', 'source_rows', 'source_stamp'):
+            setattr(index, key, state[key])
+        # 이전 형식(해시 없음)의 인덱스는 다음 sync 에서 전체 재색인
+        index.source_sha256 = state.get('source_sha256')
+        return index
+
+
+def build_experiment_index(path=features_path, save_path=index_path):
+    features = _load_feature_list()
+    if not features or not os.path.exists(path):
+        print("Error: Feature list or feature dataset not found.")
+        return None
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    index = ExperimentIndex.build(df, features, _load_metadata(len(df)))
+    stat = os.stat(path)
+    index.source_stamp = (stat.st_size, stat.st_mtime_ns)
+    index.source_sha256 = file_sha256(path)
+    index.save(save_path)
+    print(f"Experiment index saved: {save_path} ({index.source_rows} experiments)")
+    return index
+
+
+def load_experiment_index(path=index_path, sync=True):
+    """저장된 인덱스를 불러오고, 피처 파일에 새 실험이 추가되었으면 증분 반영"""
+    if not os.path.exists(path):
+        return None
+    index = ExperimentIndex.load(path)
+    if sync and index.sync() > 0:
+        index.save(path)
+    return index
+
+
+if __name__ == "__main__":
+    build_experiment_index()
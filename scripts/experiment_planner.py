@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+import os
+from joblib import Parallel, delayed
+try:
+    from scripts.feature_vectorizer import SynthesisVectorizer
+    from scripts.forest_engine import get_flat_forest
+    from scripts.optimize_recipe import load_property_model, load_feature_list
+except ImportError:
+    from feature_vectorizer import SynthesisVectorizer
+    from forest_engine import get_flat_forest
+    from optimize_recipe import load_property_model, load_feature_list
+
+# 배치 능동학습(Active Learning) 실험 계획기
+# - 합성 포레스트의 트리별 예측 분포를 사후분포 샘플로 간주하여 목표 대비 기대 개선량(EI) 계산
+# - 수만 개의 후보 배합을 벡터화 + 멀티코어로 평가한 뒤, 국소 페널티(Local Penalization)로 다양한 K개 배치 선정
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+data_path = os.path.join(base_dir, "data_cleaned", "model_features.csv")
+report_dir = os.path.join(base_dir, "reports")
+
+DEFAULT_MONOMERS = ["monomer_BA", "monomer_MMA", "monomer_AA", "monomer_2-EHA"]
+DEFAULT_PROCESS = {'온도': 80, '반응시간': 4.5, '이론 고형분(%)': 0.48, 'Scale': 500}
+
+
+def _target_column(model_name, columns):
+    # 모델 파일명 규칙(점도cP, 수율pct)을 학습 데이터 컬럼명(점도(cP), 수율(%))으로 역매핑
+    for col in columns:
+        if col.replace('%', 'pct').replace('(', '').replace(')', '').replace(' ', '') == model_name:
+            return col
+    return None
+
+
+def _target_loss(preds, targets_dict):
+    """preds: {target: (...)} -> 가중 정규화 제곱 오차 (optimize_recipe 의 손실과 동일한 형태)"""
+    loss = 0.0
+    for target_name, config in targets_dict.items():
+        target_val = config['target']
+        weight = config.get('weight', 1.0)
+        loss = loss + weight * ((preds[target_name] - target_val) / (abs(target_val) + 1e-6))**2
+    return loss
+
+
+def best_observed_loss(targets_dict, path=data_path):
+    """실제 실험 이력 중 모든 목표 물성이 측정된 배치의 최소 손실 (없으면 None)"""
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    cols = {t: _target_column(t, df.columns) for t in targets_dict}
+    if any(c is None for c in cols.values()):
+        return None
+    measured = df[list(cols.values())].dropna()
+    if measured.empty:
+        return None
+    preds = {t: measured[c].to_numpy(dtype=np.float64) for t, c in cols.items()}
+    return float(np.min(_target_loss(preds, targets_dict)))
+
+
+def sample_candidates(n_candidates, monomers, rng, max_components=None):
+    """phr 합계 100 인 후보 배합을 디리클레 분포에서 샘플링 (성분 수 제한 시 무작위 희소화)"""
+    phr = rng.dirichlet(np.ones(len(monomers)), size=n_candidates)
+    if max_components and max_components < len(monomers):
+        # 행마다 상위 max_components 개 성분만 남기고 재정규화
+        ranks = np.argsort(np.argsort(-phr * rng.random(phr.shape), axis=1), axis=1)
+        phr = np.where(ranks < max_components, phr, 0.0)
+        phr /= phr.sum(axis=1, keepdims=True)
+    return phr * 100.0
+
+
+def _score_chunk(X, forests, targets_dict, best_loss):
+    # 트리 k 의 예측을 사후 샘플 k 로 간주: 샘플별 손실 -> 개선량의 평균이 EI
+    per_tree = {t: f.predict_trees(X) for t, f in forests.items()}
+    tree_loss = _target_loss(per_tree, targets_dict)
+    mean_pred = {t: p.mean(axis=1) for t, p in per_tree.items()}
+    std_pred = {t: p.std(axis=1) for t, p in per_tree.items()}
+    ei = np.maximum(best_loss - tree_loss, 0.0).mean(axis=1)
+    return ei, tree_loss.mean(axis=1), mean_pred, std_pred
+
+
+def _chunk_min_loss(X, forests, targets_dict):
+    return float(np.min(_target_loss({t: f.predict(X) for t, f in forests.items()}, targets_dict)))
+
+
+def score_candidates(X, forests, targets_dict, best_loss, n_jobs=-1, chunk_size=4096):
+    """
+    후보 행렬을 청크 단위로 나누어 멀티코어에서 병렬 평가
+    best_loss 가 None 이면(실험 이력 없음) 후보 전체의 최소 예측 손실을 기준값으로 먼저 계산하여
+    모든 청크의 EI 가 같은 기준값을 쓰도록 함 (청크 크기와 무관한 선정 결과)
+    """
+    chunks = [X[i:i + chunk_size] for i in range(0, X.shape[0], chunk_size)]
+    serial = n_jobs == 1 or len(chunks) == 1
+    if best_loss is None:
+        if serial:
+            minima = [_chunk_min_loss(c, forests, targets_dict) for c in chunks]
+        else:
+            minima = Parallel(n_jobs=n_jobs)(delayed(_chunk_min_loss)(c, forests, targets_dict) for c in chunks)
+        best_loss = min(minima)
+    if serial:
+        results = [_score_chunk(c, forests, targets_dict, best_loss) for c in chunks]
+    else:
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_score_chunk)(c, forests, targets_dict, best_loss) for c in chunks
+        )
+    ei = np.concatenate([r[0] for r in results])
+    loss = np.concatenate([r[1] for r in results])
+    mean_pred = {t: np.concatenate([r[2][t] for r in results]) for t in forests}
+    std_pred = {t: np.concatenate([r[3][t] for r in results]) for t in forests}
+    return ei, loss, mean_pred, std_pred
+
+
+def select_batch(ei, coords, n_experiments, length_scale=0.1):
+    """
+    국소 페널티 기반 탐욕적 배치 선정
+    선택된 점 주변(정규화 배합 공간, 반경 length_scale)의 획득값을 감쇠시켜 유사 배합의 중복 선정을 방지
+    """
+    acquisition = ei.copy()
+    if not np.any(acquisition > 0):
+        acquisition = np.ones_like(ei)
+    selected = []
+    for _ in range(min(n_experiments, len(ei))):
+        best = int(np.argmax(acquisition))
+        if acquisition[best] <= 0:
+            break
+        selected.append(best)
+        dist2 = np.sum((coords - coords[best])**2, axis=1)
+        acquisition *= 1.0 - np.exp(-dist2 / (2.0 * length_scale**2))
+    return selected
+
+
+def plan_experiments(targets_dict, n_experiments=5, fixed_params=None, monomers=None,
+                     n_candidates=20000, max_components=None, length_scale=0.1,
+                     n_jobs=-1, seed=42):
+    """
+    targets_dict: {'Tg': {'target': -30, 'weight': 1.0}, ...}
+    반환: (제안 배치 DataFrame, 오류 메시지)
+    """
+    if not targets_dict:
+        return None, "최소 하나 이상의 목표 물성을 설정해야 합니다."
+
+    features = load_feature_list()
+    if not features:
+        return None, "피처 목록을 불러올 수 없습니다."
+
+    forests = {}
+    for target_name in targets_dict:
+        model = load_property_model(target_name)
+        if model is None:
+            return None, f"'{target_name}' 모델을 불러올 수 없습니다."
+        forests[target_name] = get_flat_forest(model)
+
+    monomers = [m for m in (monomers or DEFAULT_MONOMERS) if m in features]
+    if len(monomers) < 2:
+        return None, "후보 모노머가 2개 이상 필요합니다."
+    params = dict(DEFAULT_PROCESS)
+    params.update(fixed_params or {})
+
+    rng = np.random.default_rng(seed)
+    phr = sample_candidates(n_candidates, monomers, rng, max_components)
+    try:
+        X = SynthesisVectorizer(features).from_phr(phr, monomers, params)
+    except KeyError as e:
+        return None, e.args[0]
+
+    best_loss = best_observed_loss(targets_dict)
+    ei, loss, mean_pred, std_pred = score_candidates(X, forests, targets_dict, best_loss, n_jobs=n_jobs)
+    selected = select_batch(ei, phr / 100.0, n_experiments, length_scale)
+
+    rows = []
+    for rank, idx in enumerate(selected, start=1):
+        row = {'순위': rank}
+        for j, m in enumerate(monomers):
+            row[m.replace("monomer_", "")] = round(float(phr[idx, j]), 2)
+        for t in forests:
+            row[f"{t}_예측"] = float(mean_pred[t][idx])
+            row[f"{t}_표준편차"] = float(std_pred[t][idx])
+        row['예상손실'] = float(loss[idx])
+        row['EI'] = float(ei[idx])
+        rows.append(row)
+    return pd.DataFrame(rows), None
+
+
+if __name__ == "__main__":
+    import time
+
+    test_targets = {'Tg': {'target': -35.0, 'weight': 1.0}, '점도cP': {'target': 3000, 'weight': 0.5}}
+    start = time.perf_counter()
+    plan, err = plan_experiments(test_targets, n_experiments=5)
+    elapsed = time.perf_counter() - start
+    if plan is None:
+        print(err)
+    else:
+        print(plan.to_string(index=False))
+        print(f"\nPlanning finished in {elapsed:.2f}s")
+        if not os.path.exists(report_dir):
+            os.makedirs(report_dir)
+        plan.to_csv(os.path.join(report_dir, "experiment_plan.csv"), index=False, encoding='utf-8-sig')
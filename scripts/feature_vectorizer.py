@@ -0,0 +1,138 @@
+import numpy as np
+import os
+try:
+    from scripts.chemical_db import get_chemical_features_batch
+except ImportError:
+    from chemical_db import get_chemical_features_batch
+
+# 학습 피처 목록 기반 입력 벡터 생성기
+# - 피처 목록으로 한 번 생성하여 이름 -> 열 인덱스 맵을 미리 계산
+# - dict 입력을 float64 행(또는 배치 행렬)에 직접 기록 (DataFrame 생성 / 누락 컬럼 루프 / 재정렬 불필요)
+# - 학습 피처 목록에 없는 이름은 조용히 버리지 않고 KeyError 로 거부
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+model_dir = os.path.join(base_dir, "models")
+
+CHEM_FEATURES = ("chem_avg_tg", "chem_avg_mw", "chem_avg_polarity")
+
+
+def read_feature_list(filename, directory=model_dir):
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return [line.strip() for line in f.readlines()]
+    return []
+
+
+class FeatureVectorizer:
+    def __init__(self, features):
+        self.features = list(features)
+        self.index = {name: i for i, name in enumerate(self.features)}
+        self.n_features = len(self.features)
+
+    def __len__(self):
+        return self.n_features
+
+    def check(self, names):
+        unknown = [n for n in names if n not in self.index]
+        if unknown:
+            raise KeyError(f"학습 피처 목록에 없는 변수: {unknown}")
+
+    def columns(self, names):
+        self.check(names)
+        return np.array([self.index[n] for n in names], dtype=np.int64)
+
+    def empty(self, n_rows=1):
+        return np.zeros((n_rows, self.n_features), dtype=np.float64)
+
+    def transform(self, values, out=None):
+        """
+        values: {피처명: 값} (없는 피처는 0)
+        out: 재사용할 (n_features,) 또는 (1, n_features) 버퍼 (지정 시 0으로 초기화 후 기록)
+        반환: (1, n_features) float64 행
+        """
+        self.check(values)
+        if out is None:
+            row = self.empty(1)
+        else:
+            row = out.reshape(1, self.n_features)
+            row[:] = 0.0
+        for name, val in values.items():
+            row[0, self.index[name]] = val
+        return row
+
+    def transform_batch(self, rows):
+        """dict 리스트 -> (n, n_features) 행렬"""
+        X = self.empty(len(rows))
+        for r, values in enumerate(rows):
+            self.transform(values, out=X[r])
+        return X
+
+
+class SynthesisVectorizer(FeatureVectorizer):
+    """합성 피처 벡터 생성기: 모노머 배합비로부터 화학 도메인 피처(chem_avg_*)를 자동 계산"""
+
+    def __init__(self, features):
+        super().__init__(features)
+        self.monomer_cols = [f for f in self.features if f.startswith("monomer_")]
+        self.monomer_idx = np.array([self.index[f] for f in self.monomer_cols], dtype=np.int64)
+        self.chem_cols = [c for c in CHEM_FEATURES if c in self.index]
+
+    def fill_chemical_features(self, X, skip=()):
+        """X 의 모노머 열로부터 화학 피처 열을 (배치 전체에 대해) 다시 계산"""
+        if not self.chem_cols:
+            return X
+        chem_f = get_chemical_features_batch(self.monomer_cols, X[:, self.monomer_idx])
+        for name in self.chem_cols:
+            if name not in skip:
+                X[:, self.index[name]] = chem_f[name]
+        return X
+
+    def transform(self, values, out=None):
+        # 호출자가 화학 피처를 직접 지정한 경우에는 그 값을 유지
+        row = super().transform(values, out)
+        return self.fill_chemical_features(row, skip=values)
+
+    def transform_batch(self, rows):
+        X = self.empty(len(rows))
+        for r, values in enumerate(rows):
+            FeatureVectorizer.transform(self, values, out=X[r])
+        return self.fill_chemical_features(X)
+
+    def from_phr(self, phr, monomers, params=None):
+        """
+        배합비 행렬 -> 입력 행렬 (대량 후보 배합 평가용)
+        phr: (n, len(monomers)), params: 모든 행에 공통인 공정 조건 {피처명: 값}
+        """
+        phr = np.atleast_2d(np.asarray(phr, dtype=np.float64))
+        cols = self.columns(monomers)
+        X = self.empty(phr.shape[0])
+        if params:
+            X[:, self.columns(list(params))] = np.array(list(params.values()), dtype=np.float64)
+        X[:, cols] = phr
+        return self.fill_chemical_features(X)
+
+
+class CoatingVectorizer(FeatureVectorizer):
+    """도포 피처 벡터 생성기: 원단(기재) 선택을 fabric_ 원-핫 열로 기록"""
+
+    def __init__(self, features):
+        super().__init__(features)
+        self.fabric_options = [f.replace("fabric_", "", 1) for f in self.features if f.startswith("fabric_")]
+
+    def transform(self, values, fabric=None, out=None):
+        row = super().transform(values, out)
+        if fabric is not None:
+            row[0, self.columns([f"fabric_{fabric}"])[0]] = 1.0
+        return row
+
+
+def load_synthesis_vectorizer(directory=model_dir):
+    features = read_feature_list("feature_list.txt", directory)
+    return SynthesisVectorizer(features) if features else None
+
+
+def load_coating_vectorizer(directory=model_dir):
+    features = read_feature_list("coating_feature_list.txt", directory)
+    return CoatingVectorizer(features) if features else None
@@ -0,0 +1,44 @@
+import hashlib
+import os
+
+# 파일 내용 해시(SHA-256) 유틸리티
+# 동일 프로세스 내에서는 (경로, 크기, 수정시각)이 같으면 해시를 다시 계산하지 않음
+
+_HASH_CACHE = {}
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _HASH_CACHE.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _HASH_CACHE[key] = digest
+    return digest
+
+
+def prefix_sha256(path, n_bytes, chunk_size=1 << 20):
+    """파일 앞부분 n_bytes 의 해시 (추가 전용 파일에서 기존 부분이 그대로인지 확인)"""
+    h = hashlib.sha256()
+    remaining = n_bytes
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(chunk_size, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+
+def combined_checksum(paths):
+    """여러 파일의 해시를 파일명 순으로 묶은 단일 체크섬 (존재하지 않는 파일은 'missing' 으로 반영)"""
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        h.update(os.path.basename(path).encode("utf-8"))
+        h.update(file_sha256(path).encode("ascii") if os.path.exists(path) else b"missing")
+    return h.hexdigest()
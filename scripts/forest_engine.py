@@ -0,0 +1,113 @@
+import numpy as np
+import weakref
+
+# RandomForestRegressor 의 모든 트리를 하나의 평탄화된 노드 배열로 합쳐,
+# 배치 전체 x 트리 전체를 한 번의 벡터화된 순회로 계산하기 위한 엔진
+# (estimator 별 predict 반복 호출 없이 트리별 예측값 / 분산 / 분위수 산출)
+
+_FLAT_CACHE = weakref.WeakKeyDictionary()
+
+
+class FlatForest:
+    def __init__(self, model):
+        trees = [est.tree_ for est in model.estimators_]
+        counts = np.array([t.node_count for t in trees], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        feature = np.concatenate([t.feature for t in trees]).astype(np.int64)
+        left = np.concatenate([t.children_left + off for t, off in zip(trees, offsets)])
+        right = np.concatenate([t.children_right + off for t, off in zip(trees, offsets)])
+
+        # 리프 노드는 자기 자신을 가리키도록 하여 고정 횟수 순회 후에도 리프에 머무르게 함
+        self.is_leaf = feature < 0
+        node_ids = np.arange(len(feature), dtype=np.int64)
+        self.left = np.where(self.is_leaf, node_ids, left)
+        self.right = np.where(self.is_leaf, node_ids, right)
+        self.feature = np.where(self.is_leaf, 0, feature)
+        self.threshold = np.concatenate([t.threshold for t in trees])
+        # 결측값(NaN) 분기 방향 (sklearn >= 1.3 에서 학습 시 결정되어 저장됨)
+        self.missing_left = np.concatenate([
+            np.asarray(getattr(t, 'missing_go_to_left', np.zeros(t.node_count)), dtype=bool) for t in trees
+        ])
+        self.has_missing_rule = bool(self.missing_left.any())
+        self.value = np.concatenate([t.value[:, 0, 0] for t in trees])
+        self.cover = np.concatenate([t.weighted_n_node_samples for t in trees])
+
+        self.roots = offsets
+        self.n_trees = len(trees)
+        self.n_features = model.n_features_in_
+        self.max_depth = max(t.max_depth for t in trees)
+        self.feature_importances = model.feature_importances_
+
+    def state(self):
+        """scikit-learn 없이 복원 가능한 배열 / 스칼라 사전 (모델 번들 저장용, 지연 생성 캐시는 제외)"""
+        return {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
+
+    @classmethod
+    def from_state(cls, state):
+        forest = cls.__new__(cls)
+        forest.__dict__.update(state)
+        return forest
+
+    def _as_matrix(self, X):
+        # sklearn 트리는 내부적으로 float32 입력과 float64 임계값을 비교하므로 동일하게 맞춤
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"피처 개수 불일치: 입력 {X.shape[1]}개, 모델 {self.n_features}개")
+        return X
+
+    def apply(self, X):
+        """(n_rows, n_trees) 형태의 전역 리프 노드 인덱스 반환"""
+        X = self._as_matrix(X)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        check_missing = self.has_missing_rule and np.isnan(X).any()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if check_missing:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_trees(self, X):
+        """(n_rows, n_trees) 형태의 트리별 예측값"""
+        return self.value[self.apply(X)]
+
+    def predict(self, X, chunk_size=None):
+        """트리 평균 예측 (chunk_size 지정 시 대용량 배치를 나누어 순회하여 메모리 사용량 제한)"""
+        if chunk_size is None:
+            return self.predict_trees(X).mean(axis=1)
+        X = self._as_matrix(X)
+        return np.concatenate([self.predict_trees(X[i:i + chunk_size]).mean(axis=1)
+                               for i in range(0, X.shape[0], chunk_size)])
+
+    def predict_interval(self, X, quantiles=(0.05, 0.95)):
+        """
+        트리 분포 기반 예측 구간
+        반환: {'mean': (n,), 'std': (n,), 'quantiles': {q: (n,)}}
+        """
+        per_tree = self.predict_trees(X)
+        q_values = np.quantile(per_tree, quantiles, axis=1)
+        return {
+            'mean': per_tree.mean(axis=1),
+            'std': per_tree.std(axis=1),
+            'quantiles': {q: q_values[i] for i, q in enumerate(quantiles)}
+        }
+
+
+def get_flat_forest(model):
+    """모델별 평탄화 결과를 캐시하여 재사용 (모델 객체가 해제되면 캐시도 함께 해제), 이미 평탄화된 포레스트는 그대로 반환"""
+    if isinstance(model, FlatForest):
+        return model
+    flat = _FLAT_CACHE.get(model)
+    if flat is None:
+        flat = FlatForest(model)
+        _FLAT_CACHE[model] = flat
+    return flat
+
+
+def predict_interval(model, X, quantiles=(0.05, 0.95)):
+    return get_flat_forest(model).predict_interval(X, quantiles)
@@ -0,0 +1,317 @@
+import atexit
+import bisect
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+# 핫 패스 계측 (구간 시간 / 카운터) 및 선택적 프로파일링
+# - 기본 비활성: span() 은 공용 no-op 객체를 반환하고 count() 는 즉시 반환 (호출당 1µs 미만)
+# - 활성화: 환경 변수 SIM_METRICS=1 또는 configure(enabled=True)
+# - 구간별 호출 수 / 합계 / 최소 / 최대 / 히스토그램을 프로세스 안에서 누적, 주기적으로(기본 10초) 및 종료 시 파일로 내보냄
+#   주기적 기록은 백그라운드 스레드 1개가 담당 (계측 호출 스레드에서는 파일 I/O 없음)
+#   logs/metrics/metrics.json (JSON 스냅샷), logs/metrics/metrics.prom (Prometheus 텍스트 형식, node_exporter textfile 수집용)
+# - 프로파일링: SIM_PROFILE=<표본 비율 0~1> 이면 profiled() 로 감싼 실행(역설계 1회 등) 중 해당 비율만 cProfile 로 기록
+#   logs/profiles/<이름>_<시각>.prof (pstats) + 누적 시간 상위 함수 요약 .txt
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+
+# 초 단위 히스토그램 경계 (Prometheus le 라벨)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FLUSH_INTERVAL = 10.0
+PREFIX = "sim"
+
+
+def _env_rate(name):
+    try:
+        return min(max(float(os.environ.get(name, "0")), 0.0), 1.0)
+    except ValueError:
+        return 0.0
+
+
+_config = {
+    'enabled': os.environ.get("SIM_METRICS", "") not in ("", "0"),
+    'profile_rate': _env_rate("SIM_PROFILE"),
+    'directory': os.environ.get("SIM_METRICS_DIR", os.path.join(base_dir, "logs", "metrics")),
+    'profile_directory': os.environ.get("SIM_PROFILE_DIR", os.path.join(base_dir, "logs", "profiles")),
+}
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_last_flush = [time.monotonic()]
+_flush_lock = threading.Lock()
+_flusher = [None]
+
+
+def configure(enabled=None, profile_rate=None, directory=None, profile_directory=None):
+    """실행 중 설정 변경 (None 인 항목은 유지), 반환: 현재 설정"""
+    if enabled is not None:
+        _config['enabled'] = bool(enabled)
+    if profile_rate is not None:
+        _config['profile_rate'] = min(max(float(profile_rate), 0.0), 1.0)
+    if directory is not None:
+        _config['directory'] = directory
+    if profile_directory is not None:
+        _config['profile_directory'] = profile_directory
+    return dict(_config)
+
+
+def enabled():
+    return _config['enabled']
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items()))) if labels else (name, ())
+
+
+def observe(name, seconds, **labels):
+    """구간 소요 시간 기록 (이미 측정된 시간을 직접 넣을 때, 예: 파이프라인 단계 보고)"""
+    if not _config['enabled']:
+        return
+    key = _key(name, labels)
+    with _lock:
+        stat = _spans.get(key)
+        if stat is None:
+            stat = _spans[key] = {'count': 0, 'sum': 0.0, 'min': seconds, 'max': seconds,
+                                  'buckets': [0] * (len(BUCKETS) + 1)}
+        stat['count'] += 1
+        stat['sum'] += seconds
+        stat['min'] = min(stat['min'], seconds)
+        stat['max'] = max(stat['max'], seconds)
+        stat['buckets'][bisect.bisect_left(BUCKETS, seconds)] += 1
+    _maybe_flush()
+
+
+def count(name, value=1, **labels):
+    """카운터 증가 (비활성 시 즉시 반환)"""
+    if not _config['enabled']:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    _maybe_flush()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def stop(self):
+        return 0.0
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """with 문으로 감싸거나 생성 후 stop() 을 호출하는 시간 측정 구간 (예외로 끝난 경우 error 카운터도 증가)"""
+    __slots__ = ('name', 'labels', 'start', 'stopped')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.start = time.perf_counter()
+        self.stopped = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            count(f"{self.name}_errors", **self.labels)
+        self.stop()
+        return False
+
+    def stop(self):
+        if self.stopped:
+            return 0.0
+        self.stopped = True
+        elapsed = time.perf_counter() - self.start
+        observe(self.name, elapsed, **self.labels)
+        return elapsed
+
+
+def span(name, **labels):
+    """시간 측정 구간, 비활성 시 공용 no-op 객체"""
+    if not _config['enabled']:
+        return _NOOP
+    return Span(name, labels)
+
+
+def timed(name, **labels):
+    """함수 전체를 구간으로 감싸는 데코레이터 (활성 여부는 호출 시점에 판단)"""
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            if not _config['enabled']:
+                return func(*args, **kwargs)
+            with Span(name, labels):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+
+class _Profile:
+    """profiled() 구간: cProfile 로 기록 후 .prof / 요약 .txt 저장"""
+
+    def __init__(self, name):
+        import cProfile
+        self.name = name
+        self.profiler = cProfile.Profile()
+        self.path = None
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        import io
+        import pstats
+        directory = _config['profile_directory']
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S") + f"_{int(time.time() * 1000) % 1000:03d}"
+        self.path = os.path.join(directory, f"{self.name}_{stamp}.prof")
+        self.profiler.dump_stats(self.path)
+        buffer = io.StringIO()
+        pstats.Stats(self.profiler, stream=buffer).sort_stats("cumulative").print_stats(30)
+        with open(self.path[:-len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+            f.write(buffer.getvalue())
+        count("profiles_written", profile=self.name)
+        return False
+
+
+def profiled(name):
+    """표본 비율(profile_rate)에 따라 cProfile 기록, 표본에서 빠지거나 비활성이면 no-op"""
+    rate = _config['profile_rate']
+    if rate <= 0.0 or (rate < 1.0 and random.random() >= rate):
+        return _NOOP
+    return _Profile(name)
+
+
+def snapshot():
+    """현재 누적값 {'spans': [...], 'counters': [...]}"""
+    with _lock:
+        spans = [{'name': name, 'labels': dict(labels), 'count': s['count'], 'sum': s['sum'],
+                  'mean': s['sum'] / s['count'], 'min': s['min'], 'max': s['max'],
+                  'buckets': dict(zip([str(b) for b in BUCKETS] + ["+Inf"], s['buckets']))}
+                 for (name, labels), s in sorted(_spans.items())]
+        counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(_counters.items())]
+    return {'generated_at': time.strftime("%Y-%m-%d %H:%M:%S"), 'pid': os.getpid(),
+            'spans': spans, 'counters': counters}
+
+
+def _label_text(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def prometheus_text(snap=None):
+    """Prometheus 텍스트 노출 형식 (구간 = 히스토그램, 카운터 = counter)"""
+    snap = snap or snapshot()
+    lines = [f"# HELP {PREFIX}_span_seconds Time spent in instrumented spans.",
+             f"# TYPE {PREFIX}_span_seconds histogram"]
+    for s in snap['spans']:
+        labels = dict(span=s['name'], **s['labels'])
+        cumulative = 0
+        for le, n in s['buckets'].items():
+            cumulative += n
+            lines.append(f"{PREFIX}_span_seconds_bucket{_label_text(labels, {'le': le})} {cumulative}")
+        lines.append(f"{PREFIX}_span_seconds_sum{_label_text(labels)} {s['sum']:.6f}")
+        lines.append(f"{PREFIX}_span_seconds_count{_label_text(labels)} {s['count']}")
+    lines += [f"# HELP {PREFIX}_events_total Instrumented event counters.",
+              f"# TYPE {PREFIX}_events_total counter"]
+    for c in snap['counters']:
+        lines.append(f"{PREFIX}_events_total{_label_text(dict(event=c['name'], **c['labels']))} {c['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def _atomic_write(path, text):
+    # 같은 디렉터리의 고유 임시 파일에 쓴 뒤 교체 (동시 기록 / 수집기 읽기 중에도 완성된 파일만 보임)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def flush(directory=None):
+    """JSON 스냅샷과 Prometheus 텍스트 파일 기록, 반환: (json 경로, prom 경로) - 기록할 값이 없으면 None"""
+    with _flush_lock:
+        return _write_files(directory)
+
+
+def _write_files(directory=None):
+    if not _spans and not _counters:
+        return None
+    directory = directory or _config['directory']
+    os.makedirs(directory, exist_ok=True)
+    snap = snapshot()
+    json_path = os.path.join(directory, "metrics.json")
+    prom_path = os.path.join(directory, "metrics.prom")
+    _atomic_write(json_path, json.dumps(snap, ensure_ascii=False, indent=2))
+    _atomic_write(prom_path, prometheus_text(snap))
+    _last_flush[0] = time.monotonic()
+    return json_path, prom_path
+
+
+def _maybe_flush():
+    # 요청 스레드에서는 기록 스레드가 살아 있는지만 확인
+    thread = _flusher[0]
+    if thread is None or not thread.is_alive():
+        _start_flusher()
+
+
+def _start_flusher():
+    with _lock:
+        if _flusher[0] is None or not _flusher[0].is_alive():
+            thread = threading.Thread(target=_run_flusher, name="metrics-flush", daemon=True)
+            thread.start()
+            _flusher[0] = thread
+
+
+def _run_flusher():
+    while True:
+        time.sleep(max(FLUSH_INTERVAL - (time.monotonic() - _last_flush[0]), 0.1))
+        with _flush_lock:
+            # 잠금 대기 중 다른 스레드(flush() 직접 호출)가 이미 기록했으면 건너뜀
+            if time.monotonic() - _last_flush[0] < FLUSH_INTERVAL:
+                continue
+            try:
+                _write_files()
+            except Exception:
+                pass
+            _last_flush[0] = time.monotonic()
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+@atexit.register
+def _flush_at_exit():
+    if _config['enabled']:
+        try:
+            flush()
+        except OSError:
+            pass
@@ -0,0 +1,204 @@
+import datetime
+import os
+import pickle
+import threading
+try:
+    from scripts.forest_engine import FlatForest, get_flat_forest
+    from scripts.tree_attribution import path_table_state, restore_path_table
+    from scripts.feature_vectorizer import read_feature_list
+    from scripts.fingerprint import file_sha256
+except ImportError:
+    from forest_engine import FlatForest, get_flat_forest
+    from tree_attribution import path_table_state, restore_path_table
+    from feature_vectorizer import read_feature_list
+    from fingerprint import file_sha256
+
+# 앱 시작용 모델 번들 (models/model_bundle.pkl)
+# - 모든 RandomForest 모델의 평탄화 포레스트 배열 + 기여도(TreeSHAP) 경로 테이블, 피처 목록, 범주 맵(모노머 / 원단 / 경화제 / 첨가제)을 파일 하나에 저장
+# - NumPy 배열과 기본 자료형만 담으므로 한 번의 읽기 + pickle 역직렬화로 로드 (scikit-learn import, 모델 파일별 joblib 역직렬화,
+#   포레스트 평탄화, 첫 기여도 계산의 경로 순회가 모두 불필요)
+# - 원본 파일(모델 / 피처 목록)의 (크기, 수정시각, SHA-256)을 함께 기록: 크기 / 수정시각이 다르면 해시로 다시 확인하고,
+#   내용이 바뀌었으면 번들을 쓰지 않고 모델 파일에서 읽은 뒤 번들을 다시 만듦 (파이프라인 model_bundle 단계에서도 생성)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+model_dir = os.path.join(base_dir, "models")
+
+BUNDLE_NAME = "model_bundle.pkl"
+BUNDLE_FORMAT = 1
+# 도포 모델 파일명 -> 앱 표시명 (나머지 model_rf_*.joblib 은 합성 모델, 파일명의 목표 물성명을 그대로 사용)
+COATING_MODELS = {'adhesion': '점착력'}
+FEATURE_LISTS = {'synthesis': "feature_list.txt", 'coating': "coating_feature_list.txt"}
+CATEGORY_PREFIXES = {'synthesis': ("monomer_",), 'coating': ("fabric_", "hardener_", "additive_")}
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def model_files(directory=model_dir):
+    if not os.path.exists(directory):
+        return []
+    return sorted(f for f in os.listdir(directory) if f.startswith("model_rf_") and f.endswith(".joblib"))
+
+
+def source_files(directory=model_dir):
+    """번들에 반영되는 원본 파일 경로 (모델 + 피처 목록)"""
+    names = model_files(directory) + list(FEATURE_LISTS.values())
+    return [os.path.join(directory, n) for n in names if os.path.exists(os.path.join(directory, n))]
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def category_maps(features, prefixes):
+    """접두어별 피처명 목록 {'fabric': ['fabric_T45', ...], ...}"""
+    return {prefix.rstrip("_"): [f for f in features if f.startswith(prefix)] for prefix in prefixes}
+
+
+def _read_models(directory):
+    """모델 파일 -> {'synthesis': {이름: FlatForest}, 'coating': {...}} (scikit-learn 필요)"""
+    import joblib
+    models = {'synthesis': {}, 'coating': {}}
+    for file in model_files(directory):
+        name = file[len("model_rf_"):-len(".joblib")]
+        forest = get_flat_forest(joblib.load(os.path.join(directory, file)))
+        if name in COATING_MODELS:
+            models['coating'][COATING_MODELS[name]] = forest
+        else:
+            models['synthesis'][name] = forest
+    return models
+
+
+def _assemble(models, directory):
+    features = {kind: read_feature_list(filename, directory) for kind, filename in FEATURE_LISTS.items()}
+    return {
+        'synthesis_models': models['synthesis'],
+        'coating_models': models['coating'],
+        'synthesis_features': features['synthesis'],
+        'coating_features': features['coating'],
+        'categories': {kind: category_maps(features[kind], CATEGORY_PREFIXES[kind]) for kind in FEATURE_LISTS},
+    }
+
+
+def _write_bundle(bundle, directory, path):
+    """번들 파일 기록 (임시 파일 후 원자적 교체), 경로 테이블은 이때 생성되어 메모리의 포레스트에도 연결됨"""
+    payload = {
+        'format': BUNDLE_FORMAT,
+        'created_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'sources': {os.path.basename(p): {'stamp': _stamp(p), 'sha256': file_sha256(p)}
+                    for p in source_files(directory)},
+    }
+    for key, value in bundle.items():
+        if key.endswith("_models"):
+            value = {name: (forest.state(), path_table_state(forest)) for name, forest in value.items()}
+        payload[key] = value
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def build_bundle(directory=model_dir, path=None):
+    """모델 파일에서 번들 생성, 반환: 번들 내용 (load_bundle 과 같은 형태)"""
+    bundle = _assemble(_read_models(directory), directory)
+    _write_bundle(bundle, directory, path or os.path.join(directory, BUNDLE_NAME))
+    return bundle
+
+
+def _is_current(sources, directory):
+    paths = source_files(directory)
+    if sorted(os.path.basename(p) for p in paths) != sorted(sources):
+        return False
+    for p in paths:
+        entry = sources[os.path.basename(p)]
+        # 복사 / 체크아웃으로 수정시각만 바뀐 경우는 내용 해시로 확인
+        if _stamp(p) != entry['stamp'] and file_sha256(p) != entry['sha256']:
+            return False
+    return True
+
+
+def load_bundle(directory=model_dir, path=None):
+    """번들 로드, 없거나 형식이 다르거나 원본 파일이 바뀌었으면 None"""
+    path = path or os.path.join(directory, BUNDLE_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.loads(f.read())
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get('format') != BUNDLE_FORMAT \
+            or not _is_current(payload.get('sources', {}), directory):
+        return None
+    bundle = {}
+    for key, value in payload.items():
+        if key in ('format', 'created_at', 'sources'):
+            continue
+        if key.endswith("_models"):
+            value = {name: restore_path_table(FlatForest.from_state(state), groups)
+                     for name, (state, groups) in value.items()}
+        bundle[key] = value
+    return bundle
+
+
+def _fingerprint(directory):
+    paths = source_files(directory)
+    bundle_path = os.path.join(directory, BUNDLE_NAME)
+    if os.path.exists(bundle_path):
+        paths.append(bundle_path)
+    return tuple((os.path.basename(p), *_stamp(p)) for p in paths)
+
+
+def load_models(directory=model_dir, rebuild=True):
+    """
+    앱 / 역설계용 모델 묶음: 번들이 최신이면 번들에서, 아니면 모델 파일에서 읽음 (rebuild 면 번들도 다시 생성, 쓰기 실패는 무시)
+    같은 프로세스에서는 원본 / 번들 파일의 (크기, 수정시각)이 그대로면 이전 결과를 재사용
+    반환: (묶음, 출처 'bundle' | 'files')
+    """
+    key = os.path.abspath(directory)
+    with _lock:
+        fingerprint = _fingerprint(directory)
+        cached = _loaded.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1], cached[2]
+        bundle, source = load_bundle(directory), 'bundle'
+        if bundle is None:
+            bundle, source = _assemble(_read_models(directory), directory), 'files'
+            if rebuild and model_files(directory):
+                try:
+                    _write_bundle(bundle, directory, os.path.join(directory, BUNDLE_NAME))
+                except OSError:
+                    pass
+        _loaded[key] = (_fingerprint(directory), bundle, source)
+        return bundle, source
+
+
+def forget(directory=model_dir):
+    """load_models 재사용 캐시에서 제거 (교체된 모델 버전의 메모리 해제용)"""
+    with _lock:
+        _loaded.pop(os.path.abspath(directory), None)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the prebuilt model bundle used for fast app start-up")
+    parser.add_argument("--check", action="store_true", help="only report whether the bundle is current")
+    args = parser.parse_args()
+
+    if args.check:
+        current = load_bundle() is not None
+        print(f"{BUNDLE_NAME}: {'current' if current else 'missing or stale'}")
+        raise SystemExit(0 if current else 1)
+    start = time.perf_counter()
+    bundle = build_bundle()
+    size = os.path.getsize(os.path.join(model_dir, BUNDLE_NAME)) / 1e6
+    print(f"Built {BUNDLE_NAME} ({size:.1f} MB): {len(bundle['synthesis_models'])} synthesis / "
+          f"{len(bundle['coating_models'])} coating models in {time.perf_counter() - start:.2f}s")
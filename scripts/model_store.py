@@ -0,0 +1,340 @@
+import datetime
+import json
+import os
+import shutil
+import threading
+import time
+try:
+    from scripts.model_bundle import (BUNDLE_NAME, FEATURE_LISTS, model_dir, source_files, build_bundle,
+                                      load_bundle, load_models, forget)
+    from scripts.feature_vectorizer import read_feature_list
+    from scripts.fingerprint import file_sha256
+    from scripts.instrumentation import count
+except ImportError:
+    from model_bundle import (BUNDLE_NAME, FEATURE_LISTS, model_dir, source_files, build_bundle,
+                              load_bundle, load_models, forget)
+    from feature_vectorizer import read_feature_list
+    from fingerprint import file_sha256
+    from instrumentation import count
+
+# 버전별 모델 저장소 (models/versions/<버전>/) + 현재 버전 포인터 (models/versions/CURRENT)
+# - 학습은 지금처럼 models/ 작업 공간에 기록하고, publish 가 모델 / 피처 목록 / 모델 번들을 새 버전 디렉터리로 복사한 뒤
+#   manifest.json (파일별 크기 / SHA-256, 피처 목록, 학습 지표, 라이브러리 버전)을 기록
+# - 버전 디렉터리는 임시 이름으로 완성한 뒤 rename 으로 공개하고 이후 수정하지 않음, CURRENT 는 임시 파일 + os.replace 로 교체
+#   (읽는 쪽은 쓰다 만 모델 파일이나 서로 다른 시점의 피처 목록을 볼 수 없음)
+# - 장기 실행 프로세스(앱 / 역설계 / inference)는 ActiveModels 로 CURRENT 의 stat 만 주기적으로(기본 2초) 확인하여 새 버전을 감지,
+#   체크섬 확인 후 묶음 전체를 한 번에 바꿔 끼움 (교체 전 묶음을 받은 실행은 그대로 끝남, 다른 스레드가 읽는 동안에는 기다리지 않음)
+# - CURRENT 가 없으면(아직 발행 전) models/ 작업 공간을 그대로 사용, LATEST 는 마지막으로 발행한 버전 (activate 로 되돌려도 유지)
+
+versions_dir = os.path.join(model_dir, "versions")
+report_dir = os.path.join(os.path.dirname(model_dir), "reports")
+
+POINTER = "CURRENT"
+LATEST = "LATEST"
+MANIFEST = "manifest.json"
+CHECK_INTERVAL = 2.0
+METRIC_REPORTS = {'synthesis': "training_metrics.txt", 'coating': "training_metrics_coating.txt"}
+
+
+def version_dir(version, root=versions_dir):
+    return os.path.join(root, version)
+
+
+def list_versions(root=versions_dir):
+    """발행된 버전 목록 (오래된 순)"""
+    if not os.path.exists(root):
+        return []
+    return sorted(v for v in os.listdir(root)
+                  if not v.startswith(".") and os.path.exists(os.path.join(root, v, MANIFEST)))
+
+
+def _read_pointer(root, name):
+    try:
+        with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return version if version and os.path.exists(os.path.join(root, version, MANIFEST)) else None
+
+
+def _write_pointer(root, name, version):
+    path = os.path.join(root, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, path)
+
+
+def current_version(root=versions_dir):
+    """CURRENT 가 가리키는 버전, 없으면 None"""
+    return _read_pointer(root, POINTER)
+
+
+def active_model_dir(root=versions_dir):
+    """현재 버전 디렉터리, 발행 전이면 models/"""
+    version = current_version(root)
+    return version_dir(version, root) if version else model_dir
+
+
+def read_manifest(version, root=versions_dir):
+    with open(os.path.join(root, version, MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _file_records(directory, names):
+    return {name: {'size': os.path.getsize(os.path.join(directory, name)),
+                   'sha256': file_sha256(os.path.join(directory, name))} for name in names}
+
+
+def verify(version, root=versions_dir):
+    """매니페스트 대비 누락 / 변경된 파일 목록 (비어 있으면 정상)"""
+    directory = version_dir(version, root)
+    bad = []
+    for name, record in read_manifest(version, root)['files'].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path) or os.path.getsize(path) != record['size'] \
+                or file_sha256(path) != record['sha256']:
+            bad.append(name)
+    return bad
+
+
+def _read_metrics_table(path):
+    """학습 리포트의 마크다운 표 -> [{열: 값}] (숫자는 float / int 로 변환)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [[c.strip() for c in line.strip().strip("|").split("|")] for line in f if line.startswith("|")]
+    if len(rows) < 2:
+        return []
+    header = rows[0]
+    records = []
+    for row in rows[2:]:
+        record = {}
+        for key, value in zip(header, row):
+            try:
+                record[key] = int(value) if value.lstrip("-").isdigit() else float(value)
+            except ValueError:
+                record[key] = value
+        records.append(record)
+    return records
+
+
+def _package_version(name):
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def _new_version_id(root):
+    base = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    version, n = base, 1
+    while os.path.exists(os.path.join(root, version)):
+        n += 1
+        version = f"{base}-{n}"
+    return version
+
+
+def publish(source=model_dir, root=versions_dir, activate=True, reports=report_dir):
+    """
+    작업 공간(models/)의 모델 / 피처 목록을 새 버전으로 발행, activate 면 CURRENT 도 교체
+    작업 공간 내용이 마지막 발행 버전과 같고 그 버전이 손상되지 않았으면 새로 만들지 않고 그 버전을 사용
+    반환: 버전 이름
+    """
+    names = [os.path.basename(p) for p in source_files(source)]
+    if not any(n.startswith("model_rf_") for n in names):
+        raise FileNotFoundError(f"no model files in {source}")
+    records = _file_records(source, names)
+    latest = _read_pointer(root, LATEST)
+    if latest is not None:
+        previous = read_manifest(latest, root)['files']
+        if all(previous.get(n) == r for n, r in records.items()) \
+                and sorted(n for n in previous if n != BUNDLE_NAME) == sorted(records) and not verify(latest, root):
+            if activate and current_version(root) != latest:
+                _write_pointer(root, POINTER, latest)
+            return latest
+
+    os.makedirs(root, exist_ok=True)
+    version = _new_version_id(root)
+    staging = os.path.join(root, f".staging-{version}-{os.getpid()}")
+    try:
+        os.makedirs(staging)
+        for name in names:
+            shutil.copy2(os.path.join(source, name), os.path.join(staging, name))
+        # 작업 공간 번들이 최신이면 복사 (수정시각까지 보존되므로 번들의 원본 기록과 일치), 아니면 새로 생성
+        if load_bundle(source) is not None:
+            shutil.copy2(os.path.join(source, BUNDLE_NAME), os.path.join(staging, BUNDLE_NAME))
+        else:
+            build_bundle(staging)
+        # 복사 중 작업 공간이 바뀌었으면 복사본 체크섬이 발행 시작 시점과 달라짐
+        copied = _file_records(staging, names)
+        if copied != records:
+            raise RuntimeError(f"model files changed while publishing: "
+                               f"{[n for n in names if copied[n] != records[n]]}")
+        manifest = {
+            'version': version,
+            'created_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'files': _file_records(staging, names + [BUNDLE_NAME]),
+            'features': {kind: read_feature_list(filename, staging) for kind, filename in FEATURE_LISTS.items()},
+            'metrics': {kind: _read_metrics_table(os.path.join(reports, filename))
+                        for kind, filename in METRIC_REPORTS.items()},
+            'packages': {p: _package_version(p) for p in ("scikit-learn", "numpy")},
+        }
+        with open(os.path.join(staging, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.rename(staging, version_dir(version, root))
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging, ignore_errors=True)
+    _write_pointer(root, LATEST, version)
+    if activate:
+        _write_pointer(root, POINTER, version)
+    return version
+
+
+def activate(version, root=versions_dir):
+    """CURRENT 를 지정 버전으로 교체 (롤백 포함), 체크섬이 맞지 않으면 ValueError"""
+    if not os.path.exists(os.path.join(root, version, MANIFEST)):
+        raise FileNotFoundError(f"unknown model version: {version}")
+    bad = verify(version, root)
+    if bad:
+        raise ValueError(f"{version}: files missing or modified: {bad}")
+    _write_pointer(root, POINTER, version)
+
+
+def prune(keep=3, root=versions_dir):
+    """최근 keep 개와 CURRENT / LATEST 버전만 남기고 삭제, 반환: 삭제한 버전 목록"""
+    versions = list_versions(root)
+    protected = set(versions[-keep:]) if keep > 0 else set()
+    protected |= {current_version(root), _read_pointer(root, LATEST)}
+    removed = [v for v in versions if v not in protected]
+    for v in removed:
+        shutil.rmtree(version_dir(v, root), ignore_errors=True)
+    return removed
+
+
+def _pointer_stamp(root):
+    try:
+        stat = os.stat(os.path.join(root, POINTER))
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class ActiveModels:
+    """
+    현재 버전 모델 묶음 (model_bundle.load_models 와 같은 형태)
+    get() 은 check_interval 초마다 CURRENT 의 stat 만 확인하고, 바뀌었으면 새 버전을 읽어 교체
+    다른 스레드가 새 버전을 읽는 중이면 기다리지 않고 기존 묶음을 반환
+    """
+
+    def __init__(self, root=versions_dir, fallback_dir=model_dir, check_interval=CHECK_INTERVAL):
+        self.root = root
+        self.fallback_dir = fallback_dir
+        self.check_interval = check_interval
+        self.current = None
+        self.pointer = None
+        self.checked = 0.0
+        self.error = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        """반환: (버전 | None(작업 공간), 묶음)"""
+        current = self.current
+        if current is not None and time.monotonic() - self.checked < self.check_interval:
+            return current
+        if current is None:
+            with self.lock:
+                if self.current is None:
+                    self._refresh()
+            return self.current
+        if self.lock.acquire(blocking=False):
+            try:
+                self._refresh()
+            finally:
+                self.lock.release()
+        return self.current
+
+    def _refresh(self):
+        self.checked = time.monotonic()
+        stamp = _pointer_stamp(self.root)
+        if self.current is not None and stamp == self.pointer:
+            return
+        self.pointer = stamp
+        version = current_version(self.root)
+        if self.current is not None and version == self.current[0]:
+            return
+        try:
+            if version is None:
+                bundle, _ = load_models(self.fallback_dir)
+            else:
+                bad = verify(version, self.root)
+                if bad:
+                    raise ValueError(f"{version}: files missing or modified: {bad}")
+                bundle, _ = load_models(version_dir(version, self.root), rebuild=False)
+        except (OSError, ValueError) as e:
+            # 교체 실패 시 기존 묶음 유지 (같은 포인터로는 다시 시도하지 않음), 첫 로드 실패면 작업 공간 사용
+            self.error = f"{type(e).__name__}: {e}"
+            count("model_swap_errors")
+            if self.current is None:
+                self.current = (None, load_models(self.fallback_dir)[0])
+            return
+        previous, self.current, self.error = self.current, (version, bundle), None
+        if previous is not None:
+            count("model_swaps")
+            # 이전 버전 묶음은 참조하는 실행이 끝나면 해제되도록 load_models 의 재사용 캐시에서 제거
+            forget(version_dir(previous[0], self.root) if previous[0] else self.fallback_dir)
+
+
+_active = ActiveModels()
+
+
+def active_models():
+    """프로세스 공용 현재 버전 모델 묶음, 반환: (버전 | None, 묶음)"""
+    return _active.get()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Versioned model store: publish / list / activate / verify / prune")
+    sub = parser.add_subparsers(dest="command")
+    publish_parser = sub.add_parser("publish", help="publish models/ as a new version")
+    publish_parser.add_argument("--no-activate", action="store_true", help="publish without switching CURRENT")
+    sub.add_parser("list", help="list published versions")
+    activate_parser = sub.add_parser("activate", help="point CURRENT at a version (rollback)")
+    activate_parser.add_argument("version")
+    verify_parser = sub.add_parser("verify", help="check a version against its manifest checksums")
+    verify_parser.add_argument("version", nargs="?")
+    prune_parser = sub.add_parser("prune", help="delete old versions")
+    prune_parser.add_argument("--keep", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        start = time.perf_counter()
+        version = publish(activate=not args.no_activate)
+        print(f"Published {version} ({time.perf_counter() - start:.2f}s), current: {current_version()}")
+    elif args.command == "activate":
+        activate(args.version)
+        print(f"Current version: {args.version}")
+    elif args.command == "verify":
+        version = args.version or current_version()
+        if version is None:
+            raise SystemExit("No published version")
+        bad = verify(version)
+        print(f"{version}: {'ok' if not bad else 'MISMATCH ' + ', '.join(bad)}")
+        raise SystemExit(1 if bad else 0)
+    elif args.command == "prune":
+        removed = prune(args.keep)
+        print(f"Removed {len(removed)} versions: {', '.join(removed) or '-'}")
+    else:
+        current, latest = current_version(), _read_pointer(versions_dir, LATEST)
+        print("| Version | Created | Models | Synthesis R2 (test) | Status |")
+        print("| --- | --- | --- | --- | --- |")
+        for v in list_versions():
+            m = read_manifest(v)
+            n_models = sum(1 for n in m['files'] if n.startswith("model_rf_"))
+            r2 = ", ".join(f"{r.get('Target')} {r.get('Test R2')}" for r in m['metrics'].get('synthesis', []))
+            status = " / ".join(s for s, hit in (("current", v == current), ("latest", v == latest)) if hit)
+            print(f"| {v} | {m['created_at']} | {n_models} | {r2 or '-'} | {status or '-'} |")
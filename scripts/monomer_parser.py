@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import re
+from functools import lru_cache
+
+# 모노머 배합 문자열 파서 (예: "BA 89.7 / MMA 9 / AA 1.3")
+# - 정규식은 모듈 로드 시 1회 컴파일, 문자열 단위 파싱 결과는 메모이즈
+# - 배치 입력은 pd.factorize 로 중복 문자열을 제거한 뒤 고유 문자열만 파싱하고,
+#   고유 행 행렬을 코드 인덱스로 펼쳐 (행 x 모노머) 밀집 행렬로 바로 출력
+# - format_recipe: phr 값 -> 배합 문자열 역변환
+
+# 하이픈(-), 점(.)을 포함한 화학명과 괄호 안(또는 뒤)의 함량 숫자 쌍
+MONOMER_PATTERN = re.compile(r'([a-zA-Z가-힣0-9\-\.]+)\s*\(?([\d.]+)\)?')
+
+# 분자량 조절제, 개시제 등은 주 모노머로 오인하지 않도록 제외
+# (역설계 최적화에서 20 phr씩 넣는 것을 막기 위해 monomer_ 접두어를 붙이지 않음)
+KNOWN_ADDITIVES = frozenset(["NDM", "AIBN", "V-65", "LPO"])
+
+PREFIX = "monomer_"
+
+
+@lru_cache(maxsize=65536)
+def parse_recipe(text):
+    """
+    단일 배합 문자열 -> ((피처명, phr), ...) (같은 이름이 반복되면 마지막 값 사용)
+    결과는 문자열 단위로 캐시되므로 반환값은 불변 튜플
+    """
+    features = {}
+    for name, val in MONOMER_PATTERN.findall(text):
+        clean_name = name.strip('-').strip('.')
+        # 순수 숫자("1", "100"), 1글자 이하("-", "."), 첨가제는 무시
+        if clean_name.isdigit() or len(clean_name) < 2 or clean_name.upper() in KNOWN_ADDITIVES:
+            continue
+        try:
+            features[PREFIX + clean_name] = float(val)
+        except ValueError:
+            continue
+    return tuple(features.items())
+
+
+def _is_blank(text):
+    return not isinstance(text, str) or text.strip() == ""
+
+
+class MonomerParser:
+    """
+    columns: 출력 열 순서로 고정할 모노머 피처 목록 (예: 학습 피처 목록의 monomer_ 열)
+             None 이면 입력에서 처음 등장한 순서대로 열을 구성
+    strict: columns 에 없는 모노머가 나오면 KeyError (False 면 해당 성분 무시)
+    """
+
+    def __init__(self, columns=None, strict=True):
+        self.columns = list(columns) if columns is not None else None
+        self.strict = strict
+
+    def parse_one(self, text):
+        if _is_blank(text):
+            return {}
+        return dict(parse_recipe(text))
+
+    def parse(self, texts):
+        """
+        texts: 배합 문자열 시퀀스 (결측/빈 문자열은 0 행)
+        반환: (phr 행렬 (n, n_columns) float64, 열 목록)
+        """
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=True)
+        parsed = [() if _is_blank(t) else parse_recipe(t) for t in uniques]
+
+        if self.columns is None:
+            columns = list(dict.fromkeys(name for pairs in parsed for name, _ in pairs))
+        else:
+            columns = self.columns
+        index = {c: j for j, c in enumerate(columns)}
+
+        # 고유 문자열별 행 + 결측용 0 행(마지막)을 만든 뒤 코드로 펼침
+        unique_matrix = np.zeros((len(parsed) + 1, len(columns)), dtype=np.float64)
+        unknown = set()
+        for i, pairs in enumerate(parsed):
+            for name, val in pairs:
+                j = index.get(name)
+                if j is None:
+                    unknown.add(name)
+                else:
+                    unique_matrix[i, j] = val
+        if unknown and self.strict:
+            raise KeyError(f"학습 피처 목록에 없는 모노머: {sorted(unknown)}")
+        return unique_matrix[codes], columns
+
+    def parse_frame(self, texts):
+        """parse 결과를 DataFrame 으로 반환 (입력이 Series 면 인덱스 유지)"""
+        matrix, columns = self.parse(texts)
+        index = texts.index if isinstance(texts, pd.Series) else None
+        return pd.DataFrame(matrix, columns=columns, index=index)
+
+
+def format_recipe(phr, decimals=2):
+    """
+    phr: {'monomer_BA': 89.7, ...} 또는 {'BA': 89.7, ...}
+    반환: "BA 89.7 / MMA 9 / AA 1.3" (0 이하 성분 제외, 입력 순서 유지)
+    """
+    parts = []
+    for name, val in phr.items():
+        val = round(float(val), decimals)
+        if val <= 0:
+            continue
+        name = name[len(PREFIX):] if name.startswith(PREFIX) else name
+        parts.append(f"{name} {np.format_float_positional(val, trim='-')}")
+    return " / ".join(parts)
@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+try:
+    from scripts.model_store import active_models
+    from scripts.instrumentation import span, count
+except ImportError:
+    from model_store import active_models
+    from instrumentation import span, count
+
+# 도포 조건 역설계: 목표 점착력을 위한 도포량 + 경화제(hardener_*) / 첨가제(additive_*) 함량 탐색
+# - 허용된 모든 원단(fabric_*)을 한 번에 탐색: 원단별 개체군을 (원단, 개체, 변수) 배열로 두고 세대마다 전체 후보를
+#   하나의 입력 행렬로 구성하여 포레스트 예측 1회로 평가 (원단별로 최적화를 따로 돌리지 않음)
+# - 희소 구조 활용: 포레스트가 한 번도 분기하지 않는 원단 열은 예측에 영향이 없으므로 그런 원단들은 하나의 개체군을 공유하고,
+#   분기에 쓰이지 않는 경화제 / 첨가제는 탐색 변수에서 제외, 입력 행렬은 탐색 변수 열과 원단 열만 채움
+# - 변수 상한은 해당 피처의 최대 분기 임계값 근처로 제한 (그보다 큰 값은 예측이 같음), 사용 성분 수 / 총 함량 제약
+# - 결과: 원단별 상위 후보 순위표 + 원단 요약표 (세대마다 예측값이 서로 다른 우수 후보를 보관하고, 최종 후보는 표시 자릿수로
+#   반올림한 뒤 다시 예측하여 순위 결정)
+
+WEIGHT_FEATURE = "도포량_num"
+COMPONENT_PREFIXES = ("hardener_", "additive_")
+COMPONENT_LABELS = {"hardener_": "경화제", "additive_": "첨가제"}
+DECIMALS = 2
+ARCHIVE_FACTOR = 4
+
+
+def component_name(feature):
+    for prefix in COMPONENT_PREFIXES:
+        if feature.startswith(prefix):
+            return feature[len(prefix):]
+    return feature
+
+
+def _split_thresholds(forest, column):
+    mask = (forest.feature == column) & ~forest.is_leaf
+    return forest.threshold[mask]
+
+
+def fabric_classes(forest, features, fabrics):
+    """
+    허용 원단을 예측이 같은 묶음으로 분류
+    반환: [(원단 열 인덱스 | None, [원단명])] - None 묶음은 포레스트가 분기하지 않는 원단 (원-핫 열이 예측에 무관)
+    """
+    used = set(np.unique(forest.feature[~forest.is_leaf]).tolist())
+    index = {name: i for i, name in enumerate(features)}
+    classes, unused = [], []
+    for fabric in fabrics:
+        column = index[f"fabric_{fabric}"]
+        if column in used:
+            classes.append((column, [fabric]))
+        else:
+            unused.append(fabric)
+    if unused:
+        classes.append((None, unused))
+    return classes
+
+
+def _recipe_text(recipe):
+    parts = [f"{component_name(f)} {v:.{DECIMALS}f}" for f, v in recipe.items() if f != WEIGHT_FEATURE and v > 0]
+    return " / ".join(parts) if parts else "(없음)"
+
+
+def optimize_coating(target, fabrics=None, components=None, weight_range=(1.0, 10.0), max_components=3,
+                     max_total=20.0, uncertainty_weight=0.0, initial=None, top_k=5, popsize=30, maxiter=80,
+                     tol=0.01, atol=1e-6, seed=42):
+    """
+    target: 목표 점착력 (gf/25mm)
+    fabrics: 허용 원단명 목록 (fabric_ 접두어 제외, None 이면 전체)
+    components: 탐색할 경화제 / 첨가제 피처 목록 (None 이면 전체), 포레스트가 분기하지 않는 성분은 제외됨
+    weight_range: 도포량 탐색 범위, max_components: 후보당 사용 성분 수 상한, max_total: 경화제 + 첨가제 합계 상한 (%)
+    uncertainty_weight: 트리 간 예측 표준편차 페널티 계수
+    initial: 초기 개체군에 넣을 현재 조건 {피처명: 값} (도포 시뮬레이터 입력)
+    반환: (결과, 오류 메시지)
+      결과 = {'summary': 원단 요약 DataFrame, 'tables': {원단: 순위 DataFrame}, 'recipes': {원단: [{피처명: 값}]},
+              'components': 탐색 성분, 'ignored': 예측에 무관하여 제외된 성분, 'classes': 개체군 수,
+              'generations': 세대 수, 'evaluations': 평가 후보 수}
+    """
+    _, bundle = active_models()
+    forest = bundle['coating_models'].get('점착력')
+    features = bundle['coating_features']
+    if forest is None or not features:
+        return None, "도포 모델을 불러올 수 없습니다."
+    index = {name: i for i, name in enumerate(features)}
+
+    all_fabrics = [f[len("fabric_"):] for f in features if f.startswith("fabric_")]
+    fabrics = list(fabrics) if fabrics else all_fabrics
+    unknown = [f for f in fabrics if f"fabric_{f}" not in index]
+    if unknown:
+        return None, f"알 수 없는 원단: {', '.join(unknown)}"
+
+    # 탐색 변수: 도포량 + 분기에 쓰이는 성분 (상한은 최대 임계값 근처까지만)
+    candidates = components if components is not None else [f for f in features if f.startswith(COMPONENT_PREFIXES)]
+    search, ignored, upper, floor = [], [], [], []
+    for feat in candidates:
+        thresholds = _split_thresholds(forest, index[feat])
+        if len(thresholds) == 0:
+            ignored.append(feat)
+            continue
+        search.append(feat)
+        upper.append(min(max_total, float(thresholds.max()) * 1.1 + 0.01))
+        floor.append(float(thresholds.min()))
+    floor = np.array(floor)
+    lower = np.array([weight_range[0]] + [0.0] * len(search))
+    upper = np.array([weight_range[1]] + upper)
+    columns = np.array([index[WEIGHT_FEATURE]] + [index[f] for f in search])
+    n_dims = len(columns)
+    k = max(int(max_components), 0)
+
+    classes = fabric_classes(forest, features, fabrics)
+    class_columns = np.array([c if c is not None else -1 for c, _ in classes])
+    n_classes = len(classes)
+    scale = abs(target) + 1e-6
+    rng = np.random.default_rng(seed)
+
+    def repair(pop):
+        # 최소 임계값 이하 함량은 모든 분기에서 0 과 같은 방향이므로 0 으로 (예측 불변, 불필요한 성분 제거)
+        # 성분 수 제약: 함량이 큰 순서로 k 개만 남김, 탐색 범위 밖은 경계로
+        pop = np.clip(pop, lower, upper)
+        comp = pop[..., 1:]
+        comp[comp <= floor] = 0.0
+        if comp.shape[-1] > k:
+            if k == 0:
+                comp[...] = 0.0
+            else:
+                kth = -np.partition(-comp, k - 1, axis=-1)[..., k - 1:k]
+                comp[comp < kth] = 0.0
+        return pop
+
+    def evaluate(pop):
+        # (원단 묶음, 개체, 변수) -> 하나의 입력 행렬 -> 포레스트 1회 예측
+        rows = pop.reshape(-1, n_dims)
+        X = np.zeros((rows.shape[0], len(features)), dtype=np.float32)
+        X[:, columns] = rows
+        fabric_col = np.repeat(class_columns, pop.shape[1])
+        has_fabric = fabric_col >= 0
+        X[np.flatnonzero(has_fabric), fabric_col[has_fabric]] = 1.0
+        per_tree = forest.predict_trees(X)
+        mean, std = per_tree.mean(axis=1), per_tree.std(axis=1)
+        loss = ((mean - target) / scale) ** 2
+        if uncertainty_weight > 0:
+            loss += uncertainty_weight * (std / scale) ** 2
+        excess = np.maximum(rows[:, 1:].sum(axis=1) - max_total, 0.0)
+        loss += (excess / max(max_total, 1e-6)) ** 2 * 100.0
+        shape = pop.shape[:2]
+        return loss.reshape(shape), mean.reshape(shape), std.reshape(shape), per_tree.reshape(*shape, -1)
+
+    # 초기 개체군: 균일 난수 + (있으면) 현재 도포 조건 + 성분 없는 기준 조건
+    pop = lower + rng.random((n_classes, popsize, n_dims)) * (upper - lower)
+    seeds = [np.concatenate([[np.mean(weight_range)], np.zeros(n_dims - 1)])]
+    if initial:
+        seeds.append(np.array([initial.get(WEIGHT_FEATURE, np.mean(weight_range))]
+                              + [initial.get(f, 0.0) for f in search], dtype=np.float64))
+    for i, s in enumerate(seeds[:popsize]):
+        pop[:, i] = s
+    pop = repair(pop)
+
+    archive_size = max(top_k * ARCHIVE_FACTOR, 1)
+
+    def update_archive(archive, candidates, loss, mean, std):
+        # 원단 묶음별로 예측(평균, 표준편차)이 서로 다른 후보 중 손실이 낮은 archive_size 개 보관
+        merged = np.concatenate([archive[0], candidates], axis=1)
+        merged_loss = np.concatenate([archive[1], loss], axis=1)
+        merged_key = np.concatenate([archive[2], np.round(mean, 4) + 1j * np.round(std, 4)], axis=1)
+        keep_pop = np.empty((n_classes, archive_size, n_dims))
+        keep_loss = np.full((n_classes, archive_size), np.inf)
+        keep_key = np.full((n_classes, archive_size), np.nan, dtype=complex)
+        for c in range(n_classes):
+            order = np.argsort(merged_loss[c], kind="stable")
+            _, first = np.unique(merged_key[c, order], return_index=True)
+            chosen = order[np.sort(first)][:archive_size]
+            n = len(chosen)
+            keep_pop[c, :n], keep_loss[c, :n], keep_key[c, :n] = merged[c, chosen], merged_loss[c, chosen], \
+                merged_key[c, chosen]
+            keep_pop[c, n:] = merged[c, chosen[0]]
+        return keep_pop, keep_loss, keep_key
+
+    with span("coating_optimize", classes=n_classes):
+        fit, mean, std, _ = evaluate(pop)
+        archive = update_archive((np.empty((n_classes, 0, n_dims)), np.empty((n_classes, 0)),
+                                  np.empty((n_classes, 0), dtype=complex)), pop, fit, mean, std)
+        evaluations = pop.shape[0] * pop.shape[1]
+        classes_idx = np.arange(n_classes)[:, None]
+        generation = 0
+        for generation in range(1, maxiter + 1):
+            # DE best1bin (원단 묶음마다 독립, 연산은 전체 배열에서 한 번에)
+            best = pop[np.arange(n_classes), fit.argmin(axis=1)]
+            r1 = rng.integers(0, popsize, (n_classes, popsize))
+            r2 = (r1 + rng.integers(1, popsize, (n_classes, popsize))) % popsize
+            mutation = rng.uniform(0.5, 1.0, (n_classes, 1, 1))
+            mutant = best[:, None, :] + mutation * (pop[classes_idx, r1] - pop[classes_idx, r2])
+            cross = rng.random((n_classes, popsize, n_dims)) < 0.7
+            cross[classes_idx, np.arange(popsize)[None, :], rng.integers(0, n_dims, (n_classes, popsize))] = True
+            trial = repair(np.where(cross, mutant, pop))
+            trial_fit, mean, std, _ = evaluate(trial)
+            archive = update_archive(archive, trial, trial_fit, mean, std)
+            evaluations += trial.shape[0] * trial.shape[1]
+            improved = trial_fit <= fit
+            pop[improved] = trial[improved]
+            fit[improved] = trial_fit[improved]
+            if np.all(fit.std(axis=1) <= tol * np.abs(fit.mean(axis=1)) + atol):
+                break
+
+        # 보관 후보 + 최종 개체군을 표시 자릿수로 반올림한 뒤 다시 예측하여 순위 결정 (반올림으로 임계값을 넘는 경우 반영)
+        final = repair(np.round(np.concatenate([archive[0], pop], axis=1), DECIMALS))
+        loss, mean, std, per_tree = evaluate(final)
+        low, high = np.quantile(per_tree, (0.05, 0.95), axis=2)
+    count("coating_optimize_runs")
+    count("coating_optimize_evaluations", evaluations)
+
+    # 순위: 손실 -> 사용 성분 수 -> 총 함량, 트리별 예측이 같은(모델상 동일한) 후보는 가장 단순한 것만 남김
+    n_used = (final[..., 1:] > 0).sum(axis=2)
+    total = final[..., 1:].sum(axis=2)
+    tables, recipes, summary = {}, {}, []
+    for c, (column, members) in enumerate(classes):
+        rows, class_recipes, seen = [], [], set()
+        for i in np.lexsort((total[c], n_used[c], np.round(loss[c], 9))):
+            key = per_tree[c, i].round(6).tobytes()
+            if key in seen:
+                continue
+            seen.add(key)
+            recipe = {WEIGHT_FEATURE: float(final[c, i, 0])}
+            recipe.update({f: float(v) for f, v in zip(search, final[c, i, 1:]) if v > 0})
+            class_recipes.append(recipe)
+            rows.append({'순위': len(rows) + 1, '도포량': recipe[WEIGHT_FEATURE], '배합 (%)': _recipe_text(recipe),
+                         '예상 점착력': float(mean[c, i]), '하한 (5%)': float(low[c, i]),
+                         '상한 (95%)': float(high[c, i]), 'σ': float(std[c, i]), '손실': float(loss[c, i])})
+            if len(rows) >= top_k:
+                break
+        table = pd.DataFrame(rows).set_index('순위')
+        for fabric in members:
+            tables[fabric] = table
+            recipes[fabric] = class_recipes
+            summary.append({'원단': fabric, '원단 반영': column is not None, '도포량': rows[0]['도포량'],
+                            '배합 (%)': rows[0]['배합 (%)'], '예상 점착력': rows[0]['예상 점착력'],
+                            'σ': rows[0]['σ'], '손실': rows[0]['손실']})
+    summary = pd.DataFrame(summary).sort_values(['손실', '원단 반영'], ascending=[True, False], kind="stable")
+    summary = summary.reset_index(drop=True)
+    summary.index = summary.index + 1
+    return {
+        'summary': summary,
+        'tables': tables,
+        'recipes': recipes,
+        'components': search,
+        'ignored': ignored,
+        'classes': n_classes,
+        'generations': generation,
+        'evaluations': evaluations,
+    }, None
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Adhesion-target coating optimizer over all fabrics")
+    parser.add_argument("--target", type=float, default=800.0, help="target adhesion (gf/25mm)")
+    parser.add_argument("--fabrics", nargs="*", help="allowed fabrics (default: all)")
+    parser.add_argument("--max-components", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="fabrics to print")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result, err = optimize_coating(args.target, fabrics=args.fabrics, max_components=args.max_components)
+    if err:
+        raise SystemExit(err)
+    print(f"{len(result['tables'])} fabrics in {result['classes']} populations, {result['generations']} generations, "
+          f"{result['evaluations']:,} candidates in {time.perf_counter() - start:.2f}s")
+    print(f"Ignored components (no effect on the model): {', '.join(map(component_name, result['ignored'])) or '-'}")
+    print(result['summary'].head(args.top).to_string())
+    best_fabric = result['summary'].iloc[0]['원단']
+    print(f"\n[{best_fabric}]")
+    print(result['tables'][best_fabric].to_string())
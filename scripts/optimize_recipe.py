@@ -1,55 +1,101 @@
 import numpy as np
-import pandas as pd
 from scipy.optimize import differential_evolution
 import joblib
 import os
 try:
-    from scripts.chemical_db import get_chemical_features
+    from scripts.feature_vectorizer import SynthesisVectorizer
+    from scripts.model_store import active_models, active_model_dir
+    from scripts.instrumentation import span, count, profiled
 except ImportError:
-    from chemical_db import get_chemical_features
+    from feature_vectorizer import SynthesisVectorizer
+    from model_store import active_models, active_model_dir
+    from instrumentation import span, count, profiled
 
 # 경로 설정
 current_dir = os.path.dirname(os.path.abspath(__file__))
 base_dir = os.path.dirname(current_dir)
 model_dir = os.path.join(base_dir, "models")
 
-def load_property_model(target="Tg"):
+def model_name(target):
     # 타겟 명칭 정제 (파일명 규칙에 맞게)
-    name = target.replace('%', 'pct').replace('(', '').replace(')', '').replace(' ', '')
-    model_path = os.path.join(model_dir, f"model_rf_{name}.joblib")
+    return target.replace('%', 'pct').replace('(', '').replace(')', '').replace(' ', '')
+
+def load_property_model(target="Tg"):
+    model_path = os.path.join(active_model_dir(), f"model_rf_{model_name(target)}.joblib")
     if os.path.exists(model_path):
         return joblib.load(model_path)
     return None
 
+def load_property_forest(target="Tg", bundle=None):
+    """평탄화 포레스트 (현재 버전 모델 번들에서 읽으므로 모델 파일 역직렬화 / 평탄화 불필요), 없으면 None"""
+    if bundle is None:
+        _, bundle = active_models()
+    return bundle['synthesis_models'].get(model_name(target))
+
 def load_feature_list():
-    path = os.path.join(model_dir, "feature_list.txt")
+    path = os.path.join(active_model_dir(), "feature_list.txt")
     if os.path.exists(path):
         with open(path, "r", encoding="utf-8-sig") as f:
             return [line.strip() for line in f.readlines()]
     return []
 
-def optimize_recipe(targets_dict, fixed_params=None, constraints=None):
+def coarse_search_population(targets_dict, fixed_params, target_monomers, pop_count, seed=42):
+    """
+    사전 계산된 응답 곡면 격자에서 목표 손실이 낮은 격자점으로 초기 집단 구성 (Coarse Search)
+    격자가 없거나 현재 모델/공정 조건과 맞지 않으면 기본 초기화('latinhypercube') 사용
+    """
+    try:
+        from scripts.response_grid import load_response_grid
+    except ImportError:
+        from response_grid import load_response_grid
+
+    grid = load_response_grid()
+    params = fixed_params or {}
+    if (grid is None or not grid.supports(params) or sorted(target_monomers) != sorted(grid.meta['monomers'])
+            or any(t not in grid.targets for t in targets_dict)):
+        return 'latinhypercube'
+
+    phr_nodes, values = grid.nodes(params.get('온도', 80))
+    loss = np.zeros(len(phr_nodes))
+    for target_name, config in targets_dict.items():
+        target_val = config['target']
+        loss += config.get('weight', 1.0) * ((values[target_name] - target_val) / (abs(target_val) + 1e-6))**2
+
+    # 절반은 격자 상위 후보, 절반은 균일 난수로 채워 집단 다양성 유지
+    order = [grid.meta['monomers'].index(m) for m in target_monomers]
+    n_best = pop_count // 2
+    best = phr_nodes[np.argsort(loss)[:n_best]][:, order]
+    rng = np.random.default_rng(seed)
+    rest = rng.uniform(0, 100, size=(pop_count - len(best), len(target_monomers)))
+    return np.vstack([best, rest])
+
+def optimize_recipe(targets_dict, fixed_params=None, constraints=None, uncertainty_weight=0.0):
     """
     [Rollback Version]
     targets_dict: {'Tg': {'target': -30, 'weight': 1.0}, ...}
     fixed_params: {'온도': 80, ...}
     constraints: (UI 호환성을 위해 유지되나 알고리즘에는 미반영됨)
+    uncertainty_weight: 트리 간 예측 표준편차에 대한 페널티 계수 (0이면 기존 손실과 동일)
     """
     if not targets_dict:
         return None, "최소 하나 이상의 목표 물성을 설정해야 합니다."
 
-    features = load_feature_list()
+    # 피처 목록과 모델은 같은 버전 묶음에서 가져옴 (실행 도중 새 버전으로 교체되어도 섞이지 않음)
+    _, bundle = active_models()
+    features = bundle['synthesis_features']
     if not features:
         return None, "피처 목록을 불러올 수 없습니다."
 
     # 모델들을 미리 로드
+    # 트리별 예측을 한 번에 얻기 위해 평탄화된 포레스트로 변환
     models = {}
-    for target_name in targets_dict:
-        model = load_property_model(target_name)
-        if model:
-            models[target_name] = model
-        else:
-            return None, f"'{target_name}' 모델을 불러올 수 없습니다."
+    with span("optimize_load_models"):
+        for target_name in targets_dict:
+            forest = load_property_forest(target_name, bundle)
+            if forest is not None:
+                models[target_name] = forest
+            else:
+                return None, f"'{target_name}' 모델을 불러올 수 없습니다."
 
     # 최적화 대상 모노머 (기존 하드코딩된 4종으로 롤백)
     monomer_cols = [f for f in features if f.startswith("monomer_")]
@@ -57,34 +103,35 @@ def optimize_recipe(targets_dict, fixed_params=None, constraints=None):
     target_monomers = [m for m in target_monomers if m in monomer_cols]
     
     bounds = [(0, 100) for _ in target_monomers]
+
+    # 공정 조건은 고정이므로 기준 행을 한 번만 만들고, 평가마다 모노머 열과 화학 피처만 갱신
+    fixed_params = fixed_params or {}
+    vectorizer = SynthesisVectorizer(features)
+    input_matrix = vectorizer.transform({
+        '온도': fixed_params.get('온도', 80),
+        '반응시간': fixed_params.get('반응시간', 4.5),
+        '이론 고형분(%)': fixed_params.get('이론 고형분(%)', 0.48),
+        'Scale': fixed_params.get('Scale', 500)
+    })
+    target_idx = vectorizer.columns(target_monomers)
     
     def objective(x):
-        monomer_inputs = {m: 0.0 for m in monomer_cols}
-        for i, m_name in enumerate(target_monomers):
-            monomer_inputs[m_name] = x[i]
-        
-        chem_f = get_chemical_features(monomer_inputs)
-        
-        input_dict = {
-            '온도': fixed_params.get('온도', 80),
-            '반응시간': fixed_params.get('반응시간', 4.5),
-            '이론 고형분(%)': fixed_params.get('이론 고형분(%)', 0.48),
-            'Scale': fixed_params.get('Scale', 500)
-        }
-        input_dict.update(monomer_inputs)
-        input_dict.update(chem_f)
-        
-        input_df = pd.DataFrame([input_dict])
-        input_df = input_df[features]
+        input_matrix[0, target_idx] = x
+        vectorizer.fill_chemical_features(input_matrix)
         
-        # 통합 손실 함수 계산 (가중치 적용 제곱 오차)
+        # 통합 손실 함수 계산 (가중치 적용 제곱 오차 + 선택적 불확실성 페널티)
+        # 평균과 표준편차 모두 같은 트리별 예측에서 계산되므로 추가 모델 연산은 없음
         total_loss = 0.0
         for target_name, config in targets_dict.items():
-            pred = models[target_name].predict(input_df)[0]
+            per_tree = models[target_name].predict_trees(input_matrix)[0]
+            pred = per_tree.mean()
             target_val = config['target']
             weight = config.get('weight', 1.0)
+            scale = abs(target_val) + 1e-6
             
-            total_loss += weight * ((pred - target_val) / (abs(target_val) + 1e-6))**2
+            total_loss += weight * ((pred - target_val) / scale)**2
+            if uncertainty_weight > 0:
+                total_loss += uncertainty_weight * weight * (per_tree.std() / scale)**2
         
         # PHR 합계 페널티
         total_phr = np.sum(x)
@@ -92,9 +139,16 @@ def optimize_recipe(targets_dict, fixed_params=None, constraints=None):
         
         return total_loss + penalty
 
-    res = differential_evolution(objective, bounds, strategy='best1bin', 
-                                  maxiter=100, popsize=20, tol=0.01, mutation=(0.5, 1), 
-                                  recombination=0.7, seed=42)
+    popsize = 20
+    with span("optimize_coarse_search"):
+        init = coarse_search_population(targets_dict, fixed_params, target_monomers, popsize * len(target_monomers))
+    # DE 루프 계측 (SIM_PROFILE 표본에 걸린 실행은 cProfile 결과를 logs/profiles/ 에 저장)
+    with span("optimize_de", targets=len(targets_dict)), profiled("optimize_recipe"):
+        res = differential_evolution(objective, bounds, strategy='best1bin', 
+                                      maxiter=100, popsize=popsize, tol=0.01, mutation=(0.5, 1), 
+                                      recombination=0.7, seed=42, init=init)
+    count("optimize_runs", targets=len(targets_dict))
+    count("optimize_objective_evaluations", res.nfev)
     
     if res.success or res.fun < 10.0:
         optimized_phr = {}
@@ -0,0 +1,589 @@
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import redirect_stdout, redirect_stderr
+try:
+    from scripts.fingerprint import file_sha256
+    from scripts import instrumentation
+except ImportError:
+    from fingerprint import file_sha256
+    import instrumentation
+
+# 데이터 정제 -> 피처 생성 -> 모델 학습 파이프라인 실행기 (단계별 결과 캐시)
+# - 단계 키 = 입력 파일 해시 + 단계 코드 해시 + 파라미터 (+ 파이프라인 버전)
+# - 키가 같고 출력 파일이 그대로면 해당 단계는 건너뜀
+# - 파일 해시는 매니페스트에 (크기, 수정시각)과 함께 기록하여, 변경이 없으면 파일을 다시 읽지 않음
+# - 행 단위 단계(원시 데이터 정제)는 원시 파일에 새로 추가된 행만 처리 (엑셀 원본은 워터마크 이후 행)
+# - 매니페스트: data_cleaned/pipeline_manifest.json (데이터 단계), models/pipeline_manifest.json (모델 단계)
+# - 의존 관계가 없는 단계(합성 / 도포 분기)는 프로세스 풀에서 동시 실행, 단계별 로그는 logs/pipeline/
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+PIPELINE_VERSION = 1
+MANIFESTS = {
+    'data': os.path.join("data_cleaned", "pipeline_manifest.json"),
+    'models': os.path.join("models", "pipeline_manifest.json"),
+}
+LOG_DIR = os.path.join("logs", "pipeline")
+# pyarrow 가 설치된 경우 정제 / 피처 데이터의 Parquet 사본도 단계 출력으로 관리 (scripts/columnar_store.py)
+PARQUET = importlib.util.find_spec("pyarrow") is not None
+
+RAW_SYNTHESIS = "raw_data/Lab 합성 총괄_250401부터241031까지.csv"
+RAW_COATING = "raw_data/Lab 도포 총괄_250401부터241031까지.csv"
+# 엑셀 직접 적재 사용 시(SIM_XLSX_INGEST=1 또는 --xlsx) 원본 엑셀 기록이 있으면 CSV 변환본 대신 엑셀에서 적재 (scripts/excel_ingest.py)
+# 기본은 CSV 변환본 (커밋된 정제 데이터 / 모델이 CSV 기준이므로, 엑셀 전환은 명시적으로 선택)
+RAW_SYNTHESIS_XLSX = "raw_data/Lab 합성 총괄_250401부터241031까지.xlsx"
+RAW_COATING_XLSX = "raw_data/Lab 도포 총괄_250401부터241031까지.xlsx"
+CLEANED_SYNTHESIS = "data_cleaned/cleaned_synthesis_data.csv"
+CLEANED_COATING = "data_cleaned/cleaned_coating_data.csv"
+SYNTHESIS_FEATURES = "data_cleaned/model_features.csv"
+COATING_FEATURES = "data_cleaned/coating_model_features.csv"
+
+
+def _abs(rel_path):
+    return os.path.join(base_dir, rel_path)
+
+
+def _with_parquet(csv_rel_path):
+    return [csv_rel_path] + ([csv_rel_path[:-len(".csv")] + ".parquet"] if PARQUET else [])
+
+
+def _xlsx_source(xlsx_rel_path):
+    # 단계가 별도 프로세스에서 실행될 수 있으므로 설정은 환경 변수로 전달
+    enabled = os.environ.get("SIM_XLSX_INGEST", "") not in ("", "0")
+    return enabled and os.path.exists(_abs(xlsx_rel_path))
+
+
+def _raw_inputs(xlsx_rel_path, csv_rel_path):
+    return lambda: [xlsx_rel_path if _xlsx_source(xlsx_rel_path) else csv_rel_path]
+
+
+def _export(name):
+    if PARQUET:
+        from columnar_store import export_table
+        export_table(name)
+
+
+def _synthesis_models():
+    model_dir = _abs("models")
+    if not os.path.exists(model_dir):
+        return []
+    return sorted(f"models/{f}" for f in os.listdir(model_dir)
+                  if f.startswith("model_rf_") and f.endswith(".joblib") and "adhesion" not in f)
+
+
+def _package_version(name):
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+# --- 단계 실행 함수 (무거운 모듈은 실행 시에만 import) ---
+# 반환: 매니페스트에 기록할 상태 dict, 실패 시 예외
+
+def _run_clean_synthesis(state):
+    if _xlsx_source(RAW_SYNTHESIS_XLSX):
+        from excel_ingest import ingest
+        state = ingest('synthesis', state)
+    else:
+        from clean_data import clean_synthesis
+        state = clean_synthesis(state)
+    _export('cleaned_synthesis')
+    return state
+
+
+def _run_clean_coating(state):
+    if _xlsx_source(RAW_COATING_XLSX):
+        from excel_ingest import ingest
+        state = ingest('coating', state)
+    else:
+        from clean_data import clean_coating
+        state = clean_coating(state)
+    _export('cleaned_coating')
+    return state
+
+
+def _run_prepare_synthesis(state):
+    from prepare_dataset import preprocess_for_model
+    if not preprocess_for_model():
+        raise RuntimeError("prepare_dataset failed")
+    _export('model_features')
+    return {}
+
+
+def _run_prepare_coating(state):
+    from prepare_coating_dataset import preprocess_coating_data
+    if not preprocess_coating_data():
+        raise RuntimeError("prepare_coating_dataset failed")
+    _export('coating_model_features')
+    return {}
+
+
+def _metrics_state(metrics):
+    return {'metrics': [{k: (float(v) if not isinstance(v, str) else v) for k, v in m.items()} for m in metrics]}
+
+
+def _run_train_synthesis(state):
+    from train_models_rf import train_property_models_rf, write_training_report
+    metrics = train_property_models_rf()
+    if not metrics:
+        raise RuntimeError("no synthesis model was trained")
+    write_training_report(metrics)
+    return _metrics_state(metrics)
+
+
+def _run_train_coating(state):
+    from train_coating_models import train_coating_models, write_training_report
+    metrics = train_coating_models()
+    if not metrics:
+        raise RuntimeError("coating model was not trained")
+    write_training_report(metrics)
+    return _metrics_state(metrics)
+
+
+def _run_experiment_index(state):
+    from experiment_index import build_experiment_index
+    index = build_experiment_index()
+    if index is None:
+        raise RuntimeError("experiment index build failed")
+    return {'experiments': int(index.source_rows)}
+
+
+def _run_response_grid(state):
+    from response_grid import build_response_grid
+    meta = build_response_grid(force=True)
+    if meta is None:
+        raise RuntimeError("response grid build failed")
+    return {'checksum': meta['checksum']}
+
+
+def _run_model_bundle(state):
+    from model_bundle import build_bundle
+    bundle = build_bundle()
+    return {'models': len(bundle['synthesis_models']) + len(bundle['coating_models'])}
+
+
+def _run_publish_models(state):
+    from model_store import publish
+    return {'version': publish()}
+
+
+class Stage:
+    """
+    inputs / outputs: 저장소 기준 상대 경로 목록 (또는 목록을 반환하는 함수 - 모델 파일처럼 실행 결과에 따라 달라지는 경우)
+    code: 단계 결과에 영향을 주는 소스 파일, params: 키에 포함할 추가 파라미터
+    incremental: True 면 이전 실행 상태를 run 에 전달 (새 행만 처리)
+    """
+
+    def __init__(self, name, run, inputs, outputs, code, manifest, deps=(), params=None, incremental=False):
+        self.name = name
+        self.run = run
+        self._inputs = inputs
+        self._outputs = outputs
+        self.code = [f"scripts/{c}" for c in code]
+        self.manifest = manifest
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.incremental = incremental
+
+    @staticmethod
+    def _resolve(paths):
+        return list(paths()) if callable(paths) else list(paths)
+
+    @property
+    def inputs(self):
+        return self._resolve(self._inputs)
+
+    @property
+    def outputs(self):
+        return self._resolve(self._outputs)
+
+
+STORE = {'parquet': PARQUET}
+# 적재 원본(xlsx / csv)이 바뀌면 키가 달라져 이전 증분 상태를 쓰지 않고 전체 재정제
+SYNTHESIS_SOURCE = dict(STORE, source=lambda: 'xlsx' if _xlsx_source(RAW_SYNTHESIS_XLSX) else 'csv')
+COATING_SOURCE = dict(STORE, source=lambda: 'xlsx' if _xlsx_source(RAW_COATING_XLSX) else 'csv')
+SKLEARN = {'scikit-learn': lambda: _package_version("scikit-learn")}
+
+STAGES = [
+    Stage("clean_synthesis", _run_clean_synthesis, _raw_inputs(RAW_SYNTHESIS_XLSX, RAW_SYNTHESIS),
+          _with_parquet(CLEANED_SYNTHESIS), ["clean_data.py", "excel_ingest.py", "columnar_store.py"], 'data',
+          params=SYNTHESIS_SOURCE, incremental=True),
+    Stage("clean_coating", _run_clean_coating, _raw_inputs(RAW_COATING_XLSX, RAW_COATING),
+          _with_parquet(CLEANED_COATING), ["clean_data.py", "excel_ingest.py", "columnar_store.py"], 'data',
+          params=COATING_SOURCE, incremental=True),
+    Stage("prepare_synthesis", _run_prepare_synthesis, [CLEANED_SYNTHESIS], _with_parquet(SYNTHESIS_FEATURES),
+          ["prepare_dataset.py", "monomer_parser.py", "chemical_db.py", "columnar_store.py"], 'data',
+          deps=["clean_synthesis"], params=STORE),
+    Stage("prepare_coating", _run_prepare_coating, [CLEANED_COATING], _with_parquet(COATING_FEATURES),
+          ["prepare_coating_dataset.py", "columnar_store.py"], 'data', deps=["clean_coating"], params=STORE),
+    Stage("train_synthesis", _run_train_synthesis, [SYNTHESIS_FEATURES],
+          lambda: _synthesis_models() + ["models/feature_list.txt", "reports/training_metrics.txt"],
+          ["train_models_rf.py", "columnar_store.py"], 'models', deps=["prepare_synthesis"], params=SKLEARN),
+    Stage("train_coating", _run_train_coating, [COATING_FEATURES],
+          ["models/model_rf_adhesion.joblib", "models/coating_feature_list.txt",
+           "reports/training_metrics_coating.txt"],
+          ["train_coating_models.py", "columnar_store.py"], 'models', deps=["prepare_coating"], params=SKLEARN),
+    Stage("experiment_index", _run_experiment_index,
+          [SYNTHESIS_FEATURES, CLEANED_SYNTHESIS, "models/feature_list.txt"], ["models/experiment_index.joblib"],
+          ["experiment_index.py", "columnar_store.py"], 'models', deps=["prepare_synthesis", "train_synthesis"]),
+    Stage("response_grid", _run_response_grid, lambda: _synthesis_models() + ["models/feature_list.txt"],
+          ["models/response_grid/grid.npy", "models/response_grid/meta.json"],
+          ["response_grid.py", "feature_vectorizer.py", "chemical_db.py", "forest_engine.py"], 'models',
+          deps=["train_synthesis"]),
+    Stage("model_bundle", _run_model_bundle,
+          lambda: _synthesis_models() + ["models/model_rf_adhesion.joblib", "models/feature_list.txt",
+                                         "models/coating_feature_list.txt"],
+          ["models/model_bundle.pkl"], ["model_bundle.py", "forest_engine.py", "tree_attribution.py"], 'models',
+          deps=["train_synthesis", "train_coating"]),
+    # 발행 기록(LATEST)만 출력으로 추적 (model_store activate 로 CURRENT 를 되돌려도 다시 발행하지 않음)
+    Stage("publish_models", _run_publish_models,
+          lambda: _synthesis_models() + ["models/model_rf_adhesion.joblib", "models/feature_list.txt",
+                                         "models/coating_feature_list.txt", "models/model_bundle.pkl",
+                                         "reports/training_metrics.txt", "reports/training_metrics_coating.txt"],
+          ["models/versions/LATEST"], ["model_store.py", "model_bundle.py"], 'models',
+          deps=["train_synthesis", "train_coating", "model_bundle"]),
+]
+
+STAGE_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+def load_manifest(kind):
+    path = _abs(MANIFESTS[kind])
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {'version': PIPELINE_VERSION, 'stages': {}}
+
+
+def save_manifest(kind, manifest):
+    path = _abs(MANIFESTS[kind])
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class FileRecords:
+    """(크기, 수정시각)이 기록과 같으면 저장된 해시를 재사용하는 파일 해시 조회기"""
+
+    def __init__(self, manifests):
+        self.known = {}
+        for manifest in manifests:
+            for entry in manifest.get('stages', {}).values():
+                for group in ('inputs', 'code', 'outputs'):
+                    self.known.update(entry.get(group, {}))
+
+    def record(self, rel_path, rehash=False):
+        path = _abs(rel_path)
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        rec = self.known.get(rel_path)
+        if (not rehash and rec and rec['size'] == stat.st_size and rec['mtime_ns'] == stat.st_mtime_ns):
+            return rec
+        rec = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_sha256(path)}
+        self.known[rel_path] = rec
+        return rec
+
+    def update(self, entry):
+        for group in ('inputs', 'code', 'outputs'):
+            self.known.update({p: r for p, r in entry.get(group, {}).items() if r})
+
+    def records(self, paths, rehash=False):
+        return {p: self.record(p, rehash) for p in paths}
+
+
+def _params(stage):
+    return {k: (v() if callable(v) else v) for k, v in stage.params.items()}
+
+
+def stage_key(stage, files):
+    inputs = files.records(stage.inputs)
+    code = files.records(stage.code)
+    params = _params(stage)
+    payload = {
+        'stage': stage.name,
+        'version': PIPELINE_VERSION,
+        'inputs': {p: (r['sha256'] if r else None) for p, r in inputs.items()},
+        'code': {p: (r['sha256'] if r else None) for p, r in code.items()},
+        'params': params,
+    }
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return key, inputs, code, params
+
+
+def outputs_current(entry, files):
+    """기록된 출력 파일이 모두 존재하고 내용이 그대로인지 (크기/수정시각이 다르면 해시로 재확인)"""
+    recorded = entry.get('outputs', {})
+    if not recorded:
+        return False
+    for rel_path, rec in recorded.items():
+        current = files.record(rel_path)
+        if current is None or current['sha256'] != rec['sha256']:
+            return False
+    return True
+
+
+def plan(stages=None, force=False):
+    """각 단계의 실행 필요 여부 [(stage, reason)] (reason 이 None 이면 최신 상태)"""
+    manifests = {kind: load_manifest(kind) for kind in MANIFESTS}
+    files = FileRecords(manifests.values())
+    result = []
+    scheduled = set()
+    for stage in stages or STAGES:
+        entry = manifests[stage.manifest]['stages'].get(stage.name)
+        key = stage_key(stage, files)[0]
+        if force:
+            reason = "forced"
+        elif scheduled.intersection(stage.deps):
+            reason = "upstream stage will run"
+        elif entry is None:
+            reason = "no previous run"
+        elif entry.get('key') != key:
+            reason = "inputs/code changed"
+        elif not outputs_current(entry, files):
+            reason = "outputs missing or modified"
+        else:
+            reason = None
+        if reason is not None:
+            scheduled.add(stage.name)
+        result.append((stage, reason))
+    return result
+
+
+def execute_stage(stage, manifest_entry, files, force=False):
+    """
+    단일 단계 실행 (또는 건너뜀)
+    반환: (새 매니페스트 항목, 상태 문자열 'skipped' | 'ran', 소요 시간)
+    """
+    start = time.perf_counter()
+    key, inputs, code, params = stage_key(stage, files)
+    if (not force and manifest_entry is not None and manifest_entry.get('key') == key
+            and outputs_current(manifest_entry, files)):
+        return manifest_entry, 'skipped', time.perf_counter() - start
+
+    # 행 단위 단계: 코드/파라미터가 같고 이전 출력이 그대로면 이전 상태를 넘겨 새 행만 처리
+    prev_state = None
+    if (stage.incremental and not force and manifest_entry is not None
+            and manifest_entry.get('code') == code and manifest_entry.get('params') == params
+            and outputs_current(manifest_entry, files)):
+        prev_state = manifest_entry.get('state')
+
+    state = stage.run(prev_state) or {}
+    outputs = files.records(stage.outputs, rehash=True)
+    missing = [p for p, r in outputs.items() if r is None]
+    if missing:
+        raise RuntimeError(f"{stage.name}: expected outputs were not produced: {missing}")
+    entry = {
+        'key': key,
+        'inputs': inputs,
+        'code': code,
+        'params': params,
+        'outputs': outputs,
+        'state': state,
+        'finished_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'duration_sec': round(time.perf_counter() - start, 3),
+    }
+    return entry, 'ran', time.perf_counter() - start
+
+
+def stage_is_current(stage, manifest_entry, files):
+    return (manifest_entry is not None and manifest_entry.get('key') == stage_key(stage, files)[0]
+            and outputs_current(manifest_entry, files))
+
+
+def _stage_worker(name, manifest_entry, known, force, log_path):
+    """프로세스 풀 작업 함수 (단계 객체는 피클 불가한 람다를 가지므로 이름으로 전달, 출력은 단계별 로그 파일로)"""
+    stage = STAGE_BY_NAME[name]
+    files = FileRecords([])
+    files.known = known
+    with open(log_path, "w", encoding="utf-8") as log, redirect_stdout(log), redirect_stderr(log):
+        print(f"# {name} started at {time.strftime('%Y-%m-%d %H:%M:%S')} (pid {os.getpid()})")
+        try:
+            entry, result, elapsed = execute_stage(stage, manifest_entry, files, force)
+        except Exception:
+            traceback.print_exc()
+            raise
+        print(f"# {name} {result} in {elapsed:.2f}s")
+    return entry, result, elapsed
+
+
+def _log_path(stage):
+    return os.path.join(LOG_DIR, f"{stage.name}.log")
+
+
+def run_pipeline(stages=None, force=False, workers=None):
+    """
+    단계 의존성(DAG)에 따라 실행: 의존 단계가 끝난 단계부터 프로세스 풀에서 동시 실행
+    (합성 / 도포 분기는 정제 이후 공유하는 것이 없어 병렬로 진행)
+    - 최신 상태인 단계는 주 프로세스에서 바로 건너뜀 (작업 프로세스 생성 없음)
+    - 한 단계가 실패하면 그 단계에 의존하는 단계만 중단, 다른 분기의 결과는 그대로 매니페스트에 기록
+    - workers=1 이면 프로세스 풀 없이 현재 프로세스에서 순서대로 실행
+    반환: {stage_name: {'status': 'skipped' | 'ran' | 'failed' | 'blocked', 'seconds', 'log'}}
+    """
+    stages = list(stages or STAGES)
+    selected = {stage.name for stage in stages}
+    workers = workers or min(len(stages), os.cpu_count() or 1)
+    manifests = {kind: load_manifest(kind) for kind in MANIFESTS}
+    files = FileRecords(manifests.values())
+    report = {}
+    pending = list(stages)
+    running = {}
+    executor = None
+
+    def finish(stage, outcome):
+        entry, result, elapsed = outcome
+        report[stage.name] = {'status': result, 'seconds': round(elapsed, 3), 'log': _log_path(stage)}
+        entries = manifests[stage.manifest]['stages']
+        entries[stage.name] = entry
+        files.update(entry)
+        save_manifest(stage.manifest, manifests[stage.manifest])
+        extra = ""
+        if entry['state'].get('mode') == 'append':
+            extra = f", {entry['state']['new_rows']} new rows appended"
+        print(f"[done]    {stage.name} ({elapsed:.2f}s{extra})")
+
+    def fail(stage, error):
+        report[stage.name] = {'status': 'failed', 'seconds': None, 'log': _log_path(stage)}
+        print(f"[failed]  {stage.name}: {error} (see {_log_path(stage)})")
+
+    os.makedirs(_abs(LOG_DIR), exist_ok=True)
+    for stage in stages:
+        for rel_path in stage.outputs:
+            os.makedirs(os.path.dirname(_abs(rel_path)), exist_ok=True)
+
+    try:
+        while pending or running:
+            progressed = False
+            for stage in list(pending):
+                deps = [d for d in stage.deps if d in selected]
+                states = [report.get(d, {}).get('status') for d in deps]
+                if any(s in ('failed', 'blocked') for s in states):
+                    pending.remove(stage)
+                    report[stage.name] = {'status': 'blocked', 'seconds': None, 'log': None}
+                    print(f"[blocked] {stage.name} (upstream stage failed)")
+                    progressed = True
+                    continue
+                if not all(s in ('ran', 'skipped') for s in states):
+                    continue
+                pending.remove(stage)
+                progressed = True
+                entry = manifests[stage.manifest]['stages'].get(stage.name)
+                if not force and stage_is_current(stage, entry, files):
+                    report[stage.name] = {'status': 'skipped', 'seconds': 0.0, 'log': None}
+                    print(f"[skip]    {stage.name} (up to date)")
+                    continue
+                args = (stage.name, entry, files.known, force, _abs(_log_path(stage)))
+                if workers <= 1:
+                    print(f"[start]   {stage.name}")
+                    try:
+                        finish(stage, _stage_worker(*args))
+                    except Exception as e:
+                        fail(stage, e)
+                    continue
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                running[executor.submit(_stage_worker, *args)] = stage
+                print(f"[start]   {stage.name}")
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        finish(stage, future.result())
+                    except Exception as e:
+                        fail(stage, e)
+            elif not progressed:
+                # 선택되지 않은 순환 의존 등으로 더 진행할 수 없는 경우
+                for stage in pending:
+                    report[stage.name] = {'status': 'blocked', 'seconds': None, 'log': None}
+                    print(f"[blocked] {stage.name} (unresolved dependencies)")
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    report = {stage.name: report[stage.name] for stage in stages if stage.name in report}
+    # 단계 소요 시간은 작업 프로세스가 아닌 주 프로세스에서 계측 (프로세스별 지표 파일이 서로 덮어쓰지 않도록)
+    for name, r in report.items():
+        instrumentation.count("pipeline_stage_runs", stage=name, status=r['status'])
+        if r['status'] == 'ran':
+            instrumentation.observe("pipeline_stage", r['seconds'], stage=name)
+    return report
+
+
+def write_run_report(report, wall_seconds, workers):
+    """마지막 실행의 단계별 상태 / 소요 시간 기록 (logs/pipeline/last_run.json) 및 요약 출력"""
+    stage_seconds = sum(r['seconds'] or 0.0 for r in report.values())
+    summary = {
+        'finished_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'workers': workers,
+        'wall_seconds': round(wall_seconds, 3),
+        'stage_seconds': round(stage_seconds, 3),
+        'stages': report,
+    }
+    os.makedirs(_abs(LOG_DIR), exist_ok=True)
+    with open(_abs(os.path.join(LOG_DIR, "last_run.json")), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    if any(r['status'] != 'skipped' for r in report.values()):
+        print("\n| Stage | Status | Seconds |")
+        print("| --- | --- | --- |")
+        for name, r in report.items():
+            seconds = "-" if r['seconds'] is None else f"{r['seconds']:.2f}"
+            print(f"| {name} | {r['status']} | {seconds} |")
+        print(f"Stage time total {stage_seconds:.2f}s, wall clock {wall_seconds:.2f}s ({workers} workers)")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental data/model pipeline")
+    parser.add_argument("--force", action="store_true", help="ignore cached results and rerun every selected stage")
+    parser.add_argument("--stages", nargs="+", help="run only these stages")
+    parser.add_argument("--dry-run", action="store_true", help="show which stages would run")
+    parser.add_argument("--workers", type=int, help="max concurrent stages (1 = run in this process, in order)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="export stage timings to logs/metrics/ (same as SIM_METRICS=1)")
+    parser.add_argument("--xlsx", action="store_true",
+                        help="clean from the raw .xlsx workbooks instead of the CSV exports (same as SIM_XLSX_INGEST=1)")
+    args = parser.parse_args()
+    if args.metrics:
+        instrumentation.configure(enabled=True)
+    if args.xlsx:
+        os.environ["SIM_XLSX_INGEST"] = "1"
+
+    selected = STAGES
+    if args.stages:
+        unknown = [s for s in args.stages if s not in {st.name for st in STAGES}]
+        if unknown:
+            parser.error(f"unknown stages: {unknown}")
+        selected = [st for st in STAGES if st.name in args.stages]
+
+    start = time.perf_counter()
+    if args.dry_run:
+        for stage, reason in plan(selected, args.force):
+            print(f"{stage.name:20s} {'up to date' if reason is None else 'run: ' + reason}")
+    else:
+        workers = args.workers or min(len(selected), os.cpu_count() or 1)
+        report = run_pipeline(selected, args.force, workers)
+        write_run_report(report, time.perf_counter() - start, workers)
+        if any(r['status'] in ('failed', 'blocked') for r in report.values()):
+            print(f"Pipeline finished with failures in {time.perf_counter() - start:.2f}s")
+            sys.exit(1)
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s")
@@ -1,7 +1,10 @@
 import pandas as pd
 import numpy as np
 import os
-import re
+try:
+    from scripts.columnar_store import read_table
+except ImportError:
+    from columnar_store import read_table
 
 # 현재 스크립트 위치 기준 상위 디렉토리 경로 설정
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -9,60 +12,98 @@ base_dir = os.path.dirname(script_dir)
 input_path = os.path.join(base_dir, "data_cleaned", "cleaned_coating_data.csv")
 output_path = os.path.join(base_dir, "data_cleaned", "coating_model_features.csv")
 
-def parse_ratios(text, prefix):
-    if pd.isna(text) or not isinstance(text, str):
-        return {}
-    # 형식: (CX100/1%)(SV02/0.7%)
-    matches = re.findall(r'([a-zA-Z0-9_\uAC00-\uD7A3]+)/([\d.]+)', text)
-    return {f'{prefix}_{name}': float(val) for name, val in matches}
-
-def parse_val_in_bracket(text):
-    if pd.isna(text) or not isinstance(text, str):
-        return None
-    # 숫자가 포함된 첫 번째 괄호 내용 추출: (2.7)(#3) -> 2.7
-    match = re.search(r'\(([\d.]+)\)', text)
-    if match:
-        return float(match.group(1))
-    return None
-
-def parse_adhesion(text):
-    if pd.isna(text) or not isinstance(text, str):
-        return None
-    # 형식: "(51,55)*(초/90/BA)" -> 숫자의 평균값 추출
-    first_part = text.split('*')[0]
-    nums = re.findall(r'[\d.]+', first_part)
-    if not nums:
-        return None
-    try:
-        float_nums = [float(n) for n in nums]
-        return sum(float_nums) / len(float_nums)
-    except:
-        return None
+# 도포 기록 파서 (열 단위 벡터화: str.extractall / str.extract 후 피벗)
+# 기록 문자열은 반복이 많으므로 고유 문자열만 파싱한 뒤 행 코드로 펼침
+# 형식: (CX100/1%)(SV02/0.7%)
+RATIO_PATTERN = r'([a-zA-Z0-9_\uAC00-\uD7A3]+)/([\d.]+)'
+# 숫자가 포함된 첫 번째 괄호 내용 추출: (2.7)(#3) -> 2.7
+BRACKET_PATTERN = r'\(([\d.]+)\)'
+NUMBER_PATTERN = r'([\d.]+)'
+
+def _unique_text(series):
+    """
+    반환: (행별 고유 문자열 코드 (결측 -1), 고유 문자열 Series)
+    문자열이 아닌 값(수치, 결측)은 파싱 대상에서 제외
+    """
+    if isinstance(series.dtype, pd.StringDtype):
+        text = series
+    elif pd.api.types.is_object_dtype(series):
+        text = series.where(series.map(lambda v: isinstance(v, str))).astype("string")
+    else:
+        text = pd.Series(pd.NA, index=series.index, dtype="string")
+    codes, uniques = pd.factorize(text, use_na_sentinel=True)
+    return codes, pd.Series(uniques, dtype="string")
+
+def _expand(unique_values, codes, fill):
+    # 고유 문자열별 결과 (u, ...) 뒤에 결측용 행을 붙인 뒤 코드(-1 = 마지막 행)로 펼침
+    pad = np.full((1,) + unique_values.shape[1:], fill, dtype=np.float64)
+    return np.concatenate([unique_values.astype(np.float64), pad])[codes]
+
+def parse_ratios(series, prefix):
+    """
+    이름/비율 쌍을 (행 x 성분) 행렬로 변환 (같은 행에 중복된 이름은 마지막 값 사용)
+    컬럼 순서는 데이터에 처음 등장한 순서
+    """
+    codes, uniques = _unique_text(series)
+    pairs = uniques.str.extractall(RATIO_PATTERN)
+    if pairs.empty:
+        return pd.DataFrame(index=series.index)
+    pairs.columns = ['name', 'val']
+    pairs['val'] = pd.to_numeric(pairs['val'], errors='coerce').astype(float)
+    pairs['row'] = pairs.index.get_level_values(0)
+    order = pairs['name'].unique()
+    wide = (pairs.drop_duplicates(['row', 'name'], keep='last')
+                 .pivot(index='row', columns='name', values='val')
+                 .reindex(index=uniques.index, columns=order)
+                 .fillna(0))
+    return pd.DataFrame(_expand(wide.to_numpy(), codes, 0.0), index=series.index,
+                        columns=[f'{prefix}_{name}' for name in order])
+
+def parse_val_in_bracket(series):
+    codes, uniques = _unique_text(series)
+    values = pd.to_numeric(uniques.str.extract(BRACKET_PATTERN, expand=False), errors='coerce')
+    return pd.Series(_expand(values.to_numpy(dtype=np.float64), codes, np.nan), index=series.index)
+
+def parse_adhesion(series):
+    """
+    형식: "(51,55)*(초/90/BA)" -> '*' 앞부분 숫자들의 평균값
+    (변환할 수 없는 숫자가 섞인 행은 결측)
+    """
+    codes, uniques = _unique_text(series)
+    mean = np.full(len(uniques), np.nan)
+    nums = uniques.str.split('*', n=1, regex=False).str[0].str.extractall(NUMBER_PATTERN)[0]
+    if not nums.empty:
+        present = nums.unstack().notna().to_numpy()
+        values = pd.to_numeric(nums, errors='coerce').unstack()
+        matrix = values.to_numpy(dtype=np.float64)
+        # 기존 계산(sum / len)과 동일하게 왼쪽부터 누적 (변환 실패한 숫자가 있으면 NaN 이 전파되어 결측)
+        total = np.zeros(len(values))
+        for j in range(matrix.shape[1]):
+            total = np.where(present[:, j], total + matrix[:, j], total)
+        mean[values.index.to_numpy()] = total / present.sum(axis=1)
+    return pd.Series(_expand(mean, codes, np.nan), index=series.index)
 
 def preprocess_coating_data():
     try:
         if not os.path.exists(input_path):
             print(f"Error: Input file not found at {input_path}")
-            return
+            return False
 
-        df = pd.read_csv(input_path)
+        df = read_table('cleaned_coating', columns=['원단', '경화제', '첨가제', '도포량', '점착력'])
         print(f"Loaded {len(df)} rows from cleaned coating data.")
 
         # 1. Feature: 경화제 및 첨가제 파싱
-        hardener_data = df['경화제'].apply(lambda x: parse_ratios(x, 'hardener')).tolist()
-        additive_data = df['첨가제'].apply(lambda x: parse_ratios(x, 'additive')).tolist()
-        
-        hardener_df = pd.DataFrame(hardener_data).fillna(0)
-        additive_df = pd.DataFrame(additive_data).fillna(0)
+        hardener_df = parse_ratios(df['경화제'], 'hardener')
+        additive_df = parse_ratios(df['첨가제'], 'additive')
 
         # 2. Feature: 도포량 (수치)
-        df['도포량_num'] = df['도포량'].apply(parse_val_in_bracket)
+        df['도포량_num'] = parse_val_in_bracket(df['도포량'])
 
         # 3. Feature: 원단 (카테고리 -> 겟 더미)
         fabric_df = pd.get_dummies(df['원단'], prefix='fabric').astype(float)
 
         # 4. Target: 점착력
-        df['점착력_target'] = df['점착력'].apply(parse_adhesion)
+        df['점착력_target'] = parse_adhesion(df['점착력'])
 
         # Combine Features
         features_df = pd.concat([
@@ -83,9 +124,11 @@ def preprocess_coating_data():
 
         final_df.to_csv(output_path, index=False, encoding='utf-8-sig')
         print(f"Coating feature dataset successfully created: {output_path} ({len(final_df)} rows)")
+        return True
 
     except Exception as e:
         print(f"Critical Error in coating preprocessing: {e}")
+        return False
 
 if __name__ == "__main__":
     preprocess_coating_data()
@@ -0,0 +1,75 @@
+import importlib
+import threading
+import time
+try:
+    from scripts.instrumentation import observe
+except ImportError:
+    from instrumentation import observe
+
+# 첫 화면 표시 이후 무거운 모듈 / 자원을 백그라운드 스레드에서 미리 준비 (앱 시작 지연 단축)
+# - 첫 렌더링에 필요 없는 import(역설계의 scipy.optimize, plotly.express, 민감도 분석)와 scikit-learn 이 필요한 자원
+#   (과거 실험 인덱스)을 첫 렌더링 이후로 미루고, 사용자가 버튼을 누르기 전에 미리 불러 둠
+# - 작업은 등록 순서대로 한 스레드에서 실행 (단일 코어에서 화면 재실행과 경쟁하는 스레드 수 최소화)
+# - get() 은 준비된 결과만 반환하고 기본적으로 기다리지 않음, 작업별 소요 시간 / 오류는 report() 로 확인
+
+class Prewarmer:
+    def __init__(self, tasks):
+        """tasks: [(이름, 인자 없는 함수)]"""
+        self.tasks = list(tasks)
+        self.results = {}
+        self.timings = {}
+        self.errors = {}
+        self.finished = {name: threading.Event() for name, _ in self.tasks}
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """백그라운드 실행 시작 (이미 시작했으면 그대로)"""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="prewarm", daemon=True)
+                self.thread.start()
+        return self
+
+    def _run(self):
+        for name, func in self.tasks:
+            start = time.perf_counter()
+            try:
+                self.results[name] = func()
+            except Exception as e:
+                self.errors[name] = f"{type(e).__name__}: {e}"
+            self.timings[name] = time.perf_counter() - start
+            observe("prewarm", self.timings[name], task=name)
+            self.finished[name].set()
+
+    def pending(self, name):
+        """아직 끝나지 않은 작업인지 (시작 전 포함)"""
+        return not self.finished[name].is_set()
+
+    def get(self, name, timeout=0):
+        """작업 결과 (timeout 초까지 대기, 기본 대기 없음), 끝나지 않았거나 실패했으면 None"""
+        if timeout and self.thread is not None:
+            self.finished[name].wait(timeout)
+        return self.results.get(name)
+
+    def wait(self, timeout=None):
+        """모든 작업 완료까지 대기, 반환: 완료 여부"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for event in self.finished.values():
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not event.wait(remaining):
+                return False
+        return True
+
+    def report(self):
+        return {name: {'seconds': self.timings.get(name), 'error': self.errors.get(name),
+                       'done': self.finished[name].is_set()} for name, _ in self.tasks}
+
+
+def import_modules(*names):
+    """모듈 import 작업 (반환: import 한 모듈 이름 목록)"""
+    def task():
+        for name in names:
+            importlib.import_module(name)
+        return list(names)
+    return task
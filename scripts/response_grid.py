@@ -0,0 +1,201 @@
+import numpy as np
+import json
+import os
+import joblib
+try:
+    from scripts.forest_engine import get_flat_forest
+    from scripts.feature_vectorizer import SynthesisVectorizer
+    from scripts.fingerprint import combined_checksum
+except ImportError:
+    from forest_engine import get_flat_forest
+    from feature_vectorizer import SynthesisVectorizer
+    from fingerprint import combined_checksum
+
+# 핵심 모노머 심플렉스(BA, MMA, AA, 2-EHA) 응답 곡면 사전 계산 캐시
+# - BA/MMA/AA 를 격자 축으로, 2-EHA = 100 - (BA + MMA + AA) 로 두고 온도 수준별로 모든 합성 모델을 평가
+# - 결과는 메모리 매핑 NumPy 배열(grid.npy) + 메타데이터(meta.json)로 저장, 모델 체크섬이 바뀌면 무효화
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+model_dir = os.path.join(base_dir, "models")
+grid_dir = os.path.join(model_dir, "response_grid")
+
+GRID_MONOMERS = ["monomer_BA", "monomer_MMA", "monomer_AA", "monomer_2-EHA"]
+GRID_TEMPS = [50.0, 60.0, 70.0, 80.0, 90.0, 100.0]
+GRID_STEP = 2.5
+# 온도 이외의 공정 조건은 역설계 기본값으로 고정
+GRID_FIXED_PARAMS = {'반응시간': 4.5, '이론 고형분(%)': 0.48, 'Scale': 500}
+
+
+def _synthesis_model_files():
+    if not os.path.exists(model_dir):
+        return []
+    return sorted(f for f in os.listdir(model_dir)
+                  if f.startswith("model_rf_") and f.endswith(".joblib") and "adhesion" not in f)
+
+
+def models_checksum():
+    paths = [os.path.join(model_dir, f) for f in _synthesis_model_files()]
+    paths.append(os.path.join(model_dir, "feature_list.txt"))
+    return combined_checksum(paths)
+
+
+def _load_feature_list():
+    path = os.path.join(model_dir, "feature_list.txt")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return [line.strip() for line in f.readlines()]
+    return []
+
+
+def build_response_grid(step=GRID_STEP, temps=GRID_TEMPS, force=False, chunk_size=20000):
+    """
+    모든 합성 모델을 심플렉스 격자에서 평가하여 저장
+    모델이 바뀌지 않았으면(체크섬 동일) 재계산하지 않음
+    """
+    checksum = models_checksum()
+    meta_path = os.path.join(grid_dir, "meta.json")
+    if not force and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (meta.get('checksum') == checksum and meta.get('step') == step
+                and meta.get('temps') == list(temps)):
+            print("Response grid is up to date.")
+            return meta
+
+    features = _load_feature_list()
+    model_files = _synthesis_model_files()
+    if not features or not model_files:
+        print("Error: Synthesis models or feature list not found.")
+        return None
+    if any(m not in features for m in GRID_MONOMERS):
+        print("Error: Core monomers are missing from the feature list.")
+        return None
+    vectorizer = SynthesisVectorizer(features)
+
+    targets = [f.replace("model_rf_", "").replace(".joblib", "") for f in model_files]
+    forests = [get_flat_forest(joblib.load(os.path.join(model_dir, f))) for f in model_files]
+
+    levels = np.round(np.arange(0.0, 100.0 + step / 2, step), 6)
+    n = len(levels)
+    ba, mma, aa = np.meshgrid(levels, levels, levels, indexing='ij')
+    phr = np.stack([ba.ravel(), mma.ravel(), aa.ravel()], axis=1)
+    # 심플렉스 밖 격자점(BA + MMA + AA > 100)은 합계 100 으로 축소한 경계 배합값으로 채워
+    # 경계 근처 조회 시에도 보간 꼭짓점이 모두 유효하도록 함
+    total = phr.sum(axis=1, keepdims=True)
+    phr = np.where(total > 100.0, phr * 100.0 / np.maximum(total, 1e-9), phr)
+    phr = np.hstack([phr, np.clip(100.0 - phr.sum(axis=1, keepdims=True), 0.0, None)])
+
+    if not os.path.exists(grid_dir):
+        os.makedirs(grid_dir)
+    grid_path = os.path.join(grid_dir, "grid.npy")
+    tmp_path = os.path.join(grid_dir, "grid.tmp.npy")
+    grid = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                     shape=(len(targets), len(temps), n, n, n))
+
+    for ti, temp in enumerate(temps):
+        params = dict(GRID_FIXED_PARAMS)
+        params['온도'] = temp
+        X = vectorizer.from_phr(phr, GRID_MONOMERS, params)
+        for k, forest in enumerate(forests):
+            values = forest.predict(X, chunk_size=chunk_size)
+            grid[k, ti] = values.reshape(n, n, n)
+    grid.flush()
+    del grid
+    os.replace(tmp_path, grid_path)
+
+    meta = {
+        'checksum': checksum,
+        'targets': targets,
+        'monomers': GRID_MONOMERS,
+        'levels': levels.tolist(),
+        'step': step,
+        'temps': list(temps),
+        'fixed_params': GRID_FIXED_PARAMS
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    print(f"Response grid saved: {grid_path} ({len(targets)} targets x {len(temps)} temps x {n}^3)")
+    return meta
+
+
+class ResponseGrid:
+    def __init__(self, grid, meta):
+        self.grid = grid
+        self.meta = meta
+        self.targets = meta['targets']
+        self.levels = np.asarray(meta['levels'])
+        self.temps = np.asarray(meta['temps'])
+        self.step = meta['step']
+        self.fixed_params = meta['fixed_params']
+
+    def supports(self, params):
+        """고정 공정 조건이 격자 생성 조건과 같고 온도가 격자 범위 안에 있는지 확인"""
+        for name, val in self.fixed_params.items():
+            if abs(params.get(name, val) - val) > 1e-9:
+                return False
+        temp = params.get('온도', self.temps[0])
+        return self.temps[0] <= temp <= self.temps[-1]
+
+    def nearest_temp_index(self, temp):
+        return int(np.argmin(np.abs(self.temps - temp)))
+
+    def lookup(self, phr, temps):
+        """
+        phr: (n, 4) [BA, MMA, AA, 2-EHA], temps: (n,) 반응 온도
+        반환: {target: (n,)} 삼선형(배합) x 선형(온도) 보간값, 합계가 100 phr 이 아니면 NaN
+        """
+        phr = np.atleast_2d(np.asarray(phr, dtype=np.float64))
+        temps = np.broadcast_to(np.asarray(temps, dtype=np.float64), (len(phr),))
+        n = len(self.levels)
+        n_t = len(self.temps)
+        # 격자는 2-EHA 를 잔량으로 정의하므로 합계 100 phr 인 배합만 조회 가능
+        on_simplex = np.abs(phr.sum(axis=1) - 100.0) < 1e-6
+
+        pos = np.clip(phr[:, :3] / self.step, 0, n - 1)
+        i0 = np.minimum(np.floor(pos).astype(np.int64), n - 2)
+        frac = pos - i0
+        t_pos = np.interp(temps, self.temps, np.arange(n_t))
+        t0 = np.minimum(np.floor(t_pos).astype(np.int64), max(n_t - 2, 0))
+        t_frac = t_pos - t0
+
+        # 16개 꼭짓점(온도 2 x 배합 8)의 평탄 인덱스와 가중치를 한 번에 구성
+        offs = np.array([[(c >> b) & 1 for b in range(4)] for c in range(16)])
+        corner_idx = i0[:, None, :] + offs[None, :, :3]
+        corner_t = np.minimum(t0[:, None] + offs[None, :, 3], n_t - 1)
+        weights = np.where(offs[None, :, :3], frac[:, None, :], 1.0 - frac[:, None, :]).prod(axis=2)
+        weights *= np.where(offs[None, :, 3], t_frac[:, None], 1.0 - t_frac[:, None])
+        flat = ((corner_t * n + corner_idx[..., 0]) * n + corner_idx[..., 1]) * n + corner_idx[..., 2]
+
+        values = self.grid.reshape(len(self.targets), -1)[:, flat]
+        interp = (values * weights[None]).sum(axis=2)
+        interp[:, ~on_simplex] = np.nan
+        return {target: interp[k] for k, target in enumerate(self.targets)}
+
+    def nodes(self, temp):
+        """지정 온도에 가장 가까운 수준의 유효 격자점 전체: ([BA, MMA, AA, 2-EHA] (m, 4), {target: (m,)})"""
+        ti = self.nearest_temp_index(temp)
+        ba, mma, aa = np.meshgrid(self.levels, self.levels, self.levels, indexing='ij')
+        valid = (ba + mma + aa) <= 100.0 + 1e-9
+        phr = np.stack([ba[valid], mma[valid], aa[valid]], axis=1)
+        phr = np.hstack([phr, np.clip(100.0 - phr.sum(axis=1, keepdims=True), 0.0, None)])
+        values = {t: np.asarray(self.grid[k, ti][valid], dtype=np.float64) for k, t in enumerate(self.targets)}
+        return phr, values
+
+
+def load_response_grid():
+    """저장된 격자를 메모리 매핑으로 열고, 현재 모델과 체크섬이 다르면 None 반환 (캐시 무효)"""
+    meta_path = os.path.join(grid_dir, "meta.json")
+    grid_path = os.path.join(grid_dir, "grid.npy")
+    if not (os.path.exists(meta_path) and os.path.exists(grid_path)):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get('checksum') != models_checksum():
+        return None
+    return ResponseGrid(np.load(grid_path, mmap_mode='r'), meta)
+
+
+if __name__ == "__main__":
+    import sys
+    build_response_grid(force="--force" in sys.argv)
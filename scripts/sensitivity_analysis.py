@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import os
+from joblib import Parallel, delayed
+try:
+    from scripts.feature_vectorizer import SynthesisVectorizer
+    from scripts.model_store import active_models
+    from scripts.columnar_store import read_table, table_columns
+except ImportError:
+    from feature_vectorizer import SynthesisVectorizer
+    from model_store import active_models
+    from columnar_store import read_table, table_columns
+
+# 배치 부분의존도(PD) / ICE 민감도 분석 엔진
+# - 스윕 1회 = 배경 데이터 x 격자값 전체를 하나의 입력 행렬로 구성하여 한 번에 예측
+# - 모노머 함량을 스윕할 때는 화학 도메인 피처(chem_avg_*)도 함께 재계산하여 입력 정합성 유지
+# - 합성 모델(타겟)별 계산은 병렬로 수행
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+data_path = os.path.join(base_dir, "data_cleaned", "model_features.csv")
+report_dir = os.path.join(base_dir, "reports")
+
+CHUNK_SIZE = 20000
+
+
+def load_synthesis_forests():
+    """합성 모델만 로드 (현재 버전 모델 묶음의 평탄화 포레스트, 도포 모델은 피처 목록이 다르므로 제외)"""
+    _, bundle = active_models()
+    return dict(sorted(bundle['synthesis_models'].items()))
+
+
+def load_feature_list():
+    _, bundle = active_models()
+    return bundle['synthesis_features']
+
+
+def load_background(features, max_rows=200, seed=42):
+    """ICE 배경 데이터: 실제 실험 피처 행렬 (행 수가 많으면 무작위 표본 추출)"""
+    if not os.path.exists(data_path):
+        return np.zeros((1, len(features)))
+    stored = table_columns('model_features')
+    df = read_table('model_features', columns=[f for f in features if f in stored])
+    X = df.reindex(columns=features).apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    if len(X) > max_rows:
+        X = X[np.random.default_rng(seed).choice(len(X), max_rows, replace=False)]
+    return X
+
+
+def default_grid(background, feature_idx, n_points=20):
+    col = background[:, feature_idx]
+    lo, hi = float(np.min(col)), float(np.max(col))
+    if hi - lo < 1e-12:
+        # 배경 데이터에서 변동이 없는 변수(예: 온도 83도 고정)는 값 주변으로 범위 확장
+        lo, hi = lo - max(abs(lo) * 0.5, 1.0), hi + max(abs(hi) * 0.5, 1.0)
+    return np.linspace(lo, hi, n_points)
+
+
+def _sweep_matrix(background, features, assignments):
+    """
+    assignments: [(feature_idx, values (m,)), ...] 같은 길이 m 의 격자 조합
+    반환: (m * n_bg, n_features) 입력 행렬 (격자점 순서대로 배경 행 반복)
+    """
+    n_bg = background.shape[0]
+    m = len(assignments[0][1])
+    X = np.tile(background, (m, 1))
+    for idx, values in assignments:
+        X[:, idx] = np.repeat(values, n_bg)
+    if any(features[idx].startswith("monomer_") for idx, _ in assignments):
+        X = SynthesisVectorizer(features).fill_chemical_features(X)
+    return X
+
+
+def ice_1d(forest, background, features, feature, grid):
+    """단일 피처 ICE 곡선 (n_bg, n_grid) 과 부분의존도 (n_grid,)"""
+    idx = features.index(feature)
+    X = _sweep_matrix(background, features, [(idx, np.asarray(grid, dtype=np.float64))])
+    ice = forest.predict(X, chunk_size=CHUNK_SIZE).reshape(len(grid), background.shape[0]).T
+    return ice, ice.mean(axis=0)
+
+
+def partial_dependence_2d(forest, background, features, feature_x, feature_y, grid_x, grid_y):
+    """두 피처 결합 부분의존도 (n_grid_x, n_grid_y)"""
+    gx, gy = np.meshgrid(np.asarray(grid_x, dtype=np.float64), np.asarray(grid_y, dtype=np.float64), indexing='ij')
+    X = _sweep_matrix(background, features, [(features.index(feature_x), gx.ravel()),
+                                             (features.index(feature_y), gy.ravel())])
+    pred = forest.predict(X, chunk_size=CHUNK_SIZE).reshape(gx.size, background.shape[0])
+    return pred.mean(axis=1).reshape(gx.shape)
+
+
+def _analyze_target(target, forest, background, features, sweep_features, pairs, n_points):
+    frames_1d, frames_ice, frames_2d = [], [], []
+    for feature in sweep_features:
+        grid = default_grid(background, features.index(feature), n_points)
+        ice, pd_curve = ice_1d(forest, background, features, feature, grid)
+        frames_1d.append(pd.DataFrame({'target': target, 'feature': feature, 'value': grid,
+                                       'pd': pd_curve, 'ice_std': ice.std(axis=0)}))
+        frames_ice.append(pd.DataFrame({'target': target, 'feature': feature,
+                                        'row': np.repeat(np.arange(ice.shape[0]), len(grid)),
+                                        'value': np.tile(grid, ice.shape[0]), 'prediction': ice.ravel()}))
+    for fx, fy in pairs:
+        grid_x = default_grid(background, features.index(fx), n_points)
+        grid_y = default_grid(background, features.index(fy), n_points)
+        surface = partial_dependence_2d(forest, background, features, fx, fy, grid_x, grid_y)
+        frames_2d.append(pd.DataFrame({'target': target, 'feature_x': fx, 'feature_y': fy,
+                                       'value_x': np.repeat(grid_x, len(grid_y)),
+                                       'value_y': np.tile(grid_y, len(grid_x)), 'pd': surface.ravel()}))
+    return frames_1d, frames_ice, frames_2d
+
+
+def run_sensitivity(sweep_features, pairs=(), targets=None, background=None, n_points=20, n_jobs=-1):
+    """
+    sweep_features: 1-D PD/ICE 를 계산할 피처 목록
+    pairs: 2-D PD 를 계산할 (feature_x, feature_y) 목록
+    반환: (pd_1d DataFrame, ice DataFrame, pd_2d DataFrame)
+    """
+    # 피처 목록과 모델은 같은 버전 묶음에서 가져옴
+    _, bundle = active_models()
+    features = bundle['synthesis_features']
+    forests = dict(sorted(bundle['synthesis_models'].items()))
+    if targets is not None:
+        forests = {t: f for t, f in forests.items() if t in targets}
+    SynthesisVectorizer(features).check(list(sweep_features) + [p for pair in pairs for p in pair])
+    if background is None:
+        background = load_background(features)
+
+    results = Parallel(n_jobs=min(n_jobs if n_jobs > 0 else len(forests), len(forests)) or 1)(
+        delayed(_analyze_target)(t, f, background, features, list(sweep_features), list(pairs), n_points)
+        for t, f in forests.items()
+    )
+    def _combine(k):
+        frames = [f for res in results for f in res[k]]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return _combine(0), _combine(1), _combine(2)
+
+
+def write_reports(pd_1d, ice, pd_2d, out_dir=report_dir):
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    pd_1d.to_csv(os.path.join(out_dir, "sensitivity_pd_1d.csv"), index=False, encoding='utf-8-sig')
+    ice.to_csv(os.path.join(out_dir, "sensitivity_ice.csv"), index=False, encoding='utf-8-sig')
+    if not pd_2d.empty:
+        pd_2d.to_csv(os.path.join(out_dir, "sensitivity_pd_2d.csv"), index=False, encoding='utf-8-sig')
+
+    # 타겟 x 피처별 PD 변동폭 요약 (값이 클수록 해당 피처에 민감)
+    lines = ["# Partial Dependence Sensitivity Summary", "",
+             "| Target | Feature | PD Min | PD Max | PD Range |", "| --- | --- | --- | --- | --- |"]
+    summary = pd_1d.groupby(['target', 'feature'])['pd'].agg(['min', 'max'])
+    summary['range'] = summary['max'] - summary['min']
+    for (target, feature), row in summary.sort_values('range', ascending=False).iterrows():
+        lines.append(f"| {target} | {feature} | {row['min']:.4f} | {row['max']:.4f} | {row['range']:.4f} |")
+    with open(os.path.join(out_dir, "sensitivity_summary.md"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    sweep = ['온도', 'Scale', '이론 고형분(%)', 'monomer_BA', 'monomer_MMA', 'monomer_AA', 'monomer_2-EHA']
+    pd_1d, ice, pd_2d = run_sensitivity(sweep, pairs=[('monomer_BA', 'monomer_MMA')])
+    write_reports(pd_1d, ice, pd_2d)
+    print(f"Sensitivity reports saved to {report_dir} ({len(pd_1d)} PD points, {len(ice)} ICE points)")
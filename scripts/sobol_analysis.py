@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+import json
+import os
+from joblib import Parallel, delayed
+from scipy.stats import qmc
+try:
+    from scripts.feature_vectorizer import SynthesisVectorizer
+    from scripts.response_grid import models_checksum
+    from scripts.sensitivity_analysis import load_feature_list, load_synthesis_forests
+except ImportError:
+    from feature_vectorizer import SynthesisVectorizer
+    from response_grid import models_checksum
+    from sensitivity_analysis import load_feature_list, load_synthesis_forests
+
+# 분산 기반 전역 민감도(Sobol 1차 / 전체 지수) 계산기
+# - Sobol 준난수열로 A, B 행렬을 만들고 Saltelli 방식으로 AB_i 행렬을 구성
+# - 모노머 차원은 [0, 실측 최대 phr] 원시 가중치를 합계 100 phr 로 정규화하여 현실적인 배합 공간으로 사상
+# - 전체 표본을 대용량 배치로 나누어 프로세스 풀에서 평가하고, 표본 수별 수렴 및 부트스트랩 신뢰구간을 함께 보고
+# - 결과는 모델 체크섬 + 분석 설정 기준으로 캐시
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+data_path = os.path.join(base_dir, "data_cleaned", "model_features.csv")
+cache_dir = os.path.join(base_dir, "models", "sobol_cache")
+report_dir = os.path.join(base_dir, "reports")
+
+PROCESS_RANGES = {'온도': (70.0, 95.0)}
+BATCH_SIZE = 32768
+
+
+def default_factors(min_usage=0.05, path=data_path):
+    """
+    실험 이력 기반 기본 분석 인자
+    - 모노머: 사용 빈도 min_usage 이상, 범위 [0, 실측 최대 phr]
+    - 공정: Scale, 이론 고형분은 실측 범위, 온도는 PROCESS_RANGES (이력상 고정값이므로)
+    반환: {'monomers': {name: (lo, hi)}, 'process': {name: (lo, hi)}}
+    """
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    monomer_cols = [c for c in df.columns if c.startswith("monomer_")]
+    usage = (df[monomer_cols] > 0).mean()
+    monomers = {m: (0.0, float(df[m].max())) for m in usage[usage >= min_usage].index}
+    process = dict(PROCESS_RANGES)
+    for col in ['Scale', '이론 고형분(%)']:
+        values = pd.to_numeric(df[col], errors='coerce').dropna()
+        if len(values) and values.max() > values.min():
+            process[col] = (float(values.min()), float(values.max()))
+    return {'monomers': monomers, 'process': process}
+
+
+def _to_inputs(U, factors, features):
+    """단위 초입방체 표본 (n, d) -> 학습 피처 행렬 (모노머 차원은 phr 합계 100 으로 정규화)"""
+    monomers = list(factors['monomers'])
+    process = list(factors['process'])
+    m_lo = np.array([factors['monomers'][m][0] for m in monomers])
+    m_hi = np.array([factors['monomers'][m][1] for m in monomers])
+    raw = m_lo + U[:, :len(monomers)] * (m_hi - m_lo)
+    total = raw.sum(axis=1, keepdims=True)
+    phr = np.where(total > 0, raw / np.where(total > 0, total, 1.0) * 100.0, 100.0 / len(monomers))
+
+    vectorizer = SynthesisVectorizer(features)
+    X = vectorizer.from_phr(phr, monomers)
+    for j, name in enumerate(process):
+        lo, hi = factors['process'][name]
+        X[:, vectorizer.index[name]] = lo + U[:, len(monomers) + j] * (hi - lo)
+    return X
+
+
+def _evaluate_batch(U, factors, features, forests):
+    X = _to_inputs(U, factors, features)
+    return {t: f.predict(X) for t, f in forests.items()}
+
+
+def saltelli_matrices(n_samples, dim, seed=42):
+    """Sobol 준난수열 기반 A, B 행렬과 (A 의 i 열을 B 의 i 열로 바꾼) AB_i 행렬 스택"""
+    sampler = qmc.Sobol(d=2 * dim, scramble=True, seed=seed)
+    base = sampler.random_base2(int(np.log2(n_samples)))
+    A, B = base[:, :dim], base[:, dim:]
+    AB = np.repeat(A[None, :, :], dim, axis=0)
+    for i in range(dim):
+        AB[i, :, i] = B[:, i]
+    return A, B, AB
+
+
+def sobol_indices(fA, fB, fAB):
+    """
+    fA, fB: (n,), fAB: (d, n)
+    1차 지수: Saltelli (2010), 전체 지수: Jansen 추정량
+    """
+    var = np.var(np.concatenate([fA, fB]))
+    if var <= 0:
+        zeros = np.zeros(fAB.shape[0])
+        return zeros, zeros
+    first = np.mean(fB[None, :] * (fAB - fA[None, :]), axis=1) / var
+    total = 0.5 * np.mean((fA[None, :] - fAB)**2, axis=1) / var
+    return first, total
+
+
+def _bootstrap_ci(fA, fB, fAB, n_boot, rng, level=0.95):
+    n = len(fA)
+    idx = rng.integers(0, n, size=(n_boot, n))
+    fA_b, fB_b, fAB_b = fA[idx], fB[idx], fAB[:, idx]
+    var = np.var(np.concatenate([fA_b, fB_b], axis=1), axis=1)
+    var = np.where(var > 0, var, np.nan)
+    first = np.mean(fB_b[None] * (fAB_b - fA_b[None]), axis=2) / var[None]
+    total = 0.5 * np.mean((fA_b[None] - fAB_b)**2, axis=2) / var[None]
+    alpha = (1.0 - level) / 2
+    return (np.nanquantile(first, [alpha, 1 - alpha], axis=1),
+            np.nanquantile(total, [alpha, 1 - alpha], axis=1))
+
+
+def _cache_path(checksum, factors, n_samples, seed):
+    import hashlib
+    key = json.dumps({'checksum': checksum, 'factors': factors, 'n': n_samples, 'seed': seed},
+                     ensure_ascii=False, sort_keys=True)
+    return os.path.join(cache_dir, f"sobol_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.json")
+
+
+def run_sobol(factors=None, n_samples=4096, seed=42, n_boot=200, n_jobs=-1, use_cache=True):
+    """
+    n_samples: 2의 거듭제곱 (총 모델 평가 수 = n_samples x (d + 2) x 타겟 수)
+    반환: {target: {'factors': [...], 'S1': [...], 'ST': [...], 'S1_ci': [[lo, hi]], 'ST_ci': [[lo, hi]],
+                     'convergence': [{'n': .., 'S1': [...], 'ST': [...]}]}}
+    """
+    if n_samples & (n_samples - 1):
+        raise ValueError("n_samples 는 2의 거듭제곱이어야 합니다.")
+    factors = factors or default_factors()
+    names = list(factors['monomers']) + list(factors['process'])
+    checksum = models_checksum()
+    path = _cache_path(checksum, factors, n_samples, seed)
+    if use_cache and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    features = load_feature_list()
+    forests = load_synthesis_forests()
+    SynthesisVectorizer(features).check(names)
+
+    dim = len(names)
+    A, B, AB = saltelli_matrices(n_samples, dim, seed)
+    U = np.vstack([A, B, AB.reshape(-1, dim)])
+    batches = [U[i:i + BATCH_SIZE] for i in range(0, len(U), BATCH_SIZE)]
+    outputs = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_batch)(b, factors, features, forests) for b in batches
+    )
+
+    rng = np.random.default_rng(seed)
+    results = {}
+    for target in forests:
+        y = np.concatenate([o[target] for o in outputs])
+        fA, fB = y[:n_samples], y[n_samples:2 * n_samples]
+        fAB = y[2 * n_samples:].reshape(dim, n_samples)
+        first, total = sobol_indices(fA, fB, fAB)
+        first_ci, total_ci = _bootstrap_ci(fA, fB, fAB, n_boot, rng)
+
+        # 수렴 진단: Sobol 열의 앞부분(2의 거듭제곱 개)만 사용한 추정치 비교
+        convergence = []
+        n = max(n_samples // 16, 64)
+        while n <= n_samples:
+            s1, st_ = sobol_indices(fA[:n], fB[:n], fAB[:, :n])
+            convergence.append({'n': n, 'S1': s1.tolist(), 'ST': st_.tolist()})
+            n *= 2
+
+        results[target] = {
+            'factors': names,
+            'S1': first.tolist(),
+            'ST': total.tolist(),
+            'S1_ci': first_ci.T.tolist(),
+            'ST_ci': total_ci.T.tolist(),
+            'convergence': convergence,
+            'n_evaluations': int(len(y))
+        }
+
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False)
+    return results
+
+
+def write_report(results, out_path=os.path.join(report_dir, "sobol_indices.md")):
+    lines = ["# Sobol Global Sensitivity Report", ""]
+    for target, res in results.items():
+        lines.append(f"## {target} (model evaluations: {res['n_evaluations']})")
+        lines.append("")
+        lines.append("| Factor | S1 | S1 95% CI | ST | ST 95% CI |")
+        lines.append("| --- | --- | --- | --- | --- |")
+        order = np.argsort(res['ST'])[::-1]
+        for i in order:
+            s1_lo, s1_hi = res['S1_ci'][i]
+            st_lo, st_hi = res['ST_ci'][i]
+            lines.append(f"| {res['factors'][i]} | {res['S1'][i]:.4f} | [{s1_lo:.4f}, {s1_hi:.4f}] "
+                         f"| {res['ST'][i]:.4f} | [{st_lo:.4f}, {st_hi:.4f}] |")
+        lines.append("")
+        lines.append("Convergence (max |change| of ST vs. previous sample size):")
+        prev = None
+        for step in res['convergence']:
+            st_ = np.array(step['ST'])
+            delta = "-" if prev is None else f"{np.max(np.abs(st_ - prev)):.4f}"
+            lines.append(f"- N={step['n']}: {delta}")
+            prev = st_
+        lines.append("")
+    if not os.path.exists(os.path.dirname(out_path)):
+        os.makedirs(os.path.dirname(out_path))
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    print(f"Sobol report saved to {out_path}")
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    sobol_results = run_sobol()
+    print(f"Sobol analysis finished in {time.perf_counter() - start:.2f}s")
+    write_report(sobol_results)
@@ -0,0 +1,327 @@
+import numpy as np
+import pandas as pd
+import csv
+import datetime
+import math
+import os
+import re
+import shutil
+import time
+try:
+    from scripts.clean_data import SYNTHESIS_RAW, COATING_RAW, sniff_separator
+    from scripts.monomer_parser import KNOWN_ADDITIVES
+except ImportError:
+    from clean_data import SYNTHESIS_RAW, COATING_RAW, sniff_separator
+    from monomer_parser import KNOWN_ADDITIVES
+
+# 규모 시험용 합성 실험 기록 생성기 (원시 내보내기와 같은 형식: cp949, 탭 구분, 같은 헤더 / 열 순서, 최신순)
+# - 현재 원시 기록의 행을 주형으로 복원 추출한 뒤 값에 적합된 잡음을 더하는 평활 부트스트랩
+#   (열 사이의 관계 - 배합과 물성, 경화제와 점착력 등 - 은 주형 행 단위로 유지)
+# - 수치 열: 주형 값 + 정규 잡음 (Silverman 대역폭, 값 범위가 넓은 양수 열은 로그 척도), 관측 범위로 제한, 주형의 표기 형식 유지
+# - 모노머 배합: 주 모노머 phr 에 ±10% 변형 후 주형 합계로 재정규화 (첨가제 NDM 등은 유지)
+# - 점착력 / 가열압착 측정값: 반복 측정 간 변동계수(중앙값)를 적합하여 로그 정규 잡음
+# - 경화제 / 첨가제 함량: 일부 행(variant_rate)만 0.8 ~ 1.25 배 변형 (나머지는 실측 수준 그대로)
+# - 키: 합성 배치 코드(S+YYMMDD+접미사), 도포 Lab 일련번호, 도포 날짜를 행 순서대로 새로 부여
+# - 청크 단위로 생성 / 기록하여 수백만 행도 메모리 사용량 일정
+
+CHUNK_SIZE = 100000
+START_DATE = datetime.date(2015, 1, 1)
+VARIANT_RATE = 0.1
+
+SYNTHESIS_KEY = '점착제'
+COATING_KEY = 'Lab 일련번호'
+COATING_DATE = '도포 날짜'
+SYNTHESIS_NUMERIC = ['이론 고형분(%)', '측정 고형분(%)', '수율(%)', '전환율(%)', '응집량(%)', 'Tg', '점도(cP)',
+                     '초기 유화제 농도', 'Scale']
+MEASUREMENT_COLS = ['점착력', '가열압착']
+LEVEL_COLS = ['경화제', '첨가제']
+
+NUMBER = re.compile(r'\d+(?:\.\d+)?')
+MONOMER_TOKEN = re.compile(r'([A-Za-z가-힣0-9\-\.]+)\s+([\d.]+)')
+MEASUREMENT_GROUP = re.compile(r'\(([\d,>.\s]+)\)\*')
+NUMERIC_TEXT = re.compile(r'^-?\d+(?:\.(\d+))?(?:([eE])[-+]?\d+)?$')
+
+
+def read_raw(path):
+    sep = sniff_separator(path)
+    if sep is None:
+        raise ValueError(f"Failed to parse {path} with any separator.")
+    return pd.read_csv(path, sep=sep, encoding='cp949', dtype=str, keep_default_na=False)
+
+
+def _number_format(text):
+    """'0.47' -> '%.2f', '7.3e-03' -> '%.1e', '4.14E-03' -> '%.2E' (수치가 아니면 None)"""
+    match = NUMERIC_TEXT.match(text)
+    if match is None:
+        return None
+    decimals = len(match.group(1) or "")
+    if match.group(2):
+        return f"%.{decimals}{match.group(2)}"
+    return f"%.{decimals}f"
+
+
+def fit_numeric(values):
+    """수치 열 하나의 잡음 모형 (주형 값 기준 정규 잡음 대역폭, 로그 척도 여부, 관측 범위), values: 주형 행 순서의 문자열"""
+    x = pd.to_numeric(pd.Series(values), errors='coerce').dropna().to_numpy(dtype=np.float64)
+    if len(x) < 2:
+        return None
+    log = bool(x.min() > 0 and x.max() / x.min() > 20)
+    z = np.log(x) if log else x
+    bandwidth = 1.06 * z.std() * len(z) ** (-1 / 5)
+    return {
+        'log': log, 'bandwidth': float(bandwidth), 'min': float(x.min()), 'max': float(x.max()),
+        # 주형 행별 값 / 표기 형식 (생성 시 다시 파싱하지 않도록 미리 계산)
+        'values': pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64),
+        'formats': np.array([_number_format(t) for t in values], dtype=object),
+    }
+
+
+def fit_measurement_cv(values):
+    """반복 측정 그룹 '(51,55)*' 안의 변동계수 중앙값"""
+    cvs = []
+    for text in values:
+        for group in MEASUREMENT_GROUP.findall(text):
+            v = np.array([float(n) for n in NUMBER.findall(group)])
+            if len(v) > 1 and v.mean() > 0:
+                cvs.append(v.std() / v.mean())
+    return float(np.median(cvs)) if cvs else 0.0
+
+
+def fit(kind):
+    """kind: 'synthesis' | 'coating', 반환: 생성 프로파일 (주형 행 + 열별 잡음 모형)"""
+    templates = read_raw(SYNTHESIS_RAW if kind == 'synthesis' else COATING_RAW)
+    profile = {'kind': kind, 'templates': templates, 'numeric': {}, 'measurement_cv': {}}
+    if kind == 'synthesis':
+        for col in SYNTHESIS_NUMERIC:
+            model = fit_numeric(templates[col])
+            if model is not None:
+                profile['numeric'][col] = model
+        profile['slots'] = {'모노머': [recipe_slots(t) for t in templates['모노머']]}
+    else:
+        for col in MEASUREMENT_COLS:
+            profile['measurement_cv'][col] = fit_measurement_cv(templates[col])
+        profile['slots'] = {col: [measurement_slots(t) for t in templates[col]] for col in MEASUREMENT_COLS}
+        profile['slots'].update({col: [level_slots(t) for t in templates[col]] for col in LEVEL_COLS})
+    return profile
+
+
+def _suffix(slot):
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA'"""
+    suffix = ""
+    slot += 1
+    while slot:
+        slot, r = divmod(slot - 1, 26)
+        suffix = chr(ord('A') + r) + suffix
+    return suffix
+
+
+def batch_codes(indices, per_day, start=START_DATE):
+    """생성 행 번호 배열 -> 합성 배치 코드 목록 (하루 per_day 개, 접미사 A..Z, AA..)"""
+    days, slots = np.divmod(np.asarray(indices, dtype=np.int64), per_day)
+    dates = {d: f"S{start + datetime.timedelta(days=int(d)):%y%m%d}" for d in np.unique(days)}
+    suffixes = [_suffix(i) for i in range(per_day)]
+    return [dates[d] + suffixes[k] for d, k in zip(days.tolist(), slots.tolist())]
+
+
+def batches_per_day(n_rows, days=3650):
+    """배치 코드 날짜가 약 10년 안에 들도록 하루 배치 수 결정 (실측 기록은 하루 최대 8개 내외)"""
+    return max(8, math.ceil(n_rows / days))
+
+
+def _jitter_numeric(texts, picked, model, rng):
+    """주형 수치 문자열 -> 잡음을 더한 같은 형식의 문자열 (빈 값 / 수치가 아닌 값은 그대로)"""
+    out = np.asarray(texts, dtype=object).copy()
+    values = model['values'][picked]
+    mask = ~np.isnan(values)
+    if not mask.any():
+        return out
+    noise = rng.normal(0.0, model['bandwidth'], size=mask.sum())
+    v = values[mask]
+    v = np.exp(np.log(v) + noise) if model['log'] else v + noise
+    v = np.clip(v, model['min'], model['max'])
+    result = out[mask]
+    formats = model['formats'][picked[mask]]
+    for fmt in set(formats) - {None}:
+        sel = formats == fmt
+        result[sel] = np.char.mod(fmt, v[sel]).astype(object)
+    out[mask] = result
+    return out
+
+
+def _format_phr(value):
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+def _slots(text, spans):
+    """문자열 -> (숫자 자리를 {} 로 바꾼 서식 문자열, 자리별 원래 값)"""
+    parts, values, last = [], [], 0
+    for begin, end in spans:
+        try:
+            value = float(text[begin:end])
+        except ValueError:
+            continue
+        parts.append(text[last:begin].replace('{', '{{').replace('}', '}}'))
+        values.append(value)
+        last = end
+    parts.append(text[last:].replace('{', '{{').replace('}', '}}'))
+    return "{}".join(parts), np.array(values)
+
+
+def recipe_slots(text):
+    """모노머 배합 문자열의 주 모노머 phr 자리 (첨가제 NDM 등은 고정)"""
+    return _slots(text, [m.span(2) for m in MONOMER_TOKEN.finditer(text)
+                         if m.group(1).upper() not in KNOWN_ADDITIVES])
+
+
+def measurement_slots(text):
+    """점착력 / 가열압착 문자열의 측정값 그룹 '(...)*' 안 숫자 자리"""
+    return _slots(text, [(g.start(1) + n.start(), g.start(1) + n.end())
+                         for g in MEASUREMENT_GROUP.finditer(text) for n in NUMBER.finditer(g.group(1))])
+
+
+def level_slots(text):
+    """경화제 / 첨가제 '(CX100/1%)' 의 % 값 자리"""
+    return _slots(text, [m.span(1) for m in re.finditer(r'/(\d+(?:\.\d+)?)%', text)])
+
+
+def _fill_slots(texts, picked, slots, rng, draw, fmt_value, rows=None):
+    """
+    주형 행 번호(picked)별로 묶어 자리 값에 잡음을 한 번에 적용한 뒤 서식 문자열 채움
+    draw(base, n) -> (n, len(base)) 새 값, rows: 변형할 행 마스크 (None 이면 전체)
+    """
+    out = np.asarray(texts, dtype=object).copy()
+    target = np.arange(len(picked)) if rows is None else np.flatnonzero(rows)
+    order = target[np.argsort(picked[target], kind='stable')]
+    bounds = np.flatnonzero(np.diff(picked[order])) + 1
+    for group in np.split(order, bounds):
+        if len(group) == 0:
+            continue
+        fmt, base = slots[picked[group[0]]]
+        if len(base) == 0:
+            continue
+        values = draw(base, len(group))
+        out[group] = [fmt.format(*map(fmt_value, row)) for row in values]
+    return out
+
+
+def _draw_recipe(rng):
+    def draw(base, n):
+        scaled = base * rng.uniform(0.9, 1.1, size=(n, len(base)))
+        return scaled * (base.sum() / scaled.sum(axis=1))[:, None]
+    return draw
+
+
+def _draw_measurement(rng, cv):
+    def draw(base, n):
+        return np.maximum(0, np.round(base * np.exp(rng.normal(0.0, cv, size=(n, len(base)))))).astype(np.int64)
+    return draw
+
+
+def _draw_levels(rng):
+    def draw(base, n):
+        return base * rng.uniform(0.8, 1.25, size=(n, len(base)))
+    return draw
+
+
+def generate_chunk(profile, indices, rng, n_synthesis=None):
+    """
+    생성 행 번호(indices) 에 해당하는 원시 형식 행 DataFrame
+    n_synthesis: 도포 기록의 점착제 코드를 함께 생성한 합성 기록의 배치 코드에서 고르기 위한 합성 행 수
+    """
+    templates = profile['templates']
+    picked = rng.integers(0, len(templates), size=len(indices))
+    chunk = templates.iloc[picked].reset_index(drop=True).copy()
+
+    if profile['kind'] == 'synthesis':
+        for col, model in profile['numeric'].items():
+            chunk[col] = _jitter_numeric(chunk[col].to_numpy(), picked, model, rng)
+        chunk['모노머'] = _fill_slots(chunk['모노머'], picked, profile['slots']['모노머'], rng, _draw_recipe(rng),
+                                   _format_phr)
+        per_day = batches_per_day(profile['n_rows'])
+        chunk[SYNTHESIS_KEY] = batch_codes(indices, per_day)
+        return chunk
+
+    for col, cv in profile['measurement_cv'].items():
+        chunk[col] = _fill_slots(chunk[col], picked, profile['slots'][col], rng, _draw_measurement(rng, cv), str)
+    for col in LEVEL_COLS:
+        variant = rng.random(len(picked)) < VARIANT_RATE
+        chunk[col] = _fill_slots(chunk[col], picked, profile['slots'][col], rng, _draw_levels(rng), _format_phr,
+                                 rows=variant)
+    chunk[COATING_KEY] = [str(i + 1) for i in indices]
+    # 도포 날짜는 일련번호 순서대로 약 10년에 걸쳐 배분
+    days = np.asarray(indices, dtype=np.int64) * 3650 // max(profile['n_rows'], 1)
+    dates = {x: START_DATE + datetime.timedelta(days=int(x)) for x in np.unique(days)}
+    chunk[COATING_DATE] = [f"{dates[x].year}-{dates[x].month}-{dates[x].day} 0:00:00" for x in days.tolist()]
+    if n_synthesis:
+        has_code = chunk[SYNTHESIS_KEY].str.match(r'^S\d{6}')
+        codes = rng.integers(0, n_synthesis, size=int(has_code.sum()))
+        per_day = batches_per_day(n_synthesis)
+        chunk.loc[has_code, SYNTHESIS_KEY] = batch_codes(codes, per_day)
+    return chunk
+
+
+def write_log(kind, n_rows, path, seed=42, chunksize=CHUNK_SIZE, n_synthesis=None, profile=None):
+    """
+    원시 형식 기록 n_rows 행을 path 에 기록 (최신 행이 먼저 오도록 역순으로 청크 생성)
+    반환: 기록한 행 수
+    """
+    profile = dict(profile or fit(kind), n_rows=n_rows)
+    rng = np.random.default_rng(seed)
+    header = list(profile['templates'].columns)
+    with open(path, "w", encoding="cp949", newline="") as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow(header)
+        for hi in range(n_rows, 0, -chunksize):
+            indices = np.arange(hi - 1, max(hi - chunksize, 0) - 1, -1)
+            chunk = generate_chunk(profile, indices, rng, n_synthesis)
+            writer.writerows(chunk[header].itertuples(index=False, name=None))
+    return n_rows
+
+
+def generate(output_dir, synthesis_rows, coating_rows, seed=42, chunksize=CHUNK_SIZE):
+    """output_dir 에 원시 기록과 같은 파일명으로 합성 / 도포 기록 생성, 반환: {kind: (경로, 행 수, 초)}"""
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    jobs = [('synthesis', synthesis_rows, SYNTHESIS_RAW, None),
+            ('coating', coating_rows, COATING_RAW, synthesis_rows)]
+    for offset, (kind, n_rows, raw_path, n_synthesis) in enumerate(jobs):
+        if not n_rows:
+            continue
+        start = time.perf_counter()
+        path = os.path.join(output_dir, os.path.basename(raw_path))
+        write_log(kind, n_rows, path, seed + offset, chunksize, n_synthesis)
+        results[kind] = (path, n_rows, time.perf_counter() - start)
+    return results
+
+
+def make_workspace(workspace, synthesis_rows, coating_rows, seed=42, chunksize=CHUNK_SIZE):
+    """scripts/ 사본 + 생성 기록(raw_data/)으로 구성된 작업 공간 (그 안에서 파이프라인 / 학습을 그대로 실행)"""
+    scripts_dir = os.path.dirname(os.path.abspath(__file__))
+    target = os.path.join(workspace, "scripts")
+    if os.path.exists(target):
+        shutil.rmtree(target)
+    shutil.copytree(scripts_dir, target, ignore=shutil.ignore_patterns("__pycache__"))
+    return generate(os.path.join(workspace, "raw_data"), synthesis_rows, coating_rows, seed, chunksize)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic raw lab logs for scale testing")
+    parser.add_argument("--synthesis-rows", type=int, default=100000)
+    parser.add_argument("--coating-rows", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output-dir", help="directory for the generated raw CSV exports")
+    target.add_argument("--workspace", help="create scripts/ + raw_data/ here to run pipeline.py against the logs")
+    args = parser.parse_args()
+
+    if args.workspace:
+        results = make_workspace(args.workspace, args.synthesis_rows, args.coating_rows, args.seed, args.chunksize)
+    else:
+        results = generate(args.output_dir, args.synthesis_rows, args.coating_rows, args.seed, args.chunksize)
+    for kind, (path, n_rows, seconds) in results.items():
+        print(f"{kind}: {n_rows:,} rows -> {path} ({os.path.getsize(path) / 1e6:.1f} MB, {seconds:.1f}s)")
+    if args.workspace:
+        print(f"Run the pipeline with: python {os.path.join(args.workspace, 'scripts', 'pipeline.py')} --force")
@@ -0,0 +1,43 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+try:
+    from scripts import audit_log
+except ImportError:
+    import audit_log
+
+# 감사 기록 기록 스레드 확인: JSON 으로 바꿀 수 없는 기록이 섞여도 스레드가 계속 살아 있고 이후 기록이 파일에 남는지
+
+
+def _wait_written(n, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while audit_log.stats()['written'] < n and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return audit_log.stats()['written'] >= n
+
+
+def test_bad_record_does_not_stop_writer():
+    with tempfile.TemporaryDirectory() as directory:
+        audit_log.configure(enabled=True, directory=directory, flush_interval=0.1)
+        written = audit_log.stats()['written']
+
+        audit_log.record('synthesis', {'x': 1}, {(1, 2): 3})   # dict 키가 튜플 -> json 변환 실패
+        assert _wait_written(written + 1), "bad record was not flushed"
+        assert audit_log._writer[0].is_alive()
+
+        audit_log.record('coating', {'도포량_num': 2.5, 'fabric': 'T45'}, {'점착력': 300.0})
+        assert _wait_written(written + 2), "record after a bad one was not flushed"
+
+        entries = []
+        for path in audit_log.list_files(directory):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entries += [json.loads(line) for line in f]
+        assert entries[0]['kind'] == 'synthesis' and 'error' in entries[0]
+        assert entries[1]['kind'] == 'coating' and entries[1]['inputs']['fabric'] == 'T45'
+        print(f"OK: {len(entries)} records in {os.path.basename(directory)}, writer alive")
+
+
+if __name__ == "__main__":
+    test_bad_record_does_not_stop_writer()
@@ -1,36 +1,40 @@
-import joblib
-import pandas as pd
 import numpy as np
 import os
+try:
+    from scripts.feature_vectorizer import SynthesisVectorizer
+    from scripts.sensitivity_analysis import load_feature_list, load_synthesis_forests, ice_1d
+except ImportError:
+    from feature_vectorizer import SynthesisVectorizer
+    from sensitivity_analysis import load_feature_list, load_synthesis_forests, ice_1d
 
-base_path = r"e:\Github\SG_proj_001"
+# 현재 스크립트 위치 기준 상위 디렉토리 경로 설정
+script_dir = os.path.dirname(os.path.abspath(__file__))
+base_path = os.path.dirname(script_dir)
 model_dir = os.path.join(base_path, "models")
-feature_path = os.path.join(model_dir, "feature_list.txt")
+report_path = os.path.join(base_path, "reports", "sensitivity_result.txt")
 
-def test_sensitivity():
-    if not os.path.exists(feature_path):
+def test_sensitivity(tmp_path):
+    """
+    중요도 상위 피처 / 온도 수준별 예측 확인 (예측값이 유한하고 ICE 결과가 (배경 행 수, 온도 수준 수) 형태인지)
+    리포트는 tmp_path 디렉터리에 기록 (pytest 는 임시 디렉터리, 스크립트 실행 시에는 reports/)
+    """
+    all_features = load_feature_list()
+    if not all_features:
         print("Feature list not found.")
         return
 
-    with open(feature_path, "r", encoding="utf-8-sig") as f:
-        all_features = [line.strip() for line in f.readlines()]
-
-    models = {}
-    for file in os.listdir(model_dir):
-        if file.endswith(".joblib"):
-            target_name = file.replace("model_rf_", "").replace(".joblib", "")
-            models[target_name] = joblib.load(os.path.join(model_dir, file))
-
-    if not models:
+    # 합성 피처 목록을 공유하는 합성 모델만 대상 (도포 모델 제외)
+    forests = load_synthesis_forests()
+    if not forests:
         print("No models found.")
         return
 
     # Base input (from S250421A)
-    base_input = {feat: 0.0 for feat in all_features}
-    base_input.update({
+    # 화학 도메인 피처는 학습 데이터와 동일하게 배합비로부터 자동 계산
+    background = SynthesisVectorizer(all_features).transform({
         '온도': 83.0,
         '반응시간': 4.75,
-        '이론 고형분(%)': 0.48, # Note: in CSV it was 0.48, in app it's 48.0. Wait.
+        '이론 고형분(%)': 0.48,
         'Scale': 524.27,
         'monomer_BA': 89.7,
         'monomer_MMA': 9.0,
@@ -39,31 +43,32 @@ def test_sensitivity():
 
     output = []
     output.append("--- Feature Importance (Top 5) ---")
-    for target, model in models.items():
-        importances = model.feature_importances_
+    for target, forest in forests.items():
+        importances = forest.feature_importances
         indices = np.argsort(importances)[::-1]
         output.append(f"Target: {target}")
         for i in range(min(5, len(importances))):
             output.append(f"  {all_features[indices[i]]}: {importances[indices[i]]:.4f}")
-        
+
         if '온도' in all_features:
             temp_idx = all_features.index('온도')
             output.append(f"  온도 Importance: {importances[temp_idx]:.4f}")
 
     output.append("\n--- Temperature Sensitivity Test ---")
     temps = [50.0, 70.0, 83.0, 100.0]
-    for target, model in models.items():
+    for target, forest in forests.items():
         output.append(f"Target: {target}")
-        for t in temps:
-            test_input = base_input.copy()
-            test_input['온도'] = t
-            df_test = pd.DataFrame([test_input])[all_features]
-            pred = model.predict(df_test)[0]
+        # 온도 4수준을 한 번의 배치 예측으로 계산
+        ice, preds = ice_1d(forest, background, all_features, '온도', temps)
+        assert ice.shape == (background.shape[0], len(temps)) and preds.shape == (len(temps),)
+        assert np.all(np.isfinite(preds)), f"non-finite prediction for {target}"
+        for t, pred in zip(temps, preds):
             output.append(f"  Temp {t}: Prediction = {pred:.4f}")
 
-    with open(os.path.join(base_path, "sensitivity_report.txt"), "w", encoding="utf-8") as rf:
+    path = os.path.join(str(tmp_path), os.path.basename(report_path))
+    with open(path, "w", encoding="utf-8") as rf:
         rf.write("\n".join(output))
-    print("Report saved to sensitivity_report.txt")
+    print(f"Report saved to {path}")
 
 if __name__ == "__main__":
-    test_sensitivity()
+    test_sensitivity(os.path.dirname(report_path))
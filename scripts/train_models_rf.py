@@ -1,10 +1,13 @@
-import pandas as pd
 import numpy as np
 import os
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split, cross_val_score, KFold
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
+try:
+    from scripts.columnar_store import read_table
+except ImportError:
+    from columnar_store import read_table
 
 # 현재 스크립트 위치 기준 상위 디렉토리 경로 설정
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,21 +15,22 @@ base_dir = os.path.dirname(script_dir)
 input_path = os.path.join(base_dir, "data_cleaned", "model_features.csv")
 model_dir = os.path.join(base_dir, "models")
 report_dir = os.path.join(base_dir, "reports")
-if not os.path.exists(model_dir):
-    os.makedirs(model_dir)
-if not os.path.exists(report_dir):
-    os.makedirs(report_dir)
+report_path = os.path.join(report_dir, "training_metrics.txt")
 
 def train_property_models_rf():
+    os.makedirs(model_dir, exist_ok=True)
     if not os.path.exists(input_path):
         print(f"Error: Feature dataset not found at {input_path}")
         return []
 
-    df = pd.read_csv(input_path, encoding='utf-8-sig')
+    # 입력 피처는 float32 로 저장된 그대로 사용 (트리 모델은 학습 시 입력을 float32 로 변환)
+    df = read_table('model_features', upcast=False)
     
     # Define features and targets
     target_cols = ['수율(%)', '점도(cP)', 'Tg', '입도(nm)']
     feature_cols = [c for c in df.columns if c not in target_cols]
+    existing_targets = [c for c in target_cols if c in df.columns]
+    df[existing_targets] = df[existing_targets].astype(np.float64)
     
     X = df[feature_cols]
     
@@ -90,16 +94,19 @@ def train_property_models_rf():
         
     return results
 
+def write_training_report(metrics, path=report_path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# Model Training Report (RandomForest with Cross-Validation)\n\n")
+        f.write("| Target | Data Points | CV R2 Mean | CV R2 Std | Test R2 | Test MAE |\n")
+        f.write("| --- | --- | --- | --- | --- | --- |\n")
+        for m in metrics:
+            f.write(f"| {m['Target']} | {m['DataPoints']} | {m['CV_R2_Mean']:.4f} | {m['CV_R2_Std']:.4f} | {m['Test_R2']:.4f} | {m['Test_MAE']:.4f} |\n")
+
 if __name__ == "__main__":
     print("Starting AI Model Training (RandomForest with K-Fold CV)...")
     metrics = train_property_models_rf()
     print("\nTraining Complete.")
     
     # Save training report (in reports folder)
-    report_path = os.path.join(report_dir, "training_metrics.txt")
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write("# Model Training Report (RandomForest with Cross-Validation)\n\n")
-        f.write("| Target | Data Points | CV R2 Mean | CV R2 Std | Test R2 | Test MAE |\n")
-        f.write("| --- | --- | --- | --- | --- | --- |\n")
-        for m in metrics:
-            f.write(f"| {m['Target']} | {m['DataPoints']} | {m['CV_R2_Mean']:.4f} | {m['CV_R2_Std']:.4f} | {m['Test_R2']:.4f} | {m['Test_MAE']:.4f} |\n")
+    write_training_report(metrics)
@@ -0,0 +1,168 @@
+import numpy as np
+from scipy import sparse
+try:
+    from scripts.forest_engine import get_flat_forest
+except ImportError:
+    from forest_engine import get_flat_forest
+
+# RandomForest 예측값 기여도 분해 엔진 (평탄화 포레스트 배열 기반, 배치 단위 벡터화)
+# - path_contributions: 루트->리프 경로의 분기별 노드값 변화를 분기 변수에 귀속 (Saabas 방식, 가장 빠름)
+# - tree_shap: 경로 의존(path-dependent) TreeSHAP 정확해
+#   트리의 모든 루트->리프 경로를 고유 변수 개수별로 묶은 뒤, 경로 x 입력 행 전체에 대해
+#   EXTEND / UNWIND 가중치 계산을 한꺼번에 수행
+# 두 방식 모두 bias + 기여도 합계 = 모델 예측값
+
+MAX_BLOCK = 2_000_000  # (입력 행 x 경로) 블록 크기 상한 (메모리 제한)
+
+
+def path_contributions(model, X):
+    """
+    반환: (bias (n,), contributions (n, n_features))
+    """
+    forest = get_flat_forest(model)
+    X = forest._as_matrix(X)
+    n = X.shape[0]
+    rows = np.arange(n)[:, None]
+    node = np.broadcast_to(forest.roots, (n, forest.n_trees)).copy()
+    contrib = np.zeros(n * forest.n_features)
+    check_missing = forest.has_missing_rule and np.isnan(X).any()
+    for _ in range(forest.max_depth):
+        feat = forest.feature[node]
+        x = X[rows, feat]
+        go_left = x <= forest.threshold[node]
+        if check_missing:
+            go_left |= np.isnan(x) & forest.missing_left[node]
+        child = np.where(go_left, forest.left[node], forest.right[node])
+        delta = np.where(forest.is_leaf[node], 0.0, forest.value[child] - forest.value[node])
+        contrib += np.bincount((rows * forest.n_features + feat).ravel(), weights=delta.ravel(),
+                               minlength=n * forest.n_features)
+        node = child
+    bias = np.full(n, forest.value[forest.roots].mean())
+    return bias, contrib.reshape(n, forest.n_features) / forest.n_trees
+
+
+class _PathTable:
+    """포레스트의 모든 루트->리프 경로를 (고유 변수 개수별) 배열로 정리한 구조"""
+
+    def __init__(self, forest):
+        feature, threshold, cover, value = forest.feature, forest.threshold, forest.cover, forest.value
+        left, right, is_leaf = forest.left, forest.right, forest.is_leaf
+        missing_left = forest.missing_left
+        paths = []
+        for root in forest.roots:
+            # (node, {feature: (lower, upper, zero_fraction, nan_ok)}) 스택 기반 DFS
+            # nan_ok: 해당 변수가 결측일 때 이 경로를 따라가는지 여부 (sklearn 결측 분기 규칙)
+            stack = [(int(root), {})]
+            while stack:
+                node, conds = stack.pop()
+                if is_leaf[node]:
+                    paths.append((conds, value[node]))
+                    continue
+                f, thr = int(feature[node]), threshold[node]
+                for child, go_left in ((int(left[node]), True), (int(right[node]), False)):
+                    lo, hi, z, nan_ok = conds.get(f, (-np.inf, np.inf, 1.0, True))
+                    lo, hi = (lo, min(hi, thr)) if go_left else (max(lo, thr), hi)
+                    nan_ok = nan_ok and (bool(missing_left[node]) == go_left)
+                    new = dict(conds)
+                    new[f] = (lo, hi, z * cover[child] / cover[node], nan_ok)
+                    stack.append((child, new))
+
+        self.groups = []
+        by_length = {}
+        for conds, v in paths:
+            by_length.setdefault(len(conds), []).append((conds, v))
+        for length, items in sorted(by_length.items()):
+            feats = np.array([list(c.keys()) for c, _ in items], dtype=np.int64).reshape(len(items), length)
+            bounds = np.array([[c[f][:2] for f in c] for c, _ in items]).reshape(len(items), length, 2)
+            zeros = np.array([[c[f][2] for f in c] for c, _ in items]).reshape(len(items), length)
+            nan_ok = np.array([[c[f][3] for f in c] for c, _ in items], dtype=bool).reshape(len(items), length)
+            values = np.array([v for _, v in items])
+            self.groups.append((length, feats, bounds[..., 0], bounds[..., 1], zeros, nan_ok, values))
+
+
+def _path_table(forest):
+    table = getattr(forest, '_path_table', None)
+    if table is None:
+        table = _PathTable(forest)
+        forest._path_table = table
+    return table
+
+
+def path_table_state(forest):
+    """경로 테이블 배열 묶음 (모델 번들 저장용)"""
+    return _path_table(forest).groups
+
+
+def restore_path_table(forest, groups):
+    """저장된 경로 테이블을 포레스트에 연결 (첫 기여도 계산 시 경로 순회 생략)"""
+    table = _PathTable.__new__(_PathTable)
+    table.groups = groups
+    forest._path_table = table
+    return forest
+
+
+def _shap_group(X, length, feats, lower, upper, zeros, nan_ok, values, n_features):
+    """고유 변수 length 개인 경로 묶음에 대한 SHAP 기여도 (n, n_features)"""
+    n, P = X.shape[0], feats.shape[0]
+    phi = np.zeros((n, n_features))
+    if length == 0:
+        return phi
+    x = X[:, feats]                                    # (n, P, L)
+    ones = ((x > lower) & (x <= upper)).astype(np.float64)
+    if np.isnan(X).any():
+        # 결측값은 예측 시와 동일하게 학습된 결측 분기 방향을 따름
+        missing = np.isnan(x)
+        ones[missing] = np.broadcast_to(nan_ok[None], x.shape)[missing]
+
+    # EXTEND: 0번 원소(bias, z = o = 1)부터 고유 변수를 하나씩 추가하며 순열 가중치 갱신
+    w = np.zeros((n, P, length + 1))
+    w[..., 0] = 1.0
+    for e in range(1, length + 1):
+        o_e, z_e = ones[..., e - 1], zeros[None, :, e - 1]
+        for i in range(e - 1, -1, -1):
+            w[..., i + 1] += o_e * w[..., i] * (i + 1) / (e + 1)
+            w[..., i] = z_e * w[..., i] * (e - i) / (e + 1)
+
+    # UNWIND: 각 원소를 제외했을 때의 가중치 합 -> (o - z) * 리프값 으로 기여도 산출
+    L = length
+    for e in range(1, L + 1):
+        o_e, z_e = ones[..., e - 1], zeros[None, :, e - 1]
+        total_one = np.zeros((n, P))
+        total_zero = np.zeros((n, P))
+        next_one = w[..., L]
+        for j in range(L - 1, -1, -1):
+            tmp = next_one / (j + 1)
+            total_one += tmp
+            next_one = w[..., j] - tmp * z_e * (L - j)
+            total_zero += w[..., j] / (z_e * (L - j))
+        total = np.where(o_e > 0, total_one, total_zero) * (L + 1)
+        contrib = total * (o_e - z_e) * values[None, :]
+        onehot = sparse.csr_matrix((np.ones(P), (np.arange(P), feats[:, e - 1])), shape=(P, n_features))
+        phi += (onehot.T @ contrib.T).T
+    return phi
+
+
+def tree_shap(model, X):
+    """
+    경로 의존 TreeSHAP
+    반환: (bias (n,), contributions (n, n_features)) - bias 는 트리별 루트 평균값(기대 예측값)
+    """
+    forest = get_flat_forest(model)
+    X = forest._as_matrix(X).astype(np.float64)
+    table = _path_table(forest)
+    n = X.shape[0]
+    phi = np.zeros((n, forest.n_features))
+    for length, feats, lower, upper, zeros, nan_ok, values in table.groups:
+        # 입력 행 x 경로 블록이 너무 커지지 않도록 행 단위로 분할
+        step = max(1, MAX_BLOCK // max(1, feats.shape[0] * max(length, 1)))
+        for start in range(0, n, step):
+            phi[start:start + step] += _shap_group(X[start:start + step], length, feats, lower, upper,
+                                                   zeros, nan_ok, values, forest.n_features)
+    bias = np.full(n, forest.value[forest.roots].mean())
+    return bias, phi / forest.n_trees
+
+
+def top_contributors(contributions, features, k=5):
+    """단일 행 기여도에서 절대값 기준 상위 k개 (피처명, 기여도) 목록"""
+    order = np.argsort(np.abs(contributions))[::-1][:k]
+    return [(features[i], float(contributions[i])) for i in order if contributions[i] != 0]